@@ -0,0 +1,273 @@
+"""
+agents/admission.py
+
+Admission control and cost projection for the Alert Triage Agent.
+
+During an alert storm, triage requests are largest exactly when answers are
+needed fastest. Two mechanisms bound the latency of `/agents/triage` (the
+NDJSON and streaming ingest endpoints share its admission queue):
+- `AdmissionController` caps how many triage jobs run at once. Requests over
+  the cap wait in a FIFO queue of bounded depth; when the queue is full they
+  are rejected immediately (429), and a request whose deadline passes while
+  queued is rejected too, instead of running after its caller gave up.
+- `CostModel` keeps a moving average of the clustering time per alert of
+  each engine, measured on recent requests (so it includes the inference
+  queueing of a loaded server). The pipeline uses it to project whether the
+  requested engine fits in a request's remaining deadline, and falls back to
+  a cheaper engine when it does not (see `triage_agent.process_alert_triage`).
+  Estimates start at a prior, are robust to single outliers, decay back to
+  the prior when not refreshed, and an engine that is being avoided is probed
+  now and then, so one slow request cannot degrade all later ones for good.
+
+`AdmissionMiddleware` applies the queue cap before the request body is read:
+validating a storm-sized body costs more event-loop time than the triage
+of a small request, so a request that would be turned away anyway is
+rejected before that work. It also records when each request arrived
+(`request.state.received_at`), so deadlines include time spent reading the body.
+
+The controller lives on the event loop: `admit` must be entered from
+coroutines of one loop, and needs no locks.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Sequence
+
+# --- Constants ---
+# Weight of the newest observation in the per-engine moving averages.
+COST_SMOOTHING = 0.2
+# An observation counts as at most this multiple of the current estimate, so a
+# single outlier moves it by a bounded step while a sustained slowdown still compounds.
+COST_OUTLIER_FACTOR = 10.0
+# Half-life, in seconds, with which an estimate that is not refreshed decays back to its prior.
+COST_DECAY_SECONDS = 60.0
+# Seconds between probes of an engine whose estimate rules it out (0 disables probing).
+COST_PROBE_INTERVAL_SECONDS = 30.0
+
+
+class Overloaded(Exception):
+    """A request was not admitted; `reason` is "queue_full" or "deadline"."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Runs at most `max_concurrent` jobs at once, with at most `max_queued`
+    waiting for a slot. A `max_concurrent` of 0 disables admission control.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max(0, max_queued)
+        self.running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new request would be rejected because the queue is full."""
+        return 0 < self.max_concurrent <= self.running and len(self._waiters) >= self.max_queued
+
+    @asynccontextmanager
+    async def admit(self, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Holds a slot for the enclosed block.
+
+        Args:
+            deadline: `time.monotonic()` time after which waiting is pointless.
+
+        Raises:
+            Overloaded: If the queue is full or the deadline passes while queued.
+        """
+        if self.max_concurrent <= 0:
+            yield
+            return
+        await self._acquire(deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        if self.running < self.max_concurrent and not self._waiters:
+            self.running += 1
+            return
+        if len(self._waiters) >= self.max_queued:
+            raise Overloaded("queue_full", _queue_full_message(self.max_queued))
+        timeout = None if deadline is None else deadline - time.monotonic()
+        if timeout is not None and timeout <= 0:
+            raise Overloaded("deadline", "Request deadline passed before triage could start.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over just as we gave up: pass it on.
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Overloaded("deadline", "Request deadline passed while queued for triage.") from None
+            raise
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so `running` never drops
+        # below the cap while requests are queued.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+
+def _queue_full_message(max_queued: int) -> str:
+    return f"Triage queue is full ({max_queued} requests waiting)."
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that answers 429 for POSTs to `paths` while `controller()`
+    is saturated, without reading the request body. Admitted requests get
+    their arrival time as `request.state.received_at` (`time.monotonic()`).
+
+    Args:
+        app: The wrapped ASGI application.
+        controller: Returns the current AdmissionController (looked up per request).
+        paths: Request paths guarded by the controller.
+        retry_after: Seconds sent in the Retry-After header.
+        on_reject: Called with the rejection reason, e.g. to count it.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: Callable[[], AdmissionController],
+        paths: Sequence[str],
+        retry_after: int = 1,
+        on_reject: Optional[Callable[[str], None]] = None,
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+        self.retry_after = retry_after
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller()
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+            or not controller.saturated
+        ):
+            if scope["type"] == "http":
+                scope.setdefault("state", {})["received_at"] = time.monotonic()
+            await self.app(scope, receive, send)
+            return
+
+        if self.on_reject is not None:
+            self.on_reject("queue_full")
+        body = json.dumps({"detail": _queue_full_message(controller.max_queued)}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class CostModel:
+    """
+    Moving average of clustering seconds per alert, per engine.
+
+    Each average starts at the engine's prior and moves toward every
+    observation by `smoothing`, with observations capped at
+    COST_OUTLIER_FACTOR times the current estimate. Between observations the
+    estimate decays back toward the prior with a half-life of `decay_seconds`.
+
+    Args:
+        priors: Seconds per alert assumed for each engine before any observation.
+        smoothing: Weight of the newest observation.
+        decay_seconds: Half-life of the decay toward the prior (0 disables it).
+        probe_interval: Seconds between probes granted by `claim_probe` (0 disables them).
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        priors: Dict[str, float],
+        smoothing: float = COST_SMOOTHING,
+        decay_seconds: float = COST_DECAY_SECONDS,
+        probe_interval: float = COST_PROBE_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.smoothing = smoothing
+        self.decay_seconds = decay_seconds
+        self.probe_interval = probe_interval
+        self._clock = clock
+        self._priors = dict(priors)
+        self._seconds_per_alert = dict(priors)
+        now = clock()
+        # Last observation and last probe of each engine.
+        self._updated: Dict[str, float] = {engine: now for engine in priors}
+        self._probed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _current(self, engine: str, now: float) -> float:
+        """The decayed estimate of `engine`; the lock must be held."""
+        prior = self._priors.get(engine, 0.0)
+        estimate = self._seconds_per_alert.get(engine, prior)
+        if self.decay_seconds > 0:
+            age = max(0.0, now - self._updated.get(engine, now))
+            estimate = prior + (estimate - prior) * 0.5 ** (age / self.decay_seconds)
+        return estimate
+
+    def observe(self, engine: str, alerts: int, seconds: float) -> None:
+        if alerts <= 0:
+            return
+        rate = seconds / alerts
+        now = self._clock()
+        with self._lock:
+            current = self._current(engine, now)
+            if current > 0:
+                rate = min(rate, current * COST_OUTLIER_FACTOR)
+            self._seconds_per_alert[engine] = current + self.smoothing * (rate - current)
+            self._updated[engine] = now
+
+    def projected(self, engine: str, alerts: int) -> float:
+        """Projected clustering seconds for `alerts` alerts with `engine`."""
+        with self._lock:
+            return self._current(engine, self._clock()) * alerts
+
+    def claim_probe(self, engine: str) -> bool:
+        """
+        Whether the caller may run `engine` although its estimate rules it out,
+        to re-measure it. Granted at most once per `probe_interval`, counted from
+        the engine's last observation or probe.
+        """
+        if self.probe_interval <= 0:
+            return False
+        now = self._clock()
+        with self._lock:
+            last = max(self._updated.setdefault(engine, now), self._probed.get(engine, now - self.probe_interval))
+            if now - last < self.probe_interval:
+                return False
+            self._probed[engine] = now
+            return True
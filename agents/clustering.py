@@ -0,0 +1,108 @@
+"""
+agents/clustering.py
+
+Pluggable similarity clustering backends for the Alert Triage Agent.
+
+Both backends take a matrix of embeddings and a cosine similarity threshold and
+return clusters as lists of row indices, largest first, with the central item
+of each cluster first:
+- "exact": sentence-transformers' community detection. It builds the full n x n
+  similarity matrix, which is the most faithful but grows quadratically.
+- "leader": single-pass leader clustering against an incrementally grown index
+  of leader embeddings. An item joins the most similar leader if their cosine
+  similarity reaches the threshold, otherwise it becomes a new leader. This is
+  O(n * clusters) in time and O(n) in memory.
+
+Both use the same membership rule (similarity to the cluster's central item >=
+threshold), so on well-separated data they produce the same partition.
+"""
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+# --- Constants ---
+# Groups with at most this many embeddings use exact community detection in "auto" mode.
+EXACT_CLUSTERING_MAX_GROUP_SIZE = 2000
+# Number of items compared against the leader index per matrix multiplication.
+LEADER_BLOCK_SIZE = 256
+
+ClusteringBackend = Callable[[torch.Tensor, float], List[List[int]]]
+
+
+def exact_clustering(embeddings: torch.Tensor, threshold: float) -> List[List[int]]:
+    """All-pairs community detection (sentence-transformers)."""
+    # Imported here so that importing the agent does not import sentence-transformers
+    # (and transformers) until the embedding engine actually clusters.
+    from sentence_transformers import util
+
+    return [
+        [int(idx) for idx in community]
+        for community in util.community_detection(
+            embeddings, min_community_size=1, threshold=threshold
+        )
+    ]
+
+
+def leader_clustering(embeddings: torch.Tensor, threshold: float) -> List[List[int]]:
+    """
+    Approximate clustering: each item joins its most similar leader when the
+    cosine similarity reaches `threshold`, otherwise it starts a new cluster.
+    """
+    vectors = torch.nn.functional.normalize(torch.as_tensor(embeddings), p=2, dim=1).cpu().numpy().astype(np.float32)
+    n, dimension = vectors.shape
+    leaders = np.empty((n, dimension), dtype=np.float32)
+    members: List[List[int]] = []
+
+    for start in range(0, n, LEADER_BLOCK_SIZE):
+        block = vectors[start:start + LEADER_BLOCK_SIZE]
+        known = len(members)
+        # Similarities against the leaders that existed before this block, in one product.
+        known_scores = block @ leaders[:known].T if known else None
+
+        for offset, vector in enumerate(block):
+            best, best_score = -1, -1.0
+            if known:
+                best = int(np.argmax(known_scores[offset]))
+                best_score = float(known_scores[offset][best])
+            if len(members) > known:
+                # Leaders created earlier in this block.
+                new_scores = leaders[known:len(members)] @ vector
+                new_best = int(np.argmax(new_scores))
+                if new_scores[new_best] > best_score:
+                    best, best_score = known + new_best, float(new_scores[new_best])
+
+            if best_score >= threshold:
+                members[best].append(start + offset)
+            else:
+                leaders[len(members)] = vector
+                members.append([start + offset])
+
+    return sorted(members, key=len, reverse=True)
+
+
+CLUSTERING_BACKENDS: Dict[str, ClusteringBackend] = {
+    "exact": exact_clustering,
+    "leader": leader_clustering,
+}
+
+
+def cluster_embeddings(
+    embeddings: torch.Tensor,
+    threshold: float,
+    backend: str = "auto",
+    max_exact_size: int = EXACT_CLUSTERING_MAX_GROUP_SIZE,
+) -> List[List[int]]:
+    """
+    Clusters `embeddings` with the named backend. "auto" uses exact community
+    detection up to `max_exact_size` items and leader clustering above it.
+    """
+    if backend == "auto":
+        backend = "exact" if len(embeddings) <= max_exact_size else "leader"
+    try:
+        clusterer = CLUSTERING_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown clustering backend '{backend}'. Choose from: auto, {', '.join(CLUSTERING_BACKENDS)}."
+        )
+    return clusterer(embeddings, threshold)
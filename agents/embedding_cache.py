@@ -0,0 +1,271 @@
+"""
+agents/embedding_cache.py
+
+Caching layer in front of the embedding model used by the Alert Triage Agent.
+
+Monitoring stacks emit the same alert strings over and over, so embeddings are
+cached by normalized message:
+- An in-process LRU of configurable size answers repeats without touching the model.
+- An optional on-disk store of float32 vectors, memory-mapped and keyed by a
+  64-bit message hash, survives restarts and is shared by every uvicorn
+  worker: appends are serialized across processes with a file lock.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_message(message: str) -> str:
+    """Collapses whitespace and case so trivially different strings share one entry."""
+    return " ".join(message.split()).lower()
+
+
+def message_key(normalized_message: str) -> int:
+    """Stable 64-bit hash of a normalized message, used as the on-disk key."""
+    digest = hashlib.blake2b(normalized_message.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only store of float32 vectors backed by memory-mapped files.
+
+    The directory holds three files:
+    - `meta.json`: the vector dimension.
+    - `vectors.f32`: row-major float32 vectors.
+    - `keys.u64`: the message hash of each row, written after its vector so a
+      reader never sees a key whose vector is missing.
+    - `write.lock`: held with `flock` by a writer across catching up with the
+      files and both appends, so the vector and key appends of different
+      processes never interleave and rows stay paired with their keys.
+
+    Any number of processes may open the store, writable or read-only, and call
+    `refresh()` to pick up rows appended since. Writes append a whole batch at
+    once, and a refresh reads only the keys past the last one it indexed, so
+    both cost O(rows added) rather than O(rows stored).
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self.dimension: Optional[int] = None
+        self._rows: Dict[int, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        # Bytes of `keys.u64` indexed so far; always a whole number of rows.
+        self._keys_size = 0
+        self._lock = threading.Lock()
+
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        self._load_meta()
+        self.refresh()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _keys_path(self) -> str:
+        return os.path.join(self.path, "keys.u64")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.path, "write.lock")
+
+    def _load_meta(self) -> None:
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as fp:
+                self.dimension = int(json.load(fp)["dimension"])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def refresh(self) -> None:
+        """Indexes any rows appended to the files since the last refresh."""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        if not os.path.exists(self._keys_path):
+            return
+        # Ignore a key the writer is still in the middle of appending.
+        keys_size = os.path.getsize(self._keys_path) // 8 * 8
+        if keys_size <= self._keys_size:
+            return
+        if self.dimension is None:
+            self._load_meta()
+
+        first_row = self._keys_size // 8
+        new_keys = np.fromfile(
+            self._keys_path, dtype="<u8", count=(keys_size - self._keys_size) // 8, offset=self._keys_size
+        )
+        for row, key in enumerate(new_keys.tolist(), start=first_row):
+            self._rows.setdefault(key, row)
+        self._keys_size = keys_size
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r", shape=(keys_size // 8, self.dimension)
+        )
+
+    def get(self, key: int) -> Optional[np.ndarray]:
+        """Returns a copy of the stored vector for `key`, or None."""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            return np.array(self._vectors[row])
+
+    def put(self, key: int, vector: np.ndarray) -> None:
+        """Appends a vector to the store. Ignored when opened read-only."""
+        self.put_many([key], np.asarray(vector, dtype=np.float32)[np.newaxis, :])
+
+    def put_many(self, keys: List[int], vectors: np.ndarray) -> None:
+        """
+        Appends the rows of `vectors` under `keys` with one write per file,
+        skipping keys already stored. Ignored when opened read-only.
+        """
+        if self.read_only or not len(keys):
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Other processes may have appended since: index their rows first.
+                if self.dimension is None:
+                    self._load_meta()
+                self._refresh_locked()
+                if self.dimension is None:
+                    self.dimension = int(vectors.shape[1])
+                    with open(self._meta_path, "w", encoding="utf-8") as fp:
+                        json.dump({"dimension": self.dimension}, fp)
+                elif vectors.shape[1] != self.dimension:
+                    raise ValueError(
+                        f"Vector of dimension {vectors.shape[1]} does not match store dimension {self.dimension}."
+                    )
+
+                rows: Dict[int, int] = {}
+                for row, key in enumerate(keys):
+                    if key not in self._rows:
+                        rows.setdefault(key, row)
+                if not rows:
+                    return
+                with open(self._vectors_path, "ab") as fp:
+                    # Drop the vectors of a writer that died before appending their keys.
+                    fp.truncate(self._keys_size // 8 * self.dimension * 4)
+                    fp.write(vectors[list(rows.values())].tobytes())
+                with open(self._keys_path, "ab") as fp:
+                    fp.write(np.array(list(rows), dtype="<u8").tobytes())
+                self._refresh_locked()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """
+    LRU cache of message embeddings with an optional DiskEmbeddingStore behind it.
+
+    Counters:
+    - hits: lookups answered by the in-process LRU.
+    - disk_hits: lookups answered by the disk store (promoted into the LRU).
+    - misses: lookups that had to be embedded by the model.
+    - evictions: entries dropped from the LRU to respect `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 10000, disk_store: Optional[DiskEmbeddingStore] = None):
+        self.max_entries = max_entries
+        self.disk_store = disk_store
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, normalized: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[normalized] = vector
+        self._entries.move_to_end(normalized)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def encode(
+        self, messages: List[str], encoder: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Returns a float32 matrix with one row per message, calling `encoder`
+        once for the messages found in neither the LRU nor the disk store.
+
+        Args:
+            messages: The raw alert messages to embed.
+            encoder: Embeds a list of (normalized) messages into a 2-D array.
+        """
+        normalized = [normalize_message(m) for m in messages]
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for text in dict.fromkeys(normalized):
+                vector = self._entries.get(text)
+                if vector is not None:
+                    self._entries.move_to_end(text)
+                    self.hits += 1
+                    found[text] = vector
+                else:
+                    missing.append(text)
+
+        if missing and self.disk_store is not None:
+            self.disk_store.refresh()
+            still_missing = []
+            for text in missing:
+                vector = self.disk_store.get(message_key(text))
+                if vector is None:
+                    still_missing.append(text)
+                else:
+                    found[text] = vector
+            with self._lock:
+                self.disk_hits += len(missing) - len(still_missing)
+                for text in missing:
+                    if text in found:
+                        self._remember(text, found[text])
+            missing = still_missing
+
+        if missing:
+            vectors = np.asarray(encoder(missing), dtype=np.float32)
+            for text, vector in zip(missing, vectors):
+                found[text] = vector
+            if self.disk_store is not None:
+                self.disk_store.put_many([message_key(text) for text in missing], vectors)
+            with self._lock:
+                self.misses += len(missing)
+                for text, vector in zip(missing, vectors):
+                    self._remember(text, vector)
+
+        if not normalized:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[text] for text in normalized])
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """Counters and sizes used to tune `max_entries`."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_size": len(self.disk_store) if self.disk_store is not None else None,
+        }
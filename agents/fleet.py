@@ -0,0 +1,140 @@
+"""
+agents/fleet.py
+
+Fleet-wide incident grouping for the Alert Triage Agent.
+
+Triage partitions alerts by host, so one bad deploy that fires the same alert
+on 500 hosts yields 500 AlertClusters. This optional second pass groups the
+per-host clusters into fleet incidents:
+- Each cluster's representative message is normalized (variables masked, see
+  agents/lexical.py) and given a MinHash signature; clusters of one template
+  have identical signatures.
+- Clusters are visited by start time. Two inverted indexes point at open
+  incidents: one by normalized message, which settles the common case of one
+  template on many hosts with a dictionary lookup, and one by the
+  LSH band keys of the leader's signature. A cluster is only compared with
+  incidents that share a bucket, so the pass is close to linear in the number
+  of clusters rather than all-pairs.
+- A cluster joins the most similar candidate incident whose signature matches
+  at least FLEET_SIMILARITY_THRESHOLD and whose last alert is at most `window`
+  before the cluster's first. Incidents that fell out of the window are
+  dropped from the index as they are met.
+
+Only incidents spanning at least FLEET_MIN_HOSTS hosts are reported; they
+reference their clusters by index into the response's `clusters` list.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.lexical import MinHasher, band_keys, normalize_message
+from models.models import AlertCluster, FleetIncident
+
+# --- Constants ---
+# Compute fleet incidents when a request does not say (`?incidents=`).
+FLEET_INCIDENTS = os.environ.get("TRIAGE_FLEET_INCIDENTS", "0") == "1"
+# Estimated Jaccard similarity of representative messages needed to join an incident.
+# Stricter than within a host: across hosts, the same template is the common case.
+FLEET_SIMILARITY_THRESHOLD = float(os.environ.get("TRIAGE_FLEET_SIMILARITY_THRESHOLD", "0.7"))
+# Minimum number of distinct hosts for a group of clusters to be reported as an incident.
+FLEET_MIN_HOSTS = int(os.environ.get("TRIAGE_FLEET_MIN_HOSTS", "2"))
+
+
+class _OpenIncident:
+    """An incident being built: its leader's signature and the clusters so far."""
+
+    def __init__(self, signature: np.ndarray, cluster: AlertCluster, index: int):
+        self.signature = signature
+        self.representative_message = cluster.representative_message
+        self.start_time = cluster.start_time
+        self.end_time = cluster.end_time
+        self.cluster_indices = [index]
+        self.hosts = {cluster.host: None}
+        self.alert_count = cluster.count
+
+    def add(self, cluster: AlertCluster, index: int) -> None:
+        self.end_time = max(self.end_time, cluster.end_time)
+        self.cluster_indices.append(index)
+        self.hosts.setdefault(cluster.host, None)
+        self.alert_count += cluster.count
+
+
+def group_fleet_incidents(
+    clusters: List[AlertCluster],
+    window: timedelta,
+    threshold: float = FLEET_SIMILARITY_THRESHOLD,
+    min_hosts: int = FLEET_MIN_HOSTS,
+    hasher: Optional[MinHasher] = None,
+) -> List[FleetIncident]:
+    """
+    Groups per-host clusters with similar messages and overlapping time windows.
+
+    Args:
+        clusters: The triage response's clusters; incidents refer to them by index.
+        window: Largest gap between an incident's last alert and a joining cluster's first.
+        threshold: Estimated Jaccard similarity needed to join an incident.
+        min_hosts: Minimum distinct hosts of a reported incident.
+
+    Returns:
+        The incidents, largest (by alert count) first.
+    """
+    hasher = hasher or MinHasher()
+    signature_of: Dict[str, np.ndarray] = {}
+    by_text: Dict[str, _OpenIncident] = {}
+    buckets: Dict[Tuple[int, bytes], List[_OpenIncident]] = {}
+    incidents: List[_OpenIncident] = []
+
+    for index in sorted(range(len(clusters)), key=lambda i: clusters[i].start_time):
+        cluster = clusters[index]
+        text = normalize_message(cluster.representative_message)
+        oldest_open: datetime = cluster.start_time - window
+        same = by_text.get(text)
+        if same is not None and same.end_time >= oldest_open:
+            same.add(cluster, index)
+            continue
+
+        signature = signature_of.get(text)
+        if signature is None:
+            signature = signature_of[text] = hasher.signature(text)
+        keys = band_keys(signature)
+        candidates: Dict[int, _OpenIncident] = {}
+        for key in keys:
+            bucket = buckets.get(key)
+            if not bucket:
+                continue
+            # Clusters arrive in start-time order, so an incident that closed stays closed.
+            bucket[:] = [incident for incident in bucket if incident.end_time >= oldest_open]
+            candidates.update((id(incident), incident) for incident in bucket)
+
+        best, best_score = None, -1.0
+        if candidates:
+            open_incidents = list(candidates.values())
+            scores = (np.stack([incident.signature for incident in open_incidents]) == signature).mean(axis=1)
+            position = int(np.argmax(scores))
+            best, best_score = open_incidents[position], float(scores[position])
+
+        if best is not None and best_score >= threshold:
+            best.add(cluster, index)
+            by_text[text] = best
+        else:
+            incident = _OpenIncident(signature, cluster, index)
+            incidents.append(incident)
+            by_text[text] = incident
+            for key in keys:
+                buckets.setdefault(key, []).append(incident)
+
+    reported = [incident for incident in incidents if len(incident.hosts) >= min_hosts]
+    reported.sort(key=lambda incident: incident.alert_count, reverse=True)
+    return [
+        FleetIncident(
+            representative_message=incident.representative_message,
+            start_time=incident.start_time,
+            end_time=incident.end_time,
+            hosts=list(incident.hosts),
+            cluster_indices=sorted(incident.cluster_indices),
+            alert_count=incident.alert_count,
+        )
+        for incident in reported
+    ]
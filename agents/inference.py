@@ -0,0 +1,204 @@
+"""
+agents/inference.py
+
+Inference executor for the Alert Triage Agent.
+
+The embedding model is CPU/torch bound, so it must never run on the event loop.
+A single dedicated thread owns the model; request threads submit their messages
+and block (or await) on a future. The thread coalesces work from concurrent
+requests into shared batches:
+- When idle, it starts a batch when the first submission arrives and keeps
+  collecting for at most `max_wait_ms`, or until `max_batch_size` messages are pending.
+- Submissions are split into chunks of at most `batch_size` messages, and a
+  batch of at most `max_batch_size` messages takes chunks from the pending
+  submissions in turn. A small request that arrives behind a storm-sized one
+  is finished in the next batch instead of waiting for the whole storm.
+- Duplicate messages within a batch are encoded once.
+- Each submitter receives only its own rows of the result, once all its chunks ran.
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _Submission:
+    def __init__(self, messages: List[str]):
+        self.messages = messages
+        self.future: "Future[np.ndarray]" = Future()
+        # Messages handed to batches so far, and the embeddings of those that ran.
+        self.offset = 0
+        self.parts: List[np.ndarray] = []
+
+
+class InferenceExecutor:
+    """
+    Micro-batching front end to an embedding model.
+
+    Args:
+        model_getter: Returns the model to encode with; called on the executor thread
+            for every batch so the model can be swapped without restarting it.
+        max_batch_size: Most messages encoded in one batch, across submissions.
+        max_wait_ms: Longest time the first submission of a batch waits for company.
+        batch_size: Messages per forward pass, passed to `model.encode`, and per
+            chunk a submission contributes to a batch in its turn.
+    """
+
+    def __init__(
+        self,
+        model_getter: Callable[[], Any],
+        max_batch_size: int = 256,
+        max_wait_ms: float = 2.0,
+        batch_size: int = 64,
+    ):
+        self.model_getter = model_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[_Submission]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.submissions = 0
+
+    def start(self) -> None:
+        """Starts the executor thread if it is not running yet."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="triage-inference", daemon=True
+                )
+                self._thread.start()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stops the executor thread after the submissions already queued."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, messages: List[str]) -> "Future[np.ndarray]":
+        """Queues messages for encoding and returns a future of their embeddings."""
+        self.start()
+        submission = _Submission(messages)
+        self._queue.put(submission)
+        return submission.future
+
+    def encode(self, messages: List[str]) -> np.ndarray:
+        """Blocking encode, for use from worker threads."""
+        if not messages:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.submit(messages).result()
+
+    async def encode_async(self, messages: List[str]) -> np.ndarray:
+        """Awaitable encode, for use from the event loop."""
+        return await asyncio.wrap_future(self.submit(messages))
+
+    def _collect(self, pending: Deque[_Submission]) -> bool:
+        """
+        Moves queued submissions to `pending`. When nothing is pending, blocks for
+        the first one and waits up to `max_wait` for company; otherwise only takes
+        what is already queued, so running work is not delayed.
+
+        Returns:
+            False once the stop marker was received.
+        """
+        if not pending:
+            first = self._queue.get()
+            if first is None:
+                return False
+            pending.append(first)
+            queued = len(first.messages)
+            deadline = time.monotonic() + self.max_wait
+            while queued < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    submission = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if submission is None:
+                    return False
+                pending.append(submission)
+                queued += len(submission.messages)
+            return True
+        while True:
+            try:
+                submission = self._queue.get_nowait()
+            except queue.Empty:
+                return True
+            if submission is None:
+                return False
+            pending.append(submission)
+
+    def _next_batch(self, pending: Deque[_Submission]) -> List[Tuple[_Submission, int, int]]:
+        """Takes chunks from the pending submissions in turn, up to `max_batch_size` messages."""
+        chunk_size = max(1, min(self.batch_size, self.max_batch_size))
+        budget = max(1, self.max_batch_size)
+        chunks: List[Tuple[_Submission, int, int]] = []
+        while budget > 0 and any(s.offset < len(s.messages) for s in pending):
+            for submission in pending:
+                remaining = len(submission.messages) - submission.offset
+                if remaining <= 0 or budget <= 0:
+                    continue
+                size = min(chunk_size, remaining, budget)
+                chunks.append((submission, submission.offset, submission.offset + size))
+                submission.offset += size
+                budget -= size
+        # Start the next batch with the submissions that were served last.
+        pending.rotate(-len({id(submission) for submission, _, _ in chunks}) % max(len(pending), 1))
+        return chunks
+
+    def _run(self) -> None:
+        pending: Deque[_Submission] = deque()
+        running = True
+        while running or pending:
+            if running:
+                running = self._collect(pending)
+            for submission in [s for s in pending if not s.messages]:
+                submission.future.set_result(np.zeros((0, 0), dtype=np.float32))
+                pending.remove(submission)
+            chunks = self._next_batch(pending)
+            if not chunks:
+                continue
+            batch = list({id(submission): submission for submission, _, _ in chunks}.values())
+            self.batches += 1
+            self.submissions += len(batch)
+
+            row_of: Dict[str, int] = {}
+            for submission, start, end in chunks:
+                for message in submission.messages[start:end]:
+                    row_of.setdefault(message, len(row_of))
+
+            try:
+                vectors = np.asarray(
+                    self.model_getter().encode(list(row_of), batch_size=self.batch_size),
+                    dtype=np.float32,
+                )
+            except Exception as e:  # Propagate model failures to every waiting request.
+                for submission in batch:
+                    submission.future.set_exception(e)
+                    pending.remove(submission)
+                continue
+
+            for submission, start, end in chunks:
+                submission.parts.append(vectors[[row_of[m] for m in submission.messages[start:end]]])
+            for submission in batch:
+                if submission.offset == len(submission.messages):
+                    submission.future.set_result(np.concatenate(submission.parts))
+                    submission.parts = []
+                    pending.remove(submission)
+
+    def stats(self) -> Dict[str, float]:
+        """Batching counters; submissions per batch above 1 means requests were coalesced."""
+        return {
+            "batches": self.batches,
+            "submissions": self.submissions,
+            "submissions_per_batch": self.submissions / self.batches if self.batches else 0.0,
+        }
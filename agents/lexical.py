@@ -0,0 +1,189 @@
+"""
+agents/lexical.py
+
+Lexical clustering engine for the Alert Triage Agent: MinHash signatures of
+character shingles, bucketed with locality-sensitive hashing (LSH).
+
+It needs no embedding model, so it keeps triage available when the
+sentence-transformer cannot be loaded, and costs a fraction of the CPU of the
+embedding engine for bulk work where semantic quality matters less:
+- Messages are first reduced to Drain templates (agents/templates.py), as in
+  the embedding engine, so "Disk 91% full" and "Disk 97% full" are hashed once.
+- Each template's representative, lower-cased and with its variable tokens
+  masked, is reduced to the set of character 3-grams of its words (padded at
+  word boundaries, so word order and punctuation do not matter and
+  inflections still overlap) and a MinHash signature of
+  `MINHASH_PERMUTATIONS` values; the share of equal values estimates the
+  Jaccard similarity of two shingle sets.
+- Clustering is single-pass leader clustering, like the "leader" backend in
+  agents/clustering.py: a message joins the most similar leader whose
+  estimated similarity reaches the threshold, otherwise it becomes a leader.
+  Candidate leaders come from LSH buckets (`LSH_BANDS` bands of the signature)
+  instead of a scan of every leader, so the pass is close to linear.
+
+Accuracy, measured with benchmarks/bench_engines.py (seed 0, steady workload):
+against the generator's ground truth (same temporal group and same template),
+pairwise precision and recall were 1.000 at 1k, 10k and 100k alerts. These
+workloads are easy: their templates differ in many words. Agreement with the
+embedding engine is reported by `python -m benchmarks.bench_engines --model real`.
+
+Known limits:
+- Similarity here is surface similarity: paraphrases with few words in common
+  ("Disk space is running low" / "Low disk space") end up apart, where the
+  embedding engine would join them.
+- Messages that differ in one meaningful word share most of their shingles,
+  so the engine joins them: all 5 `NEAR_MISS_PAIRS` of the benchmark
+  ("Database connection failed / restored for user admin") were merged. The
+  template miner never wildcards plain words and keeps them apart, so
+  `engine=template` is the model-free choice when failure and recovery alerts
+  must stay separate.
+- Pairs just above the threshold share an LSH bucket with probability ~0.65
+  only (see LSH_BANDS), so some of them are missed.
+"""
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.templates import TemplateMiner, mask_variables
+
+# --- Constants ---
+# Characters per shingle.
+SHINGLE_SIZE = 3
+# MinHash values per signature; must be divisible by LSH_BANDS.
+MINHASH_PERMUTATIONS = 64
+# Signature bands hashed into LSH buckets. With 16 bands of 4 rows, pairs with a
+# Jaccard similarity of 0.5 share a bucket with probability ~0.65 and pairs at 0.7 ~0.98.
+LSH_BANDS = 16
+# Estimated Jaccard similarity of shingle sets needed to join a cluster.
+LEXICAL_SIMILARITY_THRESHOLD = 0.5
+# Mersenne prime 2^31 - 1 for the universal hash family h(x) = (a * x + b) mod p.
+_PRIME = (1 << 31) - 1
+# Words, and the placeholders left by variable masking.
+_WORD = re.compile(r"<[a-z]+>|[a-z0-9]+")
+
+
+def normalize_message(message: str) -> str:
+    """Lower-cases, masks variable tokens and collapses whitespace."""
+    return " ".join(mask_variables(message).lower().split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Distinct 32-bit hashes of the character shingles of the words of `text`."""
+    grams = set()
+    for word in _WORD.findall(text) or [text]:
+        padded = f" {word} "
+        grams.update(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures with a fixed, seeded family of hash functions,
+    so signatures are comparable across requests and processes.
+    """
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, _PRIME, size=permutations, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=permutations, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        # Shingle hashes are reduced below 2^31 so a * x + b stays within uint64.
+        hashed = shingles(text, self.shingle_size) % np.uint64(_PRIME)
+        return ((np.outer(hashed, self._a) + self._b) % np.uint64(_PRIME)).min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """Signature matrix with one row per text."""
+        if not texts:
+            return np.zeros((0, len(self._a)), dtype=np.uint32)
+        return np.stack([self.signature(text) for text in texts])
+
+
+def band_keys(signature: np.ndarray, bands: int = LSH_BANDS) -> List[Tuple[int, bytes]]:
+    """LSH bucket keys of a signature: one per band of consecutive values."""
+    rows_per_band = len(signature) // bands
+    return [(band, signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes()) for band in range(bands)]
+
+
+def lsh_leader_clustering(
+    signatures: np.ndarray, threshold: float = LEXICAL_SIMILARITY_THRESHOLD, bands: int = LSH_BANDS
+) -> List[List[int]]:
+    """
+    Clusters rows of a MinHash signature matrix. Returns clusters as lists of
+    row indices, largest first, with the leader of each cluster first.
+    """
+    n = len(signatures)
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    leaders: List[int] = []
+    members: List[List[int]] = []
+
+    for row in range(n):
+        signature = signatures[row]
+        keys = band_keys(signature, bands)
+        candidates = {cluster for key in keys for cluster in buckets.get(key, ())}
+        best, best_score = -1, -1.0
+        if candidates:
+            order = sorted(candidates)
+            scores = (signatures[[leaders[c] for c in order]] == signature).mean(axis=1)
+            position = int(np.argmax(scores))
+            best, best_score = order[position], float(scores[position])
+
+        if best_score >= threshold:
+            members[best].append(row)
+        else:
+            cluster = len(leaders)
+            leaders.append(row)
+            members.append([row])
+            for key in keys:
+                buckets.setdefault(key, []).append(cluster)
+
+    return sorted(members, key=len, reverse=True)
+
+
+def cluster_message_groups_lexical(
+    message_groups: List[List[str]],
+    threshold: float = LEXICAL_SIMILARITY_THRESHOLD,
+    hasher: Optional[MinHasher] = None,
+) -> List[List[List[int]]]:
+    """
+    Lexical counterpart of `triage_agent.cluster_message_groups`: a template is
+    mined for every distinct message, each template's normalized representative
+    is hashed once per request, then every group is clustered on its own signatures.
+
+    Returns:
+        For every group, its clusters as lists of positions in the group.
+    """
+    hasher = hasher or _default_hasher
+    miner = TemplateMiner()
+    template_of = {
+        message: miner.add(message)
+        for message in dict.fromkeys(message for group in message_groups for message in group)
+    }
+    # Templates whose representatives normalize to the same text share a signature row.
+    row_of: Dict[str, int] = {}
+    template_rows = [
+        row_of.setdefault(normalize_message(template.representative), len(row_of)) for template in miner.templates
+    ]
+    signatures = hasher.signatures(list(row_of))
+
+    results = []
+    for messages in message_groups:
+        members: Dict[int, List[int]] = {}
+        for position, message in enumerate(messages):
+            members.setdefault(template_rows[template_of[message].template_id], []).append(position)
+        rows = list(members)
+        if len(rows) == 1:
+            results.append([list(range(len(messages)))])
+            continue
+        communities = lsh_leader_clustering(signatures[rows], threshold)
+        results.append([
+            [position for idx in community for position in members[rows[idx]]]
+            for community in communities
+        ])
+    return results
+
+
+_default_hasher = MinHasher()
@@ -0,0 +1,330 @@
+"""
+agents/metrics.py
+
+Prometheus-style instrumentation for the triage pipeline.
+
+Metrics live in a small in-process registry rendered in the Prometheus text
+exposition format by the `/metrics` endpoint:
+- `triage_stage_seconds{stage=...}`: histogram of the time a request spent in
+  each stage: parse (reading and validating the body), partition, templates,
+  encode, cluster, parallel_cluster, lexical_cluster, build, fleet and serialize.
+- `triage_request_seconds{route=...}`: histogram of whole HTTP request latency.
+- counters of requests (by clustering engine), alerts, critical alerts,
+  temporal groups and clusters, and of requests degraded to meet their
+  deadline or rejected by admission control.
+- `triage_max_temporal_group_size`: the largest temporal group seen.
+
+Stage times are accumulated per request in a context variable and observed
+once when the request (or a direct `process_alert_triage` call) finishes, so
+a stage entered once per temporal group still yields one observation per
+request. The same per-request totals can be returned in a `Server-Timing`
+response header.
+
+With TRIAGE_METRICS=0 every hook returns immediately: `stage` hands out a
+shared no-op context manager and the middleware is not installed.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# --- Constants ---
+METRICS_ENABLED = os.environ.get("TRIAGE_METRICS", "1") != "0"
+# Adds a `Server-Timing` header with the per-stage breakdown of each request.
+SERVER_TIMING_ENABLED = os.environ.get("TRIAGE_SERVER_TIMING", "0") == "1"
+# Histogram buckets in seconds, from sub-millisecond stages to minute-long requests.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class MaxGauge(Counter):
+    """A gauge that only ever moves up to the largest value observed."""
+
+    kind = "gauge"
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            if value > self._values.get(key, float("-inf")):
+                self._values[key] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # Per label set: per-bucket counts (last one is +Inf), sum and count.
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(_labels(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total[0]:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def max_gauge(self, name: str, help_text: str) -> MaxGauge:
+        return self._register(MaxGauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.histogram("triage_stage_seconds", "Time spent per request in each triage stage.")
+REQUEST_SECONDS = registry.histogram("triage_request_seconds", "HTTP request latency by route.")
+REQUESTS = registry.counter("triage_requests_total", "Triage pipeline runs.")
+ALERTS = registry.counter("triage_alerts_total", "Alerts received for triage.")
+CRITICAL_ALERTS = registry.counter("triage_critical_alerts_total", "Alerts identified as critical.")
+TEMPORAL_GROUPS = registry.counter("triage_temporal_groups_total", "Per-host temporal groups clustered.")
+CLUSTERS = registry.counter("triage_clusters_total", "Alert clusters produced.")
+DEGRADED = registry.counter("triage_degraded_total", "Pipeline runs degraded to a cheaper engine to meet their deadline.")
+REJECTED = registry.counter("triage_rejected_total", "Requests rejected by admission control, by reason.")
+MAX_GROUP_SIZE = registry.max_gauge("triage_max_temporal_group_size", "Largest temporal group seen, in alerts.")
+
+
+# --- Per-request stage timings ---
+
+class StageTimings:
+    """Stage totals of one request, plus stages started but not yet finished."""
+
+    __slots__ = ("seconds", "pending")
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.pending: Dict[str, float] = {}
+
+    def add(self, name: str, elapsed: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+
+    def begin(self, name: str) -> None:
+        self.pending[name] = time.perf_counter()
+
+    def end(self, name: str) -> None:
+        started = self.pending.pop(name, None)
+        if started is not None:
+            self.add(name, time.perf_counter() - started)
+
+    def end_all(self) -> None:
+        for name in list(self.pending):
+            self.end(name)
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("triage_stage_timings", default=None)
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        timings = _current.get()
+        if timings is not None:
+            timings.add(self.name, elapsed)
+        else:
+            STAGE_SECONDS.observe(elapsed, stage=self.name)
+
+
+def stage(name: str):
+    """Times the enclosed block as stage `name` of the current request."""
+    return _Stage(name) if METRICS_ENABLED else _NOOP
+
+
+def begin_stage(name: str) -> None:
+    """Starts a stage that ends elsewhere, e.g. when the response starts."""
+    timings = _current.get()
+    if timings is not None:
+        timings.begin(name)
+
+
+def end_stage(name: str) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.end(name)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Optional[StageTimings]]:
+    """
+    Accumulates stage times of the enclosed block and observes each stage once
+    on exit. Nested scopes (e.g. the pipeline inside an HTTP request) share
+    the outermost scope's timings.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+    timings = _current.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        timings.end_all()
+        for name, elapsed in timings.seconds.items():
+            STAGE_SECONDS.observe(elapsed, stage=name)
+
+
+def record_triage(
+    alerts: int,
+    critical_alerts: int,
+    temporal_groups: Sequence[Tuple[str, list]],
+    clusters: int,
+    engine: str = "embedding",
+    degraded: bool = False,
+) -> None:
+    """Counts one pipeline run; `temporal_groups` are its (host, alerts) groups."""
+    if not METRICS_ENABLED:
+        return
+    REQUESTS.inc(engine=engine)
+    if degraded:
+        DEGRADED.inc(engine=engine)
+    ALERTS.inc(alerts)
+    CRITICAL_ALERTS.inc(critical_alerts)
+    TEMPORAL_GROUPS.inc(len(temporal_groups))
+    CLUSTERS.inc(clusters)
+    if temporal_groups:
+        MAX_GROUP_SIZE.observe(max(len(group) for _, group in temporal_groups))
+
+
+def record_rejection(reason: str) -> None:
+    """Counts a request turned away by admission control ("queue_full" or "deadline")."""
+    if METRICS_ENABLED:
+        REJECTED.inc(reason=reason)
+
+
+def server_timing(timings: StageTimings) -> str:
+    """Formats stage totals as a `Server-Timing` header value, in milliseconds."""
+    return ", ".join(f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in timings.seconds.items())
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware that opens a stage-timing scope per HTTP request, starts
+    the "parse" stage (ended by the endpoint once the body is validated),
+    observes request latency by route and optionally adds `Server-Timing`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with collect_stages() as timings:
+            timings.begin("parse")
+
+            async def send_with_timings(message):
+                if message["type"] == "http.response.start":
+                    # Ends "serialize" for responses FastAPI encodes after the endpoint returns.
+                    timings.pending.pop("parse", None)
+                    timings.end_all()
+                    if SERVER_TIMING_ENABLED and timings.seconds:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"server-timing", server_timing(timings).encode("latin-1")))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timings)
+            finally:
+                route = scope.get("route")
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, route=getattr(route, "path", "unmatched")
+                )
@@ -0,0 +1,205 @@
+"""
+agents/model_manager.py
+
+Lifecycle management for the embedding model.
+
+Loading the SentenceTransformer at import time made every import of `main`
+(and every worker, test and autoscaled replica) pay for reading the model
+before anything else could happen. The `ModelManager` defers that work:
+- the model is loaded lazily on first use, or in a background thread started
+  by the application's lifespan,
+- concurrent callers share a single load; a failed load is remembered and
+  retried on a later call, with exponential backoff between attempts,
+- `warm_up` runs a few representative messages through the model so the first
+  real request does not pay for tokenizer and kernel initialization,
+- `status` reports readiness separately from process liveness.
+
+The inference backend is selectable:
+- "torch": the SentenceTransformer as published (float32).
+- "torch-int8": the same model with its Linear layers dynamically quantized to int8.
+- "onnx": the model's ONNX export run by ONNX Runtime.
+- "onnx-int8": the int8-quantized ONNX export shipped with the model.
+
+All backends expose the same `encode` call, and their embeddings agree closely
+enough for the similarity threshold (see benchmarks/bench_model_backends.py).
+"""
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# --- Constants ---
+MODEL_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+# ONNX file inside the model repository used by the "onnx-int8" backend.
+DEFAULT_ONNX_INT8_FILE = "onnx/model_qint8_avx2.onnx"
+# Messages encoded by `warm_up`, shaped like typical alerts.
+WARMUP_MESSAGES = [
+    "High CPU utilization at 95%.",
+    "Low disk space on /var/log.",
+    "User login failed from IP 10.0.0.1",
+    "Service nginx restarted successfully.",
+]
+
+# Delay before the first retry of a failed load, doubled after each failed retry up to the maximum.
+LOAD_RETRY_SECONDS = 30.0
+LOAD_RETRY_MAX_SECONDS = 600.0
+
+# Lifecycle states reported by `ModelManager.state`.
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def load_sentence_transformer(model_name: str, backend: str = "torch", onnx_file: Optional[str] = None) -> Any:
+    """
+    Builds the embedding model for `backend`.
+
+    Args:
+        model_name: SentenceTransformer model name or path.
+        backend: One of MODEL_BACKENDS.
+        onnx_file: ONNX file for the "onnx-int8" backend, relative to the model repository.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Choose from: {', '.join(MODEL_BACKENDS)}.")
+
+    # Imported here so that importing the agent does not import sentence-transformers,
+    # transformers or ONNX Runtime until a model is actually needed (agents/clustering.py
+    # defers its import the same way). torch itself is still imported by the agent.
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")
+
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        # Dynamic quantization: int8 weights for every Linear layer, activations
+        # quantized on the fly. Roughly quarters the encoder's weight memory.
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    model_kwargs = {"file_name": onnx_file or DEFAULT_ONNX_INT8_FILE} if backend == "onnx-int8" else None
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+class ModelManager:
+    """
+    Loads the embedding model on demand, at most once, and reports its state.
+
+    Args:
+        loader: Builds the model; called once, from whichever thread loads first.
+        description: Model name and backend, included in `status`.
+        retry_seconds: Delay after a failed load before `load` tries again.
+        max_retry_seconds: Upper bound of the delay, which doubles after each failed retry.
+        clock: Monotonic time source (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Any],
+        description: Optional[Dict[str, str]] = None,
+        retry_seconds: float = LOAD_RETRY_SECONDS,
+        max_retry_seconds: float = LOAD_RETRY_MAX_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.loader = loader
+        self.description = description or {}
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.model: Optional[Any] = None
+        self.state = NOT_LOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.load_attempts = 0
+        self.warmed_up = False
+        self._clock = clock
+        self._retry_at = float("inf")
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def load(self) -> Optional[Any]:
+        """
+        Loads the model if no load has happened yet and returns it, or None when
+        loading failed. Callers arriving during a load wait for it to finish.
+        After a failure, the first call once the retry delay has passed loads again.
+        """
+        if self.state == READY or (self.state == FAILED and not self._retry_due()):
+            return self.model
+        with self._lock:
+            if self.state == READY or (self.state == FAILED and not self._retry_due()):
+                return self.model
+            self.state = LOADING
+            self.load_attempts += 1
+            started = time.perf_counter()
+            try:
+                model = self.loader()
+            except Exception as e:
+                print(f"Error loading embedding model: {e}")
+                self.error = str(e)
+                self.state = FAILED
+                delay = min(self.retry_seconds * 2 ** (self.load_attempts - 1), self.max_retry_seconds)
+                self._retry_at = self._clock() + delay
+            else:
+                self.model = model
+                self.error = None
+                self.state = READY
+            self.load_seconds = time.perf_counter() - started
+        return self.model
+
+    def _retry_due(self) -> bool:
+        return self._clock() >= self._retry_at
+
+    def load_in_background(self, warm_up: bool = True) -> threading.Thread:
+        """Starts loading (and optionally warming up) the model on a daemon thread."""
+
+        def run() -> None:
+            if self.load() is not None and warm_up:
+                self.warm_up()
+
+        thread = threading.Thread(target=run, name="embedding-model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def retry_in_background(self) -> Optional[threading.Thread]:
+        """Starts a background load if a failed load is due for a retry, e.g. from a readiness probe."""
+        if self.state != FAILED or not self._retry_due():
+            return None
+        return self.load_in_background(warm_up=True)
+
+    def set_model(self, model: Any) -> None:
+        """Installs an already built model, e.g. in a worker process or a test."""
+        with self._lock:
+            self.model = model
+            self.error = None
+            self.state = READY
+
+    def warm_up(self, messages: Optional[List[str]] = None) -> None:
+        """Encodes a few messages so lazy initialization happens before real traffic."""
+        model = self.load()
+        if model is None:
+            return
+        messages = messages or WARMUP_MESSAGES
+        model.encode(messages, batch_size=len(messages))
+        self.warmed_up = True
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness details for the health endpoint."""
+        return {
+            **self.description,
+            "state": self.state,
+            "ready": self.ready,
+            "warmed_up": self.warmed_up,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+            "load_attempts": self.load_attempts,
+            "retry_in_seconds": (
+                max(0.0, round(self._retry_at - self._clock(), 1)) if self.state == FAILED and math.isfinite(self._retry_at) else None
+            ),
+        }
@@ -0,0 +1,104 @@
+"""
+agents/ndjson.py
+
+Incremental NDJSON ingestion for large triage requests.
+
+Instead of parsing a whole `TriageRequest` body into memory, the request body
+is consumed chunk by chunk as it arrives. Every complete line is validated as
+one `Alert` and immediately partitioned into the critical list or its host's
+bucket, so only the partial last line of the body is ever buffered as bytes.
+That line is bounded too: a line longer than `max_line_bytes` fails the request
+instead of growing the buffer without limit.
+"""
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+
+from models.models import Alert
+
+# Content types accepted by the NDJSON triage endpoint.
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+
+
+class NdjsonValidationError(ValueError):
+    """A line of the NDJSON body is not a valid Alert."""
+
+    def __init__(self, line: int, errors: list):
+        super().__init__(f"Line {line} is not a valid alert.")
+        self.line = line
+        self.errors = errors
+
+
+class AlertLimitExceeded(ValueError):
+    """The NDJSON body contains more alerts than the configured maximum."""
+
+
+class LineTooLong(ValueError):
+    """A line of the NDJSON body is longer than the configured maximum."""
+
+    def __init__(self, line: int, max_line_bytes: int):
+        super().__init__(f"Line {line} exceeds the limit of {max_line_bytes} bytes.")
+        self.line = line
+
+
+class AlertPartitioner:
+    """
+    Parses NDJSON chunks into alerts partitioned by criticality and host.
+
+    Args:
+        critical_threshold: Alerts with at least this severity go to `critical_alerts`.
+        max_alerts: Optional cap on the number of alerts accepted.
+        max_line_bytes: Optional cap on the length of a line, newline excluded.
+    """
+
+    def __init__(
+        self, critical_threshold: int, max_alerts: Optional[int] = None, max_line_bytes: Optional[int] = None
+    ):
+        self.critical_threshold = critical_threshold
+        self.max_alerts = max_alerts
+        self.max_line_bytes = max_line_bytes
+        self.critical_alerts: List[Alert] = []
+        self.alerts_by_host: Dict[str, List[Alert]] = {}
+        self.count = 0
+        self._line_number = 0
+        self._partial = b""
+
+    def feed(self, chunk: bytes) -> None:
+        """Consumes a chunk of the body, processing every line it completes."""
+        if not chunk:
+            return
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._check_length(line, self._line_number + 1)
+            self._add_line(line)
+        self._check_length(self._partial, self._line_number + 1)
+
+    def _check_length(self, line: bytes, line_number: int) -> None:
+        if self.max_line_bytes is not None and len(line) > self.max_line_bytes:
+            raise LineTooLong(line_number, self.max_line_bytes)
+
+    def close(self) -> None:
+        """Processes the final line when the body does not end with a newline."""
+        partial, self._partial = self._partial, b""
+        self._add_line(partial)
+
+    def _add_line(self, line: bytes) -> None:
+        self._line_number += 1
+        if not line.strip():
+            return
+        try:
+            alert = Alert.model_validate_json(line)
+        except ValidationError as e:
+            raise NdjsonValidationError(
+                self._line_number, e.errors(include_url=False, include_context=False)
+            )
+
+        self.count += 1
+        if self.max_alerts is not None and self.count > self.max_alerts:
+            raise AlertLimitExceeded(f"Request exceeds the limit of {self.max_alerts} alerts.")
+
+        if alert.severity >= self.critical_threshold:
+            self.critical_alerts.append(alert)
+        else:
+            self.alerts_by_host.setdefault(alert.host, []).append(alert)
@@ -0,0 +1,148 @@
+"""
+agents/parallel.py
+
+Multi-core triage across host shards.
+
+After partitioning, hosts are independent, so the similarity clustering of
+their temporal groups can run on a process pool:
+- Every worker loads the embedding model once, in the pool initializer.
+- All groups of a host go to the same shard, and shards are balanced by alert
+  count (largest hosts first onto the least loaded shard).
+- Only messages are shipped to workers, and only cluster positions come back;
+  the parent rebuilds AlertClusters from its own Alert objects.
+- Results are merged back by group index, so cluster order is identical to
+  the single-process path regardless of which worker finishes first.
+"""
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from models.models import Alert
+
+# --- Constants ---
+# Shards per worker; more, smaller shards even out hosts of very different sizes.
+SHARDS_PER_WORKER = 4
+
+
+def _initialize_worker(model_factory: Optional[Callable[[], Any]], torch_threads: int) -> None:
+    """
+    Pool initializer: limits torch threads and builds the embedding model once
+    per worker. Without a factory, the worker's model manager loads the
+    configured model, so the first shard does not pay for it.
+
+    Workers read the persistent embedding store but never write it: the
+    parent process persists the misses of its own requests.
+    """
+    import torch
+
+    torch.set_num_threads(torch_threads)
+
+    from agents import triage_agent
+    from agents.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+
+    disk_store = triage_agent.embedding_cache.disk_store
+    triage_agent.embedding_cache = EmbeddingCache(
+        max_entries=triage_agent.embedding_cache.max_entries,
+        disk_store=DiskEmbeddingStore(disk_store.path, read_only=True) if disk_store is not None else None,
+    )
+
+    if model_factory is not None:
+        triage_agent.model_manager.set_model(model_factory())
+    else:
+        triage_agent.model_manager.load()
+
+
+def _cluster_shard(message_groups: List[List[str]]) -> List[List[List[int]]]:
+    from agents import triage_agent
+
+    return triage_agent.cluster_message_groups(message_groups)
+
+
+def shard_hosts(hosts: Sequence[str], group_sizes: Sequence[int], shard_count: int) -> List[List[int]]:
+    """
+    Assigns group indices to at most `shard_count` shards, keeping each host's
+    groups together and balancing the total number of alerts per shard.
+    """
+    groups_of: Dict[str, List[int]] = {}
+    for index, host in enumerate(hosts):
+        groups_of.setdefault(host, []).append(index)
+    load_of = {host: sum(group_sizes[i] for i in indices) for host, indices in groups_of.items()}
+
+    shards: List[List[int]] = [[] for _ in range(max(1, shard_count))]
+    heap: List[Tuple[int, int]] = [(0, shard) for shard in range(len(shards))]
+    # Largest hosts first; ties broken by first appearance, so sharding is deterministic.
+    for host in sorted(groups_of, key=lambda h: -load_of[h]):
+        load, shard = heapq.heappop(heap)
+        shards[shard].extend(groups_of[host])
+        heapq.heappush(heap, (load + load_of[host], shard))
+    return [sorted(shard) for shard in shards if shard]
+
+
+class ParallelTriageExecutor:
+    """
+    Runs `cluster_message_groups` on a process pool, sharded by host.
+
+    Args:
+        workers: Number of worker processes; 1 or less disables the pool.
+        min_groups: Requests with fewer temporal groups stay in-process, where
+            the pool's dispatch overhead would outweigh the gain.
+        model_factory: Called once in each worker to build the embedding model.
+            When None, workers load the configured model in the initializer.
+        start_method: multiprocessing start method. "spawn" avoids forking a
+            process that already runs torch and inference threads.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        min_groups: int = 64,
+        model_factory: Optional[Callable[[], Any]] = None,
+        start_method: str = "spawn",
+    ):
+        self.workers = workers
+        self.min_groups = min_groups
+        self.model_factory = model_factory
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def should_parallelize(self, temporal_groups: Sequence[Tuple[str, List[Alert]]]) -> bool:
+        return self.workers > 1 and len(temporal_groups) >= self.min_groups
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_initialize_worker,
+                initargs=(self.model_factory, torch_threads),
+            )
+        return self._pool
+
+    def cluster(self, hosts: Sequence[str], message_groups: List[List[str]]) -> List[List[List[int]]]:
+        """
+        Clusters each group of messages on the pool.
+
+        Args:
+            hosts: The host of each group.
+            message_groups: The messages of each temporal group.
+
+        Returns:
+            For every group, in input order, its clusters as positions in the group.
+        """
+        pool = self._get_pool()
+        shards = shard_hosts(hosts, [len(g) for g in message_groups], self.workers * SHARDS_PER_WORKER)
+        futures = [pool.submit(_cluster_shard, [message_groups[i] for i in shard]) for shard in shards]
+
+        results: List[List[List[int]]] = [[] for _ in message_groups]
+        for shard, future in zip(shards, futures):
+            for index, clusters in zip(shard, future.result()):
+                results[index] = clusters
+        return results
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
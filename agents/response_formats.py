@@ -0,0 +1,168 @@
+"""
+agents/response_formats.py
+
+Alternative encodings of TriageResponse for large triage results.
+
+The default response embeds a full Alert object in every cluster and is
+serialized by FastAPI through the `response_model`. Two opt-in shapes avoid
+that overhead:
+- "compact": one shared alert table of rows (see CompactTriageResponse), with
+  clusters and critical alerts referencing rows by index.
+- "columnar": the same table as parallel arrays (see ColumnarTriageResponse).
+
+Both are built from plain Python values and encoded directly, with orjson when
+it is installed and the standard library otherwise.
+"""
+import json
+import operator
+from typing import Callable, Dict, List, Optional, Sequence
+
+from fastapi import Response
+
+from models.models import Alert, TriageResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library.
+    orjson = None
+
+# --- Constants ---
+RESPONSE_FORMATS = ("full", "compact", "columnar")
+# Media types accepted in the `Accept` header to select a format without a query parameter.
+MEDIA_TYPES = {
+    "compact": "application/vnd.triage.compact+json",
+    "columnar": "application/vnd.triage.columnar+json",
+}
+ALERT_FIELDS = ["id", "host", "timestamp", "severity", "message"]
+
+# Reads an alert's fields in ALERT_FIELDS order in one C-level call.
+_alert_row = operator.attrgetter(*ALERT_FIELDS)
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Picks the response format: an explicit `format` query parameter wins,
+    then a vendor media type in the `Accept` header, then "full".
+    """
+    if requested:
+        if requested not in RESPONSE_FORMATS:
+            raise ValueError(
+                f"Unknown response format '{requested}'. Choose from: {', '.join(RESPONSE_FORMATS)}."
+            )
+        return requested
+    if accept:
+        for response_format, media_type in MEDIA_TYPES.items():
+            if media_type in accept:
+                return response_format
+    return "full"
+
+
+def _alert_table(response: TriageResponse, alerts: Optional[Sequence[Alert]]) -> List[Alert]:
+    """The request's alerts in order, or every alert referenced by the response."""
+    if alerts is not None:
+        return list(alerts)
+    table: Dict[int, Alert] = {}
+    for cluster in response.clusters:
+        for alert in cluster.alerts:
+            table.setdefault(id(alert), alert)
+    for alert in response.critical_alerts:
+        table.setdefault(id(alert), alert)
+    return list(table.values())
+
+
+def _indexer(table: List[Alert]) -> Callable[[List[Alert]], List[int]]:
+    """Maps alerts to their row in `table`, by object identity where possible."""
+    index_of = {id(alert): i for i, alert in enumerate(table)}
+    lookup = index_of.__getitem__
+    index_of_id: Dict[str, int] = {}
+
+    def indices(alerts: List[Alert]) -> List[int]:
+        try:
+            return list(map(lookup, map(id, alerts)))
+        except KeyError:
+            # Alerts that crossed a process boundary are copies; match those by alert id.
+            if not index_of_id:
+                index_of_id.update((alert.id, i) for i, alert in enumerate(table))
+            return [index_of_id[alert.id] for alert in alerts]
+
+    return indices
+
+
+def _references(response: TriageResponse, table: List[Alert]) -> dict:
+    indices = _indexer(table)
+    clusters = [
+        {
+            "cluster_id": cluster.cluster_id,
+            "host": cluster.host,
+            "start_time": cluster.start_time,
+            "end_time": cluster.end_time,
+            "alert_indices": indices(cluster.alerts),
+            "representative_message": cluster.representative_message,
+            "count": cluster.count,
+        }
+        for cluster in response.clusters
+    ]
+    return {
+        "clusters": clusters,
+        "critical_alert_indices": indices(response.critical_alerts),
+        "engine": response.engine,
+        "degraded": response.degraded,
+        # Incidents already reference clusters by index, so every format shares their shape.
+        "incidents": (
+            None if response.incidents is None
+            else [incident.model_dump() for incident in response.incidents]
+        ),
+    }
+
+
+def to_compact(response: TriageResponse, alerts: Optional[Sequence[Alert]] = None) -> dict:
+    """Builds the CompactTriageResponse shape as plain Python values."""
+    table = _alert_table(response, alerts)
+    return {
+        "alert_fields": ALERT_FIELDS,
+        "alerts": list(map(_alert_row, table)),
+        **_references(response, table),
+    }
+
+
+def to_columnar(response: TriageResponse, alerts: Optional[Sequence[Alert]] = None) -> dict:
+    """Builds the ColumnarTriageResponse shape as plain Python values."""
+    table = _alert_table(response, alerts)
+    return {
+        "alerts": {
+            field: list(map(operator.attrgetter(field), table)) for field in ALERT_FIELDS
+        },
+        **_references(response, table),
+    }
+
+
+def _default(value):
+    # Only reached by the standard-library encoder; orjson handles datetimes natively.
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Encodes plain Python values to JSON bytes with the fastest available encoder."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def render_triage_response(
+    response: TriageResponse, response_format: str, alerts: Optional[Sequence[Alert]] = None
+) -> Response:
+    """
+    Encodes a TriageResponse in the compact or columnar shape.
+
+    Args:
+        response: The triage result.
+        response_format: "compact" or "columnar".
+        alerts: The request's alerts; when given, the alert table keeps request order.
+    """
+    builder = to_compact if response_format == "compact" else to_columnar
+    return Response(
+        content=dumps(builder(response, alerts)),
+        media_type=MEDIA_TYPES[response_format],
+    )
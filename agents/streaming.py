@@ -0,0 +1,182 @@
+"""
+agents/streaming.py
+
+Stateful streaming mode for the Alert Triage Agent.
+
+Instead of re-sorting and re-embedding a whole window on every call, the engine
+keeps a small set of open clusters per host. Each open cluster holds a running
+centroid embedding and a last-seen timestamp:
+- An incoming alert is compared only against the open clusters of its host and
+  joins the most similar one, or opens a new cluster.
+- A cluster whose last alert is more than the time window behind the newest
+  alert seen is evicted and emitted as a finished AlertCluster.
+- Open clusters per host and alerts per cluster are capped, so memory is bounded
+  by the number of active hosts rather than by total alert volume.
+- Naive timestamps are taken as UTC, so calls mixing naive and timezone-aware
+  timestamps can be compared with the stored clusters.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from models.models import Alert, AlertCluster
+
+
+def _as_utc(alert: Alert) -> Alert:
+    """Returns `alert` with a naive timestamp marked as UTC."""
+    if alert.timestamp.tzinfo is not None:
+        return alert
+    return alert.model_copy(update={"timestamp": alert.timestamp.replace(tzinfo=timezone.utc)})
+
+
+class OpenCluster:
+    """A cluster that may still receive alerts."""
+
+    def __init__(self, host: str, alert: Alert, embedding: np.ndarray):
+        self.host = host
+        self.alerts = [alert]
+        self.embedding_sum = embedding.astype(np.float32, copy=True)
+        self.last_seen = alert.timestamp
+
+    @property
+    def centroid(self) -> np.ndarray:
+        norm = np.linalg.norm(self.embedding_sum)
+        return self.embedding_sum / norm if norm else self.embedding_sum
+
+    def add(self, alert: Alert, embedding: np.ndarray) -> None:
+        self.alerts.append(alert)
+        self.embedding_sum += embedding
+        if alert.timestamp > self.last_seen:
+            self.last_seen = alert.timestamp
+
+    def finish(self) -> AlertCluster:
+        """Converts the open cluster into the AlertCluster returned by the API."""
+        alerts = sorted(self.alerts, key=lambda a: a.timestamp)
+        return AlertCluster(
+            host=self.host,
+            start_time=alerts[0].timestamp,
+            end_time=alerts[-1].timestamp,
+            alerts=alerts,
+            representative_message=alerts[0].message,
+            count=len(alerts),
+        )
+
+
+class StreamingTriageEngine:
+    """
+    Incrementally clusters non-critical alerts per host.
+
+    Args:
+        encode: Embeds a list of messages into a 2-D float32 array (one row per message).
+        window: Clusters idle for longer than this are evicted.
+        similarity_threshold: Minimum cosine similarity between an alert and a
+            cluster centroid for the alert to join the cluster.
+        max_clusters_per_host: When a host exceeds this many open clusters, the
+            least recently seen one is emitted early.
+        max_alerts_per_cluster: A cluster reaching this size is emitted and later
+            alerts start a new one.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        window: timedelta,
+        similarity_threshold: float,
+        max_clusters_per_host: int = 64,
+        max_alerts_per_cluster: int = 1000,
+    ):
+        self.encode = encode
+        self.window = window
+        self.similarity_threshold = similarity_threshold
+        self.max_clusters_per_host = max_clusters_per_host
+        self.max_alerts_per_cluster = max_alerts_per_cluster
+        self._open: Dict[str, List[OpenCluster]] = {}
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active_hosts(self) -> int:
+        return len(self._open)
+
+    @property
+    def open_clusters(self) -> int:
+        return sum(len(clusters) for clusters in self._open.values())
+
+    def ingest(self, alerts: List[Alert]) -> List[AlertCluster]:
+        """
+        Assigns each alert to an open cluster on its host and returns the
+        clusters that were finished as a result.
+        """
+        if not alerts:
+            return []
+
+        alerts = sorted((_as_utc(alert) for alert in alerts), key=lambda a: a.timestamp)
+        messages = list(dict.fromkeys(alert.message for alert in alerts))
+        vectors = np.asarray(self.encode(messages), dtype=np.float32)
+        embedding_of = dict(zip(messages, vectors))
+
+        finished: List[OpenCluster] = []
+        with self._lock:
+            for alert in alerts:
+                finished.extend(self._assign(alert, embedding_of[alert.message]))
+                if self._watermark is None or alert.timestamp > self._watermark:
+                    self._watermark = alert.timestamp
+            finished.extend(self._evict_expired())
+        return [cluster.finish() for cluster in finished]
+
+    def flush(self) -> List[AlertCluster]:
+        """Emits every open cluster, e.g. on shutdown or at the end of a replay."""
+        with self._lock:
+            finished = [cluster for clusters in self._open.values() for cluster in clusters]
+            self._open.clear()
+        return [cluster.finish() for cluster in finished]
+
+    def _assign(self, alert: Alert, embedding: np.ndarray) -> List[OpenCluster]:
+        finished: List[OpenCluster] = []
+        clusters = self._open.setdefault(alert.host, [])
+
+        # Close clusters on this host that the alert is too late to extend.
+        still_open = []
+        for cluster in clusters:
+            if alert.timestamp - cluster.last_seen > self.window:
+                finished.append(cluster)
+            else:
+                still_open.append(cluster)
+        clusters[:] = still_open
+
+        best: Optional[OpenCluster] = None
+        if clusters:
+            similarities = np.stack([cluster.centroid for cluster in clusters]) @ embedding
+            best_index = int(np.argmax(similarities))
+            if similarities[best_index] >= self.similarity_threshold:
+                best = clusters[best_index]
+
+        if best is None:
+            if len(clusters) >= self.max_clusters_per_host:
+                oldest = min(clusters, key=lambda c: c.last_seen)
+                clusters.remove(oldest)
+                finished.append(oldest)
+            clusters.append(OpenCluster(alert.host, alert, embedding))
+        else:
+            best.add(alert, embedding)
+            if len(best.alerts) >= self.max_alerts_per_cluster:
+                clusters.remove(best)
+                finished.append(best)
+
+        if not clusters:
+            del self._open[alert.host]
+        return finished
+
+    def _evict_expired(self) -> List[OpenCluster]:
+        finished: List[OpenCluster] = []
+        for host in list(self._open):
+            clusters = self._open[host]
+            expired = [c for c in clusters if self._watermark - c.last_seen > self.window]
+            if expired:
+                finished.extend(expired)
+                clusters[:] = [c for c in clusters if c not in expired]
+            if not clusters:
+                del self._open[host]
+        return finished
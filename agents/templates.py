@@ -0,0 +1,159 @@
+"""
+agents/templates.py
+
+Drain-style log template mining for the Alert Triage Agent.
+
+Alert messages such as "High CPU utilization at 95%." and "High CPU utilization
+at 96%." differ only in variable tokens. The miner masks numbers, IPs, paths,
+UUIDs and hex ids, then groups the masked token sequences with a fixed-depth
+Drain parse tree (token count -> first token -> candidate templates). Only
+variable-like positions (masked placeholders, or tokens containing digits such
+as "p7a") may differ within a template; a differing plain word, such as
+"failed" / "restored", always starts a new template. Each
+message is assigned a template, and the triage pipeline embeds one
+representative message per template instead of every message.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# --- Constants ---
+# Placeholder used for template positions that vary between messages.
+WILDCARD = "<*>"
+# Minimum fraction of identical tokens for a message to join an existing template.
+# The remaining positions may only differ in variable-like tokens (see `_is_variable_like`),
+# so messages that differ in a real word ("restarted" vs "stopped") never share a template.
+TEMPLATE_SIMILARITY_THRESHOLD = 0.7
+# Tokens that look like values rather than words: a digit or a masked placeholder anywhere
+# in them, or a hex id of 8+ characters that happens to contain no digit ("cafbbaba").
+_VALUE = re.compile(r"\d|<[A-Z*]+>|^[0-9a-fA-F]{8,}$")
+
+# Masks applied in order, so more specific patterns win over plain numbers.
+MASKING_PATTERNS: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("<UUID>", re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")),
+    ("<IP>", re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b")),
+    ("<PATH>", re.compile(r"(?<![\w/])(?:/[\w.-]*[\w-])+/?")),
+    ("<HEX>", re.compile(r"\b0x[0-9a-fA-F]+\b")),
+    ("<NUM>", re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:%|ms|s|[KMGT]i?B)?(?!\w)")),
+]
+
+
+def mask_variables(message: str) -> str:
+    """Replaces variable tokens (UUIDs, IPs, paths, hex ids, numbers) with placeholders."""
+    for placeholder, pattern in MASKING_PATTERNS:
+        message = pattern.sub(placeholder, message)
+    return message
+
+
+def _is_variable(token: str) -> bool:
+    return token.startswith("<") and token.endswith(">")
+
+
+def _is_variable_like(token: str) -> bool:
+    """Masked placeholders and values such as ids ("p7a", "node-<NUM>", "cafbbaba")."""
+    return _VALUE.search(token) is not None
+
+
+class Template:
+    """A mined template and the first message that produced it."""
+
+    def __init__(self, template_id: int, tokens: List[str], representative: str):
+        self.template_id = template_id
+        self.tokens = tokens
+        self.representative = representative
+        self.size = 0
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    def similarity(self, tokens: List[str]) -> float:
+        """
+        Fraction of positions where the template and `tokens` agree, or 0.0 if
+        they differ anywhere in a plain word, which must never become a wildcard.
+        """
+        matching = 0
+        for ours, theirs in zip(self.tokens, tokens):
+            if ours == theirs or (ours == WILDCARD and _is_variable_like(theirs)):
+                matching += 1
+            elif not (_is_variable_like(ours) and _is_variable_like(theirs)):
+                return 0.0
+        return matching / len(tokens)
+
+    def merge(self, tokens: List[str]) -> None:
+        """
+        Turns every position that differs from `tokens` into a wildcard. Only
+        called after `similarity` accepted `tokens`, so those positions are variable-like.
+        """
+        self.tokens = [ours if ours == theirs else WILDCARD for ours, theirs in zip(self.tokens, tokens)]
+
+
+class TemplateMiner:
+    """
+    Assigns alert messages to templates with a depth-3 Drain parse tree.
+
+    Template ids are assigned sequentially per miner, so a miner is created per
+    triage request and its results only need to be consistent within it.
+    """
+
+    def __init__(self, similarity_threshold: float = TEMPLATE_SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+        self.templates: List[Template] = []
+        self._tree: Dict[Tuple[int, str], List[Template]] = {}
+        self._by_message: Dict[str, Template] = {}
+
+    def add(self, message: str) -> Template:
+        """Returns the template for `message`, creating or generalizing one as needed."""
+        template = self._by_message.get(message)
+        if template is not None:
+            template.size += 1
+            return template
+
+        tokens = mask_variables(message).split()
+        if not tokens:
+            tokens = [message]
+        first = WILDCARD if _is_variable(tokens[0]) else tokens[0]
+        candidates = self._tree.setdefault((len(tokens), first), [])
+
+        template = self._best_match(candidates, tokens)
+        if template is None:
+            template = Template(len(self.templates), tokens, message)
+            self.templates.append(template)
+            candidates.append(template)
+        else:
+            template.merge(tokens)
+
+        template.size += 1
+        self._by_message[message] = template
+        return template
+
+    def _best_match(self, candidates: List[Template], tokens: List[str]) -> Optional[Template]:
+        best, best_similarity = None, -1.0
+        for candidate in candidates:
+            similarity = candidate.similarity(tokens)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.similarity_threshold:
+            return best
+        return None
+
+
+def group_by_template(message_groups: List[List[str]]) -> List[List[List[int]]]:
+    """
+    Clusters each group's messages by their mined template alone: the
+    cheapest clustering, with no similarity computation at all.
+
+    Returns:
+        For every group, its clusters as lists of positions in the group, largest first.
+    """
+    miner = TemplateMiner()
+    template_of = {
+        message: miner.add(message)
+        for message in dict.fromkeys(message for group in message_groups for message in group)
+    }
+    results = []
+    for messages in message_groups:
+        members: Dict[int, List[int]] = {}
+        for position, message in enumerate(messages):
+            members.setdefault(template_of[message].template_id, []).append(position)
+        results.append(sorted(members.values(), key=len, reverse=True))
+    return results
@@ -3,138 +3,520 @@ agents/triage_agent.py
 
 This file contains the core logic for the Alert Triage Agent, including:
 - A FastAPI endpoint `/agents/triage`.
-- Alert clustering based on host, time proximity, and message similarity.
+- Alert clustering based on host, time proximity, and message similarity,
+  with a choice of engine: embeddings, or lexical MinHash/LSH (agents/lexical.py)
+  that needs no model and takes over when the model is unavailable.
+- Template mining so that messages differing only in variable tokens are embedded once.
+- A streaming endpoint `/agents/triage/ingest` that clusters alerts incrementally.
+- An NDJSON endpoint `/agents/triage/ndjson` for large uploads with streamed results.
 - Critical alert identification based on severity.
+- Optional fleet incidents grouping clusters across hosts (agents/fleet.py).
+- Deferred embedding model loading with warm-up, see `startup`.
+- Per-stage timings and counters, exposed by `/metrics` (see agents/metrics.py).
+- Admission control with per-request deadlines, and degradation to cheaper
+  engines when the projected time exceeds the deadline (see agents/admission.py).
 """
-from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Body, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple
+from contextlib import AsyncExitStack
 from datetime import datetime, timedelta
+import functools
 import itertools
+import json
+import os
+import time
 
-# Sentence-transformers is a powerful library for creating text embeddings.
-# We use a lightweight, high-performance model suitable for a hackathon prototype.
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+import torch
 
 # Import our Pydantic models.
 from models.models import Alert, AlertCluster, TriageRequest, TriageResponse
+from agents import metrics
+from agents.admission import AdmissionController, CostModel, Overloaded
+from agents.clustering import cluster_embeddings
+from agents.columnar import AlertColumns
+from agents.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+from agents.fleet import FLEET_INCIDENTS, group_fleet_incidents
+from agents.inference import InferenceExecutor
+from agents.lexical import cluster_message_groups_lexical
+from agents.model_manager import ModelManager, load_sentence_transformer
+from agents.ndjson import NDJSON_MEDIA_TYPES, AlertLimitExceeded, AlertPartitioner, LineTooLong, NdjsonValidationError
+from agents.parallel import ParallelTriageExecutor
+from agents.response_formats import RESPONSE_FORMATS, negotiate_format, render_triage_response
+from agents.streaming import StreamingTriageEngine
+from agents.templates import Template, TemplateMiner, group_by_template
 
 # --- Constants ---
+# Sentence-transformers model used for message embeddings. We use a lightweight,
+# high-performance model suitable for a hackathon prototype.
+EMBEDDING_MODEL_NAME = os.environ.get("TRIAGE_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Inference backend: "torch", "torch-int8" (dynamically quantized), "onnx" or "onnx-int8".
+MODEL_BACKEND = os.environ.get("TRIAGE_MODEL_BACKEND", "torch")
+# ONNX file used by the "onnx-int8" backend, relative to the model repository.
+MODEL_ONNX_FILE = os.environ.get("TRIAGE_MODEL_ONNX_FILE")
+# When the model is loaded: "background" (a thread started at application startup),
+# "eager" (startup waits for load and warm-up) or "lazy" (on the first request).
+MODEL_LOADING = os.environ.get("TRIAGE_MODEL_LOADING", "background")
+# Delay before a failed model load is retried, doubled after each failed retry up to the maximum.
+MODEL_LOAD_RETRY_SECONDS = float(os.environ.get("TRIAGE_MODEL_LOAD_RETRY_SECONDS", "30"))
+MODEL_LOAD_RETRY_MAX_SECONDS = float(os.environ.get("TRIAGE_MODEL_LOAD_RETRY_MAX_SECONDS", "600"))
 # Time window to group alerts on the same host. Alerts within this window are candidates for clustering.
 TIME_WINDOW_MINUTES = 10
 # Cosine similarity threshold for deduplicating alert messages.
 # FIX 2: Lowered from 0.85 to 0.80 to catch similar alerts like the "Disk" ones.
 SIMILARITY_THRESHOLD = 0.80
+# Clustering engine used when a request does not choose one: "embedding"
+# (sentence-transformer similarity), "lexical" (MinHash/LSH over character shingles,
+# no model), "template" (mined template only) or "auto" (embedding, falling back to
+# lexical when the model is unavailable).
+TRIAGE_ENGINE = os.environ.get("TRIAGE_ENGINE", "auto")
+TRIAGE_ENGINES = ("auto", "embedding", "lexical", "template")
+# Engines from most to least expensive; a request over its deadline moves down this list.
+DEGRADATION_ORDER = ("embedding", "lexical", "template")
+# Seconds per clustered alert assumed for each engine until requests have been measured.
+ENGINE_COST_PRIORS = {"embedding": 1e-4, "lexical": 2e-5, "template": 1e-5}
+# Share of a request's remaining deadline that projected clustering time may use;
+# the rest is left for partitioning, building clusters and serialization.
+DEADLINE_HEADROOM = 0.7
+# Deadline applied to requests that set none, in milliseconds (0: no deadline).
+DEFAULT_DEADLINE_MS = int(os.environ.get("TRIAGE_DEFAULT_DEADLINE_MS", "0"))
+# Triage jobs run at once (0 disables admission control), and requests allowed to
+# wait for a slot; past that, requests are rejected with 429.
+MAX_CONCURRENT_TRIAGE = int(os.environ.get("TRIAGE_MAX_CONCURRENT", str(os.cpu_count() or 4)))
+MAX_QUEUED_TRIAGE = int(os.environ.get("TRIAGE_MAX_QUEUED", "32"))
+# Endpoints whose requests take a slot, and are rejected early by AdmissionMiddleware.
+ADMITTED_PATHS = ("/agents/triage", "/agents/triage/ndjson", "/agents/triage/ingest")
+# Seconds suggested in the Retry-After header of rejected requests.
+RETRY_AFTER_SECONDS = 1
 # Severity score that marks an alert as critical.
 CRITICAL_SEVERITY_THRESHOLD = 8
+# Clustering backend for temporal groups: "exact" (all-pairs community detection),
+# "leader" (approximate, linear in group size) or "auto" (exact for small groups).
+CLUSTERING_BACKEND = os.environ.get("TRIAGE_CLUSTERING_BACKEND", "auto")
+# In "auto" mode, groups with more distinct templates than this use the approximate backend.
+EXACT_CLUSTERING_MAX_GROUP_SIZE = int(os.environ.get("TRIAGE_EXACT_CLUSTERING_MAX_GROUP_SIZE", "2000"))
+# Number of messages embedded per forward pass. The unique messages of a triage
+# request are encoded in one `encode` call, which splits them into batches of this size.
+EMBEDDING_BATCH_SIZE = int(os.environ.get("TRIAGE_EMBEDDING_BATCH_SIZE", "64"))
+# Maximum number of message embeddings kept in the in-process LRU cache (0 disables it).
+EMBEDDING_CACHE_SIZE = int(os.environ.get("TRIAGE_EMBEDDING_CACHE_SIZE", "10000"))
+# Optional directory of the persistent, memory-mapped embedding store.
+EMBEDDING_CACHE_PATH = os.environ.get("TRIAGE_EMBEDDING_CACHE_PATH")
+# Open the persistent store read-only. Writable stores may be shared by any number
+# of uvicorn workers; their appends are serialized with a file lock.
+EMBEDDING_CACHE_READ_ONLY = os.environ.get("TRIAGE_EMBEDDING_CACHE_READ_ONLY", "0") == "1"
+# Cross-request micro-batching: the inference thread waits at most this long for
+# concurrent requests to join a batch, and stops collecting at this many messages.
+INFERENCE_MAX_WAIT_MS = float(os.environ.get("TRIAGE_INFERENCE_MAX_WAIT_MS", "2"))
+INFERENCE_MAX_BATCH_SIZE = int(os.environ.get("TRIAGE_INFERENCE_MAX_BATCH_SIZE", "256"))
+# Worker processes for parallel triage across host shards (1 disables the pool), and
+# the number of temporal groups a request needs before it is sent to the pool.
+TRIAGE_WORKERS = int(os.environ.get("TRIAGE_WORKERS", "1"))
+PARALLEL_MIN_GROUPS = int(os.environ.get("TRIAGE_PARALLEL_MIN_GROUPS", "64"))
+# Maximum number of alerts accepted in one NDJSON triage upload.
+NDJSON_MAX_ALERTS = int(os.environ.get("TRIAGE_NDJSON_MAX_ALERTS", "1000000"))
+# Maximum length in bytes of one line (one alert) of an NDJSON triage upload.
+NDJSON_MAX_LINE_BYTES = int(os.environ.get("TRIAGE_NDJSON_MAX_LINE_BYTES", str(1024 * 1024)))
+# Streaming mode bounds: open clusters kept per host, and alerts kept per open cluster.
+STREAM_MAX_CLUSTERS_PER_HOST = int(os.environ.get("TRIAGE_STREAM_MAX_CLUSTERS_PER_HOST", "64"))
+STREAM_MAX_ALERTS_PER_CLUSTER = int(os.environ.get("TRIAGE_STREAM_MAX_ALERTS_PER_CLUSTER", "1000"))
 
 # --- Agent Setup ---
 router = APIRouter()
 
-# Load the sentence-transformer model once on startup.
-# This model is small and efficient, perfect for real-time processing.
-try:
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-except Exception as e:
-    # Handle cases where the model download might fail (e.g., no internet)
-    print(f"Error loading SentenceTransformer model: {e}")
-    embedding_model = None
+# The sentence-transformer model is loaded once, but not at import time: see `startup`.
+# A failed load (e.g. no internet to download it) is reported as 503 and retried with backoff.
+model_manager = ModelManager(
+    loader=functools.partial(
+        load_sentence_transformer, EMBEDDING_MODEL_NAME, backend=MODEL_BACKEND, onnx_file=MODEL_ONNX_FILE
+    ),
+    description={"model": EMBEDDING_MODEL_NAME, "backend": MODEL_BACKEND},
+    retry_seconds=MODEL_LOAD_RETRY_SECONDS,
+    max_retry_seconds=MODEL_LOAD_RETRY_MAX_SECONDS,
+)
+
+# All model calls go through one inference thread that coalesces concurrent requests.
+inference_executor = InferenceExecutor(
+    model_getter=model_manager.load,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    batch_size=EMBEDDING_BATCH_SIZE,
+)
+
+# Embeddings are cached by normalized message so repeated alert strings skip the model.
+embedding_cache = EmbeddingCache(
+    max_entries=EMBEDDING_CACHE_SIZE,
+    disk_store=(
+        DiskEmbeddingStore(EMBEDDING_CACHE_PATH, read_only=EMBEDDING_CACHE_READ_ONLY)
+        if EMBEDDING_CACHE_PATH
+        else None
+    ),
+)
+
+# Large requests are sharded by host across a process pool when TRIAGE_WORKERS > 1.
+parallel_triage = ParallelTriageExecutor(workers=TRIAGE_WORKERS, min_groups=PARALLEL_MIN_GROUPS)
+
+# Bounds concurrent triage jobs of ADMITTED_PATHS; see agents/admission.py.
+admission = AdmissionController(max_concurrent=MAX_CONCURRENT_TRIAGE, max_queued=MAX_QUEUED_TRIAGE)
+
+# Measured clustering cost per alert of each engine, used to meet request deadlines.
+cost_model = CostModel(priors=ENGINE_COST_PRIORS)
+
+# Streaming mode keeps per-host open clusters between calls to /agents/triage/ingest.
+streaming_engine = StreamingTriageEngine(
+    encode=lambda messages: _encode_messages(messages),
+    window=timedelta(minutes=TIME_WINDOW_MINUTES),
+    similarity_threshold=SIMILARITY_THRESHOLD,
+    max_clusters_per_host=STREAM_MAX_CLUSTERS_PER_HOST,
+    max_alerts_per_cluster=STREAM_MAX_ALERTS_PER_CLUSTER,
+)
+
+# --- Lifecycle ---
+
+def startup() -> None:
+    """
+    Starts loading the embedding model according to TRIAGE_MODEL_LOADING.
+    Called from the application's lifespan.
+    """
+    if MODEL_LOADING == "eager":
+        model_manager.warm_up()
+    elif MODEL_LOADING == "background":
+        model_manager.load_in_background(warm_up=True)
+
+
+def shutdown() -> None:
+    """Stops the inference thread and the parallel triage pool."""
+    inference_executor.shutdown()
+    parallel_triage.shutdown()
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """
+    Returns the engine that will cluster a request: "embedding", "lexical"
+    or "template". "auto" picks embedding when the model is (or can be) loaded, else lexical.
+
+    Raises:
+        ValueError: If `engine` is not one of TRIAGE_ENGINES.
+    """
+    engine = engine or TRIAGE_ENGINE
+    if engine not in TRIAGE_ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose from: {', '.join(TRIAGE_ENGINES)}.")
+    if engine == "auto":
+        return "embedding" if model_manager.load() is not None else "lexical"
+    return engine
+
+
+async def _select_engine(engine: Optional[str]) -> str:
+    """
+    Resolves a request's engine off the event loop. An explicit "embedding"
+    still requires the model (503 when it could not be loaded); invalid names are a 400.
+    """
+    if (engine or TRIAGE_ENGINE) == "embedding":
+        await _require_model()
+        return "embedding"
+    try:
+        return resolve_engine(engine) if model_manager.ready else await run_in_threadpool(resolve_engine, engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _require_model() -> None:
+    """
+    Waits for the embedding model when it is not loaded yet, and raises 503
+    when it could not be loaded.
+    """
+    if model_manager.ready:
+        return
+    if await run_in_threadpool(model_manager.load) is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Triage agent is unavailable: embedding model could not be loaded."
+        )
+
 
 # --- Core Logic ---
 
-def process_alert_triage(alerts: List[Alert]) -> TriageResponse:
+def _split_temporal_groups(sorted_alerts: List[Alert]) -> List[List[Alert]]:
+    """
+    Chains time-sorted alerts into groups separated by gaps larger than
+    TIME_WINDOW_MINUTES.
+    """
+    if not sorted_alerts:
+        return []
+
+    window = timedelta(minutes=TIME_WINDOW_MINUTES)
+    temporal_groups = []
+    current_group = [sorted_alerts[0]]
+    for i in range(1, len(sorted_alerts)):
+        time_diff = sorted_alerts[i].timestamp - current_group[-1].timestamp
+        if time_diff <= window:
+            current_group.append(sorted_alerts[i])
+        else:
+            temporal_groups.append(current_group)
+            current_group = [sorted_alerts[i]]
+    temporal_groups.append(current_group)
+    return temporal_groups
+
+
+def _encode_messages(messages: List[str]) -> np.ndarray:
+    """
+    Embeds messages through the embedding cache. All misses are submitted to
+    the inference executor together, where they may share a batch with other
+    concurrent requests.
+    """
+    return embedding_cache.encode(messages, inference_executor.encode)
+
+
+def _encode_templates(templates: List[Template]) -> Tuple[torch.Tensor, Dict[int, int]]:
+    """
+    Phase 1 of the pipeline: embeds the representative message of every
+    template in a single batched `encode` call. Messages already in the
+    embedding cache are not sent to the model at all.
+
+    Returns:
+        The embedding matrix and a mapping from template id to its row in it.
+    """
+    row_of = {template.template_id: row for row, template in enumerate(templates)}
+    with metrics.stage("encode"):
+        matrix = _encode_messages([template.representative for template in templates])
+    return torch.from_numpy(matrix), row_of
+
+
+def _cluster_message_group(
+    messages: List[str],
+    template_of: Dict[str, Template],
+    embeddings: torch.Tensor,
+    row_of: Dict[int, int],
+) -> List[List[int]]:
+    """
+    Phase 2 of the pipeline: clusters one temporal group on its slice of the
+    shared embedding matrix. Alerts sharing a template always land in the same
+    cluster, so only one embedding per template takes part in the similarity search.
+
+    Returns:
+        Clusters as lists of positions in `messages`.
+    """
+    members: Dict[int, List[int]] = {}
+    for position, message in enumerate(messages):
+        members.setdefault(template_of[message].template_id, []).append(position)
+
+    template_ids = list(members)
+    if len(template_ids) == 1:
+        # Short-circuit: the whole group is a single template.
+        return [list(range(len(messages)))]
+
+    rows = torch.tensor([row_of[tid] for tid in template_ids], device=embeddings.device)
+    # Exact community detection for ordinary groups; huge groups switch to the
+    # approximate leader backend so memory and time stay linear.
+    with metrics.stage("cluster"):
+        communities = cluster_embeddings(
+            embeddings[rows],
+            SIMILARITY_THRESHOLD,
+            backend=CLUSTERING_BACKEND,
+            max_exact_size=EXACT_CLUSTERING_MAX_GROUP_SIZE,
+        )
+    return [
+        [position for idx in community for position in members[template_ids[idx]]]
+        for community in communities
+    ]
+
+
+def cluster_message_groups(message_groups: List[List[str]]) -> List[List[List[int]]]:
+    """
+    Clusters the messages of each temporal group by similarity.
+
+    A template is mined for every distinct message and each template is
+    embedded once; each group is then clustered on its slice of the shared
+    embedding matrix. Working on messages only keeps this step cheap to ship
+    to worker processes.
+
+    Returns:
+        For every group, its clusters as lists of positions in the group.
+    """
+    miner = TemplateMiner()
+    with metrics.stage("templates"):
+        template_of = {
+            message: miner.add(message)
+            for message in dict.fromkeys(message for group in message_groups for message in group)
+        }
+    embeddings, row_of = _encode_templates(miner.templates)
+    return [
+        _cluster_message_group(messages, template_of, embeddings, row_of)
+        for messages in message_groups
+    ]
+
+
+def _cluster_temporal_groups(
+    temporal_groups: List[Tuple[str, List[Alert]]], engine: str = "embedding"
+) -> List[AlertCluster]:
+    """
+    Clusters (host, temporal group) pairs by message similarity, on the
+    parallel host-shard pool when it is enabled and the request is large enough.
+    The lexical engine always runs inline: it is cheaper than shipping the groups.
+    """
+    message_groups = [[alert.message for alert in group] for _, group in temporal_groups]
+    if engine == "lexical":
+        with metrics.stage("lexical_cluster"):
+            group_clusters = cluster_message_groups_lexical(message_groups)
+    elif engine == "template":
+        with metrics.stage("templates"):
+            group_clusters = group_by_template(message_groups)
+    elif parallel_triage.should_parallelize(temporal_groups):
+        with metrics.stage("parallel_cluster"):
+            group_clusters = parallel_triage.cluster(
+                [host for host, _ in temporal_groups], message_groups
+            )
+    else:
+        group_clusters = cluster_message_groups(message_groups)
+
+    with metrics.stage("build"):
+        return _build_clusters(temporal_groups, group_clusters)
+
+
+def _build_clusters(
+    temporal_groups: List[Tuple[str, List[Alert]]], group_clusters: List[List[List[int]]]
+) -> List[AlertCluster]:
+    """Turns the clusters of each group, as positions, into AlertCluster objects."""
+    final_clusters: List[AlertCluster] = []
+    for (host, group), clusters in zip(temporal_groups, group_clusters):
+        # Create AlertCluster objects from the detected message clusters
+        for positions in clusters:
+            cluster_alerts = [group[position] for position in positions]
+            # Sort to find the first and last alerts accurately
+            cluster_alerts.sort(key=lambda a: a.timestamp)
+
+            final_clusters.append(
+                AlertCluster(
+                    host=host,
+                    start_time=cluster_alerts[0].timestamp,
+                    end_time=cluster_alerts[-1].timestamp,
+                    alerts=cluster_alerts,
+                    representative_message=cluster_alerts[0].message,
+                    count=len(cluster_alerts),
+                )
+            )
+    return final_clusters
+
+
+def _affordable_engine(engine: str, alert_count: int, deadline: Optional[float]) -> str:
+    """
+    The most expensive engine, no costlier than `engine`, whose projected
+    clustering time fits the remaining deadline; the cheapest one if none does.
+    Now and then a request probes an engine ruled out by its estimate instead,
+    so the estimate is re-measured (see `CostModel.claim_probe`).
+    """
+    if deadline is None or engine not in DEGRADATION_ORDER:
+        return engine
+    budget = (deadline - time.monotonic()) * DEADLINE_HEADROOM
+    candidates = DEGRADATION_ORDER[DEGRADATION_ORDER.index(engine):]
+    for candidate in candidates:
+        if cost_model.projected(candidate, alert_count) <= budget or cost_model.claim_probe(candidate):
+            return candidate
+    return candidates[-1]
+
+
+def process_alert_triage(
+    alerts: List[Alert],
+    engine: Optional[str] = None,
+    incidents: Optional[bool] = None,
+    deadline: Optional[float] = None,
+) -> TriageResponse:
     """
     Main function to process raw alerts into clusters and critical items.
 
+    Partitioning runs on a columnar (NumPy) view of the alerts. Messages are
+    then reduced to Drain-style templates (numbers, IPs, paths and ids masked),
+    and embedding runs in two phases: one representative message per template
+    is encoded for the whole request, then each temporal group is clustered on
+    its slice of the shared embedding matrix. The lexical engine replaces both
+    phases with MinHash signatures bucketed by LSH, and the template engine
+    clusters each group by mined template alone. Optionally, a final pass
+    groups the per-host clusters into fleet incidents.
+
+    With a deadline, the clustering time of the chosen engine is projected from
+    recent requests (see `cost_model`). If it does not fit, the request is
+    degraded to the next cheaper engine (embedding -> lexical -> template) and
+    the response is marked `degraded`.
+
     Args:
         alerts: A list of raw Alert objects.
+        engine: "embedding", "lexical", "template" or "auto"; defaults to TRIAGE_ENGINE.
+        incidents: Whether to compute fleet incidents; defaults to TRIAGE_FLEET_INCIDENTS.
+        deadline: `time.monotonic()` time by which the response should be ready.
 
     Returns:
         A TriageResponse object containing clusters and critical alerts.
     """
+    engine = resolve_engine(engine)
+    incidents = FLEET_INCIDENTS if incidents is None else incidents
     if not alerts:
-        return TriageResponse(clusters=[], critical_alerts=[])
-    
-    # FIX 1: Separate alerts into critical and non-critical lists.
-    # This prevents critical alerts from being processed by the clustering logic.
-    critical_alerts = []
-    non_critical_alerts = []
-    
-    for alert in alerts:
-        if alert.severity >= CRITICAL_SEVERITY_THRESHOLD:
-            critical_alerts.append(alert)
-        else:
-            non_critical_alerts.append(alert)
+        return TriageResponse(clusters=[], critical_alerts=[], engine=engine, incidents=[] if incidents else None)
 
-    # 2. Group non-critical alerts by host for processing
-    alerts_by_host: Dict[str, List[Alert]] = {}
-    # Use the filtered 'non_critical_alerts' list here
-    for alert in non_critical_alerts:
-        if alert.host not in alerts_by_host:
-            alerts_by_host[alert.host] = []
-        alerts_by_host[alert.host].append(alert)
-
-    # 3. Process each host's alerts to create clusters
-    final_clusters: List[AlertCluster] = []
-    for host, host_alerts in alerts_by_host.items():
-        # Sort alerts by time to enable temporal grouping
-        sorted_alerts = sorted(host_alerts, key=lambda a: a.timestamp)
-        
-        # Temporally group alerts
-        temporal_groups = []
-        if not sorted_alerts:
-            continue
-            
-        current_group = [sorted_alerts[0]]
-        for i in range(1, len(sorted_alerts)):
-            time_diff = sorted_alerts[i].timestamp - current_group[-1].timestamp
-            if time_diff <= timedelta(minutes=TIME_WINDOW_MINUTES):
-                current_group.append(sorted_alerts[i])
-            else:
-                temporal_groups.append(current_group)
-                current_group = [sorted_alerts[i]]
-        temporal_groups.append(current_group)
-
-        # 4. For each temporal group, perform similarity clustering
-        for group in temporal_groups:
-            if not group:
-                continue
-            
-            # Encode alert messages into vector embeddings
-            messages = [alert.message for alert in group]
-            embeddings = embedding_model.encode(messages, convert_to_tensor=True)
-            
-            # Use sentence-transformers' community detection for efficient clustering
-            # This is faster and more robust than manual pair-wise comparison.
-            message_clusters = util.community_detection(
-                embeddings, min_community_size=1, threshold=SIMILARITY_THRESHOLD
+    with metrics.collect_stages():
+        # 1-3. Read the alerts into NumPy columns once, then filter critical alerts,
+        # partition by host, sort by time and split temporal windows as array operations.
+        # FIX 1: Critical alerts are kept out of the clustering logic.
+        with metrics.stage("partition"):
+            columns = AlertColumns(alerts)
+            critical_rows, group_rows = columns.partition(
+                CRITICAL_SEVERITY_THRESHOLD, timedelta(minutes=TIME_WINDOW_MINUTES)
             )
-            
-            # 5. Create AlertCluster objects from the detected message clusters
-            for i, cluster_indices in enumerate(message_clusters):
-                cluster_alerts = [group[idx] for idx in cluster_indices]
-                
-                # Sort to find the first and last alerts accurately
-                cluster_alerts.sort(key=lambda a: a.timestamp)
-
-                final_clusters.append(
-                    AlertCluster(
-                        host=host,
-                        start_time=cluster_alerts[0].timestamp,
-                        end_time=cluster_alerts[-1].timestamp,
-                        alerts=cluster_alerts,
-                        representative_message=cluster_alerts[0].message,
-                        count=len(cluster_alerts),
-                    )
-                )
+            critical_alerts = columns.take(critical_rows)
+            temporal_groups = [(host, columns.take(rows)) for host, rows in group_rows]
+
+        # 4-5. Cluster every temporal group by message similarity, with an engine
+        # that fits the deadline
+        clustered = len(alerts) - len(critical_alerts)
+        requested_engine, engine = engine, _affordable_engine(engine, clustered, deadline)
+        started = time.perf_counter()
+        final_clusters = _cluster_temporal_groups(temporal_groups, engine) if temporal_groups else []
+        cost_model.observe(engine, clustered, time.perf_counter() - started)
+
+        # 6. Group clusters on different hosts into fleet incidents
+        fleet_incidents = None
+        if incidents:
+            with metrics.stage("fleet"):
+                fleet_incidents = group_fleet_incidents(final_clusters, timedelta(minutes=TIME_WINDOW_MINUTES))
 
-    return TriageResponse(clusters=final_clusters, critical_alerts=critical_alerts)
+    degraded = engine != requested_engine
+    metrics.record_triage(
+        len(alerts), len(critical_alerts), temporal_groups, len(final_clusters), engine=engine, degraded=degraded
+    )
+    return TriageResponse(
+        clusters=final_clusters,
+        critical_alerts=critical_alerts,
+        engine=engine,
+        incidents=fleet_incidents,
+        degraded=degraded,
+    )
 
 
 # --- API Endpoint ---
 
 @router.post("/agents/triage", response_model=TriageResponse, tags=["AI Agents"])
 async def triage_alerts_endpoint(
-    request: TriageRequest = Body(...)
+    http_request: Request,
+    request: TriageRequest = Body(...),
+    response_format: Optional[str] = Query(
+        None,
+        alias="format",
+        description=f"Response shape: one of {', '.join(RESPONSE_FORMATS)}. Defaults to full.",
+    ),
+    accept: Optional[str] = Header(None),
+    engine: Optional[str] = Query(
+        None,
+        description=f"Clustering engine: one of {', '.join(TRIAGE_ENGINES)}. Defaults to {TRIAGE_ENGINE}.",
+    ),
+    incidents: Optional[bool] = Query(
+        None, description="Group clusters across hosts into fleet incidents. Defaults to TRIAGE_FLEET_INCIDENTS."
+    ),
+    deadline_header: Optional[int] = Header(
+        None,
+        alias="X-Triage-Deadline-Ms",
+        description="Time budget of the request in milliseconds; `deadline_ms` in the body takes precedence.",
+    ),
 ):
     """
     Receives a list of raw alerts and returns a structured response containing
@@ -149,12 +531,41 @@ async def triage_alerts_endpoint(
 
     **Critical Alert Rule:**
     - An alert is marked as critical if its `severity` is 8 or higher.
+
+    **Response Formats:**
+    - `full` (default): `TriageResponse`, with every alert embedded in its cluster.
+    - `compact`: a shared alert table of rows; clusters hold `alert_indices` into it.
+    - `columnar`: the alert table as parallel arrays of id/host/timestamp/severity/message.
+
+    Select a format with `?format=` or an `Accept` header of
+    `application/vnd.triage.compact+json` / `application/vnd.triage.columnar+json`.
+
+    **Engines** (`?engine=`):
+    - `embedding`: semantic similarity of sentence-transformer embeddings; 503 if the model is unavailable.
+    - `lexical`: MinHash/LSH over character shingles, for bulk work; no model needed.
+    - `auto` (default): `embedding`, or `lexical` when the model could not be loaded.
+    The response's `engine` field names the engine used.
+
+    **Fleet incidents** (`?incidents=true`): clusters on different hosts with
+    similar messages in overlapping time windows are grouped into `incidents`,
+    each listing its hosts and the `cluster_indices` of its clusters.
+
+    **Deadlines and load:**
+    - A time budget in milliseconds, counted from the request's arrival, can be
+      set with `deadline_ms` in the body or the `X-Triage-Deadline-Ms` header. When the chosen engine is projected to
+      miss it, a cheaper one is used (embedding -> lexical -> template) and the
+      response has `degraded: true`.
+    - At most TRIAGE_MAX_CONCURRENT requests are triaged at once. Up to
+      TRIAGE_MAX_QUEUED more wait; beyond that, requests get 429 at once. A
+      request whose deadline passes while it waits gets 503.
     """
-    if embedding_model is None:
-        raise HTTPException(
-            status_code=503, 
-            detail="Triage agent is unavailable: embedding model could not be loaded."
-        )
+    metrics.end_stage("parse")
+    try:
+        selected_format = negotiate_format(response_format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    selected_engine = await _select_engine(engine)
 
     if not request.alerts:
         raise HTTPException(
@@ -162,12 +573,212 @@ async def triage_alerts_endpoint(
             detail="Request must contain a non-empty list of alerts."
         )
 
+    deadline = _deadline(http_request, request.deadline_ms or deadline_header or DEFAULT_DEADLINE_MS)
     try:
-        response_data = process_alert_triage(request.alerts)
+        async with admission.admit(deadline):
+            # Triage is CPU bound; run it off the event loop so other requests stay responsive.
+            response_data = await run_in_threadpool(
+                process_alert_triage, request.alerts, selected_engine, incidents, deadline
+            )
+        if selected_format != "full":
+            with metrics.stage("serialize"):
+                return render_triage_response(response_data, selected_format, request.alerts)
+        # FastAPI encodes the response model after we return; the stage ends when the response starts.
+        metrics.begin_stage("serialize")
         return response_data
+    except Overloaded as e:
+        raise _overloaded_error(e)
     except Exception as e:
         # Generic error handler for unexpected issues during processing
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred during alert triage: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def _deadline(http_request: Request, deadline_ms: int) -> Optional[float]:
+    """`time.monotonic()` deadline of a request, or None when it has no time budget."""
+    # Deadlines count from arrival (recorded by AdmissionMiddleware), not from the end of parsing.
+    received_at = getattr(http_request.state, "received_at", None) or time.monotonic()
+    return received_at + deadline_ms / 1000 if deadline_ms > 0 else None
+
+
+def _overloaded_error(e: Overloaded) -> HTTPException:
+    metrics.record_rejection(e.reason)
+    return HTTPException(
+        status_code=429 if e.reason == "queue_full" else 503,
+        detail=str(e),
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+async def _release_after(lines: Iterator[bytes], slot: AsyncExitStack) -> AsyncIterator[bytes]:
+    """Streams `lines` from the threadpool and releases the admission `slot` when the stream ends or is cancelled."""
+    try:
+        async for line in iterate_in_threadpool(lines):
+            yield line
+    finally:
+        await slot.aclose()
+
+
+def _ndjson_line(kind: str, payload_json: str) -> bytes:
+    return f'{{"type":"{kind}","{kind}":{payload_json}}}\n'.encode("utf-8")
+
+
+def _stream_ndjson_results(partitioner: AlertPartitioner, engine: str = "embedding") -> Iterator[bytes]:
+    """
+    Yields critical alerts first, then each host's clusters as soon as that
+    host is triaged, then a summary line. A host's alerts are released as soon
+    as its clusters have been written.
+    """
+    for alert in partitioner.critical_alerts:
+        yield _ndjson_line("critical_alert", alert.model_dump_json())
+
+    hosts = len(partitioner.alerts_by_host)
+    cluster_count = 0
+    try:
+        while partitioner.alerts_by_host:
+            host = next(iter(partitioner.alerts_by_host))
+            host_alerts = partitioner.alerts_by_host.pop(host)
+            sorted_alerts = sorted(host_alerts, key=lambda a: a.timestamp)
+            groups = [(host, group) for group in _split_temporal_groups(sorted_alerts)]
+            for cluster in _cluster_temporal_groups(groups, engine):
+                cluster_count += 1
+                yield _ndjson_line("cluster", cluster.model_dump_json())
+    except Exception as e:
+        # The status line has already been sent, so report the failure in-band.
+        yield _ndjson_line("error", json.dumps(f"An unexpected error occurred during alert triage: {str(e)}"))
+        return
+
+    summary = {
+        "alerts": partitioner.count,
+        "hosts": hosts,
+        "clusters": cluster_count,
+        "critical_alerts": len(partitioner.critical_alerts),
+        "engine": engine,
+    }
+    yield _ndjson_line("summary", json.dumps(summary))
+
+
+@router.post("/agents/triage/ndjson", tags=["AI Agents"])
+async def triage_ndjson_endpoint(
+    request: Request,
+    engine: Optional[str] = Query(
+        None,
+        description=f"Clustering engine: one of {', '.join(TRIAGE_ENGINES)}. Defaults to {TRIAGE_ENGINE}.",
+    ),
+):
+    """
+    Triage for large uploads: accepts `application/x-ndjson`, one `Alert` per line.
+
+    Lines are validated and partitioned by host while the body is still
+    arriving, so memory stays bounded by the parsed alerts rather than several
+    copies of the payload. The response is NDJSON as well, streamed as work
+    completes:
+    - `{"type": "critical_alert", "critical_alert": {...}}` for each critical alert,
+    - `{"type": "cluster", "cluster": {...}}` for each AlertCluster, host by host,
+    - `{"type": "summary", "summary": {...}}` as the last line, naming the engine used.
+
+    `?engine=` selects the clustering engine as for `/agents/triage`, and the
+    request takes an admission slot the same way (429 when the queue is full),
+    held until the response has been streamed.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type and content_type not in NDJSON_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Expected one of {', '.join(NDJSON_MEDIA_TYPES)}, got '{content_type}'."
+        )
+
+    selected_engine = await _select_engine(engine)
+
+    partitioner = AlertPartitioner(
+        CRITICAL_SEVERITY_THRESHOLD, max_alerts=NDJSON_MAX_ALERTS, max_line_bytes=NDJSON_MAX_LINE_BYTES
+    )
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(partitioner.feed, chunk)
+        partitioner.close()
+    except NdjsonValidationError as e:
+        raise HTTPException(status_code=422, detail={"line": e.line, "errors": e.errors})
+    except (AlertLimitExceeded, LineTooLong) as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if partitioner.count == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Request must contain a non-empty list of alerts."
+        )
+
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(admission.admit(_deadline(request, DEFAULT_DEADLINE_MS)))
+    except Overloaded as e:
+        raise _overloaded_error(e)
+    return StreamingResponse(
+        _release_after(_stream_ndjson_results(partitioner, selected_engine), slot),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/agents/triage/ingest", response_model=TriageResponse, tags=["AI Agents"])
+async def ingest_alerts_endpoint(
+    http_request: Request,
+    request: TriageRequest = Body(...),
+):
+    """
+    Streaming triage: feeds alerts into per-host open clusters kept between calls.
+
+    Each alert is compared only with the open clusters of its host (cosine
+    similarity to the cluster centroid >= 0.80) and joins the best one or opens
+    a new one. The response contains the clusters that finished during this
+    call, i.e. those idle for more than 10 minutes of alert time, plus any
+    critical alerts in the batch. Calls take an admission slot as for
+    `/agents/triage` (429 when the queue is full).
+    """
+    await _require_model()
+
+    if not request.alerts:
+        raise HTTPException(
+            status_code=400,
+            detail="Request must contain a non-empty list of alerts."
+        )
+
+    critical_alerts = [a for a in request.alerts if a.severity >= CRITICAL_SEVERITY_THRESHOLD]
+    non_critical_alerts = [a for a in request.alerts if a.severity < CRITICAL_SEVERITY_THRESHOLD]
+    try:
+        async with admission.admit(_deadline(http_request, DEFAULT_DEADLINE_MS)):
+            finished = await run_in_threadpool(streaming_engine.ingest, non_critical_alerts)
+    except Overloaded as e:
+        raise _overloaded_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An unexpected error occurred during alert triage: {str(e)}"
+        )
+    return TriageResponse(clusters=finished, critical_alerts=critical_alerts)
+
+
+@router.post("/agents/triage/flush", response_model=TriageResponse, tags=["AI Agents"])
+async def flush_streaming_clusters_endpoint():
+    """
+    Emits every cluster still open in the streaming engine, regardless of age.
+    """
+    return TriageResponse(clusters=streaming_engine.flush(), critical_alerts=[])
+
+
+@router.get("/agents/triage/cache", tags=["AI Agents"])
+async def embedding_cache_stats():
+    """
+    Returns hit/miss/eviction counters of the embedding cache, for sizing
+    `TRIAGE_EMBEDDING_CACHE_SIZE`.
+    """
+    return embedding_cache.stats()
+
+
+@router.get("/agents/triage/inference", tags=["AI Agents"])
+async def inference_executor_stats():
+    """
+    Returns micro-batching counters of the inference executor.
+    """
+    return inference_executor.stats()
@@ -8,7 +8,9 @@ const http = require("http");
 
 const app = express();
 app.use(cors());
-app.use(express.json());
+// Sized for ticket arrays from the alert triage worker (BACKEND_BATCH_SIZE tickets
+// per request); Express's default of 100kb fits only a handful of tickets.
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || "10mb" }));
 
 const server = http.createServer(app);
 const { Server } = require("socket.io");
@@ -155,20 +157,32 @@ app.post("/api/tickets", auth, async (req, res) => {
     }
 });
 
-// Machine-to-machine ticket creation route protected by service token
-app.post("/api/service/tickets", serviceAuth, async (req, res) => {
-    const {
-        title,
-        description,
-        priority = "medium",
-        client_id = null,
-    } = req.body;
+// Machine-to-machine ticket creation route protected by service token.
+// Accepts one ticket, or an array answered with { results: [{ ticket } | { error }] }
+// in request order so the worker can acknowledge each alert separately.
+async function createServiceTicket({ title, description, priority = "medium" }) {
     const q = `INSERT INTO tickets (title, description, priority, created_by) VALUES ($1,$2,$3,$4) RETURNING *`;
+    // created_by is null for service-created tickets
+    const r = await pool.query(q, [title, description, priority, null]);
+    io.emit("ticket:created", r.rows[0]);
+    return r.rows[0];
+}
+
+app.post("/api/service/tickets", serviceAuth, async (req, res) => {
+    if (Array.isArray(req.body)) {
+        const results = [];
+        for (const item of req.body) {
+            try {
+                results.push({ ticket: await createServiceTicket(item) });
+            } catch (e) {
+                console.error(e);
+                results.push({ error: "db error" });
+            }
+        }
+        return res.json({ results });
+    }
     try {
-        // created_by is null for service-created tickets
-        const r = await pool.query(q, [title, description, priority, null]);
-        io.emit("ticket:created", r.rows[0]);
-        res.json(r.rows[0]);
+        res.json(await createServiceTicket(req.body));
     } catch (e) {
         console.error(e);
         res.status(500).json({ error: "db error" });
@@ -0,0 +1,181 @@
+"""
+benchmarks/bench_engines.py
+
+Compares the clustering engines of `process_alert_triage`: "embedding"
+(sentence-transformer similarity), "lexical" (MinHash/LSH, agents/lexical.py)
+and "template" (mined template only).
+
+For every scale a workload is generated with benchmarks/generator.py and
+triaged with every engine. The suite reports the median time of each engine,
+the number of clusters it produced, and agreement counted over pairs of alerts:
+- precision: share of pairs the candidate groups together that the reference
+  also groups together,
+- recall: share of pairs the reference groups together that the candidate
+  also groups together.
+
+Two references are used:
+- "truth": the generator's own labels. Two alerts belong together when they
+  share a temporal group (host and time window) and were drawn from the same
+  template, so this measures every engine against a ground truth that does
+  not depend on a model.
+- "embedding": the lexical clusters against the embedding clusters. This is
+  only meaningful with `--model real` (all-MiniLM-L6-v2); with the default
+  hashing stand-in from benchmarks/encoders.py the "embedding" clusters are
+  themselves lexical.
+
+The generated templates differ in many words, so the suite also triages
+NEAR_MISS_PAIRS, pairs of messages on one host that differ in a single
+meaningful word (failed / restored), and reports how many each engine merged.
+
+Usage:
+    python -m benchmarks.bench_engines --scales 1000 10000 100000 --model real
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# --- Constants ---
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+ENGINES = ["embedding", "lexical", "template"]
+# Messages that must not share a cluster although they differ in one word only.
+NEAR_MISS_PAIRS = [
+    ("Database connection failed for user admin", "Database connection restored for user admin"),
+    ("Backup job completed for volume data", "Backup job failed for volume data"),
+    ("Service nginx restarted successfully on node", "Service nginx stopped successfully on node"),
+    ("Replication to the standby database is healthy", "Replication to the standby database is broken"),
+    ("Disk array controller battery is charging", "Disk array controller battery is failing"),
+]
+
+
+def cluster_labels(response) -> Dict[str, int]:
+    """Maps the id of every clustered alert to the index of its cluster."""
+    return {alert.id: index for index, cluster in enumerate(response.clusters) for alert in cluster.alerts}
+
+
+def _pairs(counts: np.ndarray) -> int:
+    return int((counts * (counts - 1) // 2).sum())
+
+
+def pair_agreement(reference: Dict[str, int], candidate: Dict[str, int]) -> Dict[str, float]:
+    """
+    Pairwise precision and recall of `candidate` against `reference`, over the
+    alerts labelled by both.
+    """
+    ids = [alert_id for alert_id in reference if alert_id in candidate]
+    ref = np.array([reference[alert_id] for alert_id in ids], dtype=np.int64)
+    cand = np.array([candidate[alert_id] for alert_id in ids], dtype=np.int64)
+    both = ref * (int(cand.max(initial=0)) + 1) + cand
+    together = _pairs(np.unique(both, return_counts=True)[1])
+    ref_pairs = _pairs(np.unique(ref, return_counts=True)[1])
+    cand_pairs = _pairs(np.unique(cand, return_counts=True)[1])
+    return {
+        "precision": together / cand_pairs if cand_pairs else 1.0,
+        "recall": together / ref_pairs if ref_pairs else 1.0,
+    }
+
+
+def truth_labels(alerts, template_ids: List[int]) -> Dict[str, int]:
+    """
+    Labels every clustered alert with its ground-truth cluster: its temporal
+    group (as partitioned by the pipeline) and the template it was drawn from.
+    """
+    from datetime import timedelta
+
+    from agents import triage_agent
+    from agents.columnar import AlertColumns
+
+    _, group_rows = AlertColumns(alerts).partition(
+        triage_agent.CRITICAL_SEVERITY_THRESHOLD, timedelta(minutes=triage_agent.TIME_WINDOW_MINUTES)
+    )
+    templates = max(template_ids, default=0) + 1
+    return {
+        alerts[row].id: group * templates + template_ids[row]
+        for group, (_, rows) in enumerate(group_rows)
+        for row in rows.tolist()
+    }
+
+
+def near_miss_merges(engine: str) -> int:
+    """How many of NEAR_MISS_PAIRS `engine` puts into one cluster."""
+    from datetime import datetime, timezone
+
+    from agents import triage_agent
+    from models.models import Alert
+
+    now = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    alerts = [
+        Alert(id=f"{i}-{side}", host=f"host-{i}", timestamp=now, severity=5, message=message)
+        for i, pair in enumerate(NEAR_MISS_PAIRS)
+        for side, message in enumerate(pair)
+    ]
+    response = triage_agent.process_alert_triage(alerts, engine=engine)
+    return sum(1 for cluster in response.clusters if cluster.count == 2)
+
+
+def run_scale(alert_count: int, repeats: int, model: str, burst_shape: str, seed: int) -> dict:
+    """Triages one workload with every engine and compares the results."""
+    from agents import triage_agent
+    from agents.embedding_cache import EmbeddingCache
+    from benchmarks.encoders import load_model
+    from benchmarks.generator import WorkloadSpec, generate_alerts, generate_labelled_alerts
+
+    triage_agent.model_manager.set_model(load_model(model))
+    alerts, template_ids = generate_labelled_alerts(WorkloadSpec(alerts=alert_count, burst_shape=burst_shape, seed=seed))
+    warm_up = generate_alerts(WorkloadSpec(alerts=200, seed=seed + 1))
+    truth = truth_labels(alerts, template_ids)
+
+    result = {"alerts": alert_count, "seconds": {}, "clusters": {}, "truth": {}}
+    responses = {}
+    for engine in ENGINES:
+        triage_agent.process_alert_triage(warm_up, engine=engine)
+        times = []
+        for _ in range(repeats):
+            triage_agent.embedding_cache = EmbeddingCache(max_entries=triage_agent.EMBEDDING_CACHE_SIZE)
+            started = time.perf_counter()
+            responses[engine] = triage_agent.process_alert_triage(alerts, engine=engine)
+            times.append(time.perf_counter() - started)
+        result["seconds"][engine] = float(np.median(times))
+        result["clusters"][engine] = len(responses[engine].clusters)
+        result["truth"][engine] = pair_agreement(truth, cluster_labels(responses[engine]))
+    result.update(pair_agreement(cluster_labels(responses["embedding"]), cluster_labels(responses["lexical"])))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--model", choices=["hashing", "real"], default="hashing")
+    parser.add_argument("--burst-shape", default="steady")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results: List[dict] = [
+        run_scale(scale, args.repeats, args.model, args.burst_shape, args.seed) for scale in args.scales
+    ]
+    near_misses = {engine: near_miss_merges(engine) for engine in ENGINES}
+    if args.json:
+        print(json.dumps({"model": args.model, "results": results, "near_miss_merges": near_misses}, indent=2))
+        return
+    print(f"{'alerts':>10}{'engine':>11}{'seconds':>9}{'clusters':>10}{'truth P':>9}{'truth R':>9}")
+    for r in results:
+        for engine in ENGINES:
+            truth = r["truth"][engine]
+            print(
+                f"{r['alerts']:>10,}{engine:>11}{r['seconds'][engine]:>9.3f}{r['clusters'][engine]:>10}"
+                f"{truth['precision']:>9.3f}{truth['recall']:>9.3f}"
+            )
+        print(f"{'':>10}{'lexical vs embedding: precision':>41} {r['precision']:.3f}, recall {r['recall']:.3f}")
+    merged = ", ".join(f"{engine} {count}" for engine, count in near_misses.items())
+    print(f"Near-miss pairs merged (of {len(NEAR_MISS_PAIRS)}): {merged}")
+    if args.model != "real":
+        print("With the hashing stand-in, embedding figures and lexical-vs-embedding agreement "
+              "describe the stand-in, not all-MiniLM-L6-v2; use --model real.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+benchmarks/bench_model_backends.py
+
+Compares the embedding model backends of the triage agent on CPU.
+
+For every backend it reports load time, warm-up time, encode latency for a
+batch of alert messages, and the process's peak RSS growth. Each backend's
+embeddings are compared with the float32 "torch" backend:
+- the minimum and mean cosine similarity between the two embeddings of each message,
+- the fraction of message pairs on the same side of the clustering threshold.
+
+Each backend runs in a fresh subprocess so load time and memory are not
+shared between them.
+
+Usage:
+    python -m benchmarks.bench_model_backends --backends torch torch-int8 onnx onnx-int8
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MESSAGES = [
+    "High CPU utilization at {n}%.",
+    "CPU utilization is very high, reached {n}%.",
+    "Low disk space on /var/log, {n}% used.",
+    "Disk space is running low on /data.",
+    "User login failed from IP 10.0.{n}.4",
+    "Service nginx restarted successfully.",
+    "Memory usage above threshold: {n} MB free.",
+    "Connection to database timed out after {n} ms.",
+    "Backup job {n} completed.",
+    "SSL certificate expires in {n} days.",
+]
+
+
+def _messages(count: int) -> list:
+    return [MESSAGES[i % len(MESSAGES)].format(n=i % 97) for i in range(count)]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend: str, model_name: str, count: int, repeats: int, output: str) -> None:
+    """Measures one backend in this process and saves its embeddings to `output`."""
+    from agents.model_manager import ModelManager, load_sentence_transformer
+
+    rss_before = _peak_rss_mb()
+    manager = ModelManager(lambda: load_sentence_transformer(model_name, backend=backend))
+    started = time.perf_counter()
+    if manager.load() is None:
+        print(json.dumps({"backend": backend, "error": manager.error}))
+        return
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    manager.warm_up()
+    warm_up_seconds = time.perf_counter() - started
+
+    messages = _messages(count)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        embeddings = manager.model.encode(messages, batch_size=64)
+        timings.append(time.perf_counter() - started)
+    np.save(output, np.asarray(embeddings, dtype=np.float32))
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_seconds,
+        "warm_up_s": warm_up_seconds,
+        "encode_p50_s": float(np.median(timings)),
+        "rss_mb": _peak_rss_mb() - rss_before,
+    }))
+
+
+def _normalized(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.80)
+    parser.add_argument("--run-backend", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_backend:
+        run_backend(args.run_backend, args.model, args.messages, args.repeats, args.output)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results, embeddings = {}, {}
+    for backend in backends:
+        output = f"/tmp/triage-embeddings-{backend}.npy"
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_model_backends", "--run-backend", backend,
+             "--model", args.model, "--messages", str(args.messages), "--repeats", str(args.repeats),
+             "--output", output],
+            capture_output=True, text=True,
+        )
+        lines = completed.stdout.strip().splitlines()
+        results[backend] = json.loads(lines[-1]) if lines else {"error": completed.stderr.strip()[-200:]}
+        if "error" not in results[backend]:
+            embeddings[backend] = _normalized(np.load(output))
+
+    print(f"{'backend':<12}{'load s':>8}{'warm s':>8}{'p50 ms':>9}{'msg/s':>9}{'rss MB':>8}"
+          f"{'min cos':>9}{'mean cos':>10}{'agree':>8}")
+    reference = embeddings.get("torch")
+    for backend in backends:
+        result = results[backend]
+        if "error" in result:
+            print(f"{backend:<12}error: {result['error']}")
+            continue
+        agreement = ""
+        if reference is not None:
+            cosine = np.sum(reference * embeddings[backend], axis=1)
+            same_side = (reference @ reference.T >= args.threshold) == (
+                embeddings[backend] @ embeddings[backend].T >= args.threshold
+            )
+            agreement = f"{cosine.min():>9.4f}{cosine.mean():>10.4f}{same_side.mean():>8.4f}"
+        p50 = result["encode_p50_s"]
+        print(f"{backend:<12}{result['load_s']:>8.2f}{result['warm_up_s']:>8.2f}{p50 * 1000:>9.1f}"
+              f"{args.messages / p50:>9,.0f}{result['rss_mb']:>8.0f}{agreement}")
+
+
+if __name__ == "__main__":
+    main()
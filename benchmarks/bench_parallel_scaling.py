@@ -0,0 +1,108 @@
+"""
+benchmarks/bench_parallel_scaling.py
+
+Scaling benchmark for parallel triage across host shards.
+
+Runs `process_alert_triage` on a synthetic many-host workload with 1, 2, 4 and
+8 worker processes and reports wall time, throughput and speedup over the
+single-process path. Pool start-up (spawning workers and loading the model) is
+measured separately, since it is paid once per process rather than per request.
+
+By default a hashing stand-in with a simulated CPU cost per message replaces
+the transformer; pass `--model real` to use all-MiniLM-L6-v2.
+
+Usage:
+    python -m benchmarks.bench_parallel_scaling --hosts 2000 --alerts-per-host 20
+"""
+import argparse
+import functools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import numpy as np
+
+from agents import triage_agent
+from agents.parallel import ParallelTriageExecutor
+from benchmarks.encoders import HashingEmbeddingModel, load_model
+from models.models import Alert
+
+WORDS = [f"{a}{b}" for a in ("disk", "cpu", "mem", "net", "io", "svc", "db", "api") for b in ("load", "error", "latency", "drop", "spike", "queue", "retry", "lag")]
+
+
+def many_host_workload(hosts: int, alerts_per_host: int, seed: int) -> List[Alert]:
+    """Alerts spread over `hosts` hosts, each host with a few recurring message shapes."""
+    rng = random.Random(seed)
+    base_time = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    alerts = []
+    for h in range(hosts):
+        shapes = [" ".join(rng.sample(WORDS, 3)) for _ in range(4)]
+        for i in range(alerts_per_host):
+            alerts.append(Alert(
+                host=f"host-{h:05d}",
+                timestamp=base_time + timedelta(seconds=rng.randrange(0, 3600)),
+                severity=rng.randint(1, 7),
+                message=f"{rng.choice(shapes)} at {rng.randint(50, 99)}%",
+            ))
+    return alerts
+
+
+class BusyHashingEmbeddingModel(HashingEmbeddingModel):
+    """Burns CPU (rather than sleeping) for the simulated per-message cost."""
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, **kwargs):
+        deadline = time.perf_counter() + self.seconds_per_message * len(sentences)
+        while time.perf_counter() < deadline:
+            pass
+        return HashingEmbeddingModel(self.dimension).encode(sentences)
+
+
+def build_model(name: str, seconds_per_message: float):
+    if name == "real":
+        return load_model("real")
+    return BusyHashingEmbeddingModel(seconds_per_message=seconds_per_message)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--alerts-per-host", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--model", choices=["hashing", "real"], default="hashing")
+    parser.add_argument("--seconds-per-message", type=float, default=0.0005,
+                        help="Simulated CPU cost per embedded message for the hashing model")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    factory = functools.partial(build_model, args.model, args.seconds_per_message)
+    triage_agent.model_manager.set_model(factory())
+    alert_count = args.hosts * args.alerts_per_host
+    print(f"{args.hosts} hosts, {alert_count} alerts, model={args.model}")
+    print(f"{'workers':>8}{'startup s':>11}{'p50 s':>9}{'alerts/s':>12}{'speedup':>9}")
+
+    baseline = None
+    for workers in args.workers:
+        executor = ParallelTriageExecutor(workers=workers, min_groups=1, model_factory=factory)
+        triage_agent.parallel_triage = executor
+        started = time.perf_counter()
+        # Warm-up on a separate workload: spawns the pool and loads the model in every worker.
+        triage_agent.process_alert_triage(many_host_workload(workers * 8, 2, seed=-1))
+        startup = time.perf_counter() - started
+
+        timings = []
+        for repeat in range(args.repeats):
+            # A fresh seed per run keeps the embedding caches from answering everything.
+            alerts = many_host_workload(args.hosts, args.alerts_per_host, seed=workers * 100 + repeat)
+            started = time.perf_counter()
+            triage_agent.process_alert_triage(alerts)
+            timings.append(time.perf_counter() - started)
+        executor.shutdown()
+
+        p50 = float(np.median(timings))
+        baseline = baseline or p50
+        print(f"{workers:>8}{startup:>11.2f}{p50:>9.3f}{alert_count / p50:>12,.0f}{baseline / p50:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
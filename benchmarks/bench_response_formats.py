@@ -0,0 +1,103 @@
+"""
+benchmarks/bench_response_formats.py
+
+Compares the size and serialization time of the triage response formats.
+
+The "full" baseline goes through FastAPI's `response_model=TriageResponse`
+path, exactly as `/agents/triage` does today; "compact" and "columnar" go
+through `render_triage_response`. No embedding model is needed: a synthetic
+TriageResponse is built directly.
+
+Usage:
+    python -m benchmarks.bench_response_formats --alerts 50000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.response_formats import render_triage_response
+from models.models import Alert, AlertCluster, TriageResponse
+
+
+def build_response(alert_count: int, cluster_size: int = 20) -> (TriageResponse, List[Alert]):
+    """A synthetic triage result: clusters of `cluster_size` alerts, plus 1% critical alerts."""
+    base_time = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    alerts = [
+        Alert(
+            host=f"host-{i // 200:04d}",
+            timestamp=base_time + timedelta(seconds=i),
+            severity=9 if i % 100 == 0 else 5,
+            message=f"High CPU utilization at {50 + i % 50}%.",
+        )
+        for i in range(alert_count)
+    ]
+    critical = [a for a in alerts if a.severity >= 8]
+    non_critical = [a for a in alerts if a.severity < 8]
+    clusters = []
+    for start in range(0, len(non_critical), cluster_size):
+        members = non_critical[start:start + cluster_size]
+        clusters.append(AlertCluster(
+            host=members[0].host,
+            start_time=members[0].timestamp,
+            end_time=members[-1].timestamp,
+            alerts=members,
+            representative_message=members[0].message,
+            count=len(members),
+        ))
+    return TriageResponse(clusters=clusters, critical_alerts=critical), alerts
+
+
+def build_app(response: TriageResponse, alerts: List[Alert]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/full", response_model=TriageResponse)
+    async def full():
+        return response
+
+    @app.get("/compact")
+    async def compact():
+        return render_triage_response(response, "compact", alerts)
+
+    @app.get("/columnar")
+    async def columnar():
+        return render_triage_response(response, "columnar", alerts)
+
+    return app
+
+
+def run(alert_count: int, repeats: int) -> dict:
+    response, alerts = build_response(alert_count)
+    client = TestClient(build_app(response, alerts))
+    results = {}
+    for response_format in ("full", "compact", "columnar"):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            body = client.get(f"/{response_format}").content
+            timings.append(time.perf_counter() - started)
+        results[response_format] = {"bytes": len(body), "seconds": min(timings)}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=50000, help="Number of alerts in the response")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per format; the fastest is reported")
+    args = parser.parse_args()
+
+    results = run(args.alerts, args.repeats)
+    baseline = results["full"]
+    print(f"{'format':<10}{'bytes':>14}{'seconds':>10}{'size':>8}{'speedup':>9}")
+    for response_format, result in results.items():
+        print(
+            f"{response_format:<10}{result['bytes']:>14,}{result['seconds']:>10.3f}"
+            f"{result['bytes'] / baseline['bytes']:>8.2f}{baseline['seconds'] / result['seconds']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
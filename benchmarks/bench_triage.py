@@ -0,0 +1,182 @@
+"""
+benchmarks/bench_triage.py
+
+End-to-end performance suite for `process_alert_triage`.
+
+For every scale (1k to 1M alerts by default) a workload is generated with
+benchmarks/generator.py and triaged several times, each time with an empty
+embedding cache. The suite records:
+- throughput (alerts per second at the median run) and p50/p99 latency,
+- the median time of each stage as recorded by agents/metrics.py: partition
+  (columnar split by criticality, host and time window), templates (template
+  mining), encode (embedding the template representatives), cluster
+  (similarity clustering) and build (assembling AlertClusters),
+- peak RSS of the process that ran the scale.
+
+Each scale runs in its own subprocess so peak RSS is per scale.
+
+Results can be saved as a baseline and later runs compared against it. The
+suite exits with status 1 when throughput drops, or p99 latency or peak RSS
+grows, by more than the tolerance at any scale present in both. Baselines
+are machine specific: save and compare them on the same hardware.
+
+By default the hashing stand-in from benchmarks/encoders.py replaces the
+transformer, so the suite measures the pipeline rather than model inference;
+pass `--model real` to include all-MiniLM-L6-v2.
+
+Usage:
+    python -m benchmarks.bench_triage --scales 1000 10000 100000 --save-baseline baseline.json
+    python -m benchmarks.bench_triage --scales 1000 10000 100000 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# --- Constants ---
+DEFAULT_SCALES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ["partition", "templates", "encode", "cluster", "build"]
+# Relative change past which a metric counts as a regression.
+DEFAULT_TOLERANCE = 0.25
+
+
+def triage_with_stage_timings(alerts) -> Dict[str, float]:
+    """Runs `process_alert_triage` once and returns its total and per-stage times."""
+    from agents import metrics, triage_agent
+    from agents.embedding_cache import EmbeddingCache
+
+    triage_agent.embedding_cache = EmbeddingCache(max_entries=triage_agent.EMBEDDING_CACHE_SIZE)
+    with metrics.collect_stages() as timings:
+        started = time.perf_counter()
+        triage_agent.process_alert_triage(alerts)
+        total = time.perf_counter() - started
+
+    seconds = timings.seconds if timings is not None else {}  # None with TRIAGE_METRICS=0
+    return {**{stage: seconds.get(stage, 0.0) for stage in STAGES}, "total": total}
+
+
+def run_scale(alert_count: int, repeats: int, model: str, burst_shape: str, seed: int) -> dict:
+    """Generates and triages one scale in this process."""
+    from agents import triage_agent
+    from benchmarks.encoders import load_model
+    from benchmarks.generator import WorkloadSpec, generate_alerts
+
+    triage_agent.model_manager.set_model(load_model(model))
+    alerts = generate_alerts(WorkloadSpec(alerts=alert_count, burst_shape=burst_shape, seed=seed))
+    # Warm-up on a small workload: imports, thread start-up and model initialization.
+    triage_with_stage_timings(generate_alerts(WorkloadSpec(alerts=200, seed=seed + 1)))
+
+    runs = [triage_with_stage_timings(alerts) for _ in range(repeats)]
+    totals = [run["total"] for run in runs]
+    p50 = float(np.percentile(totals, 50))
+    return {
+        "alerts": alert_count,
+        "throughput": alert_count / p50,
+        "p50_s": p50,
+        "p99_s": float(np.percentile(totals, 99)),
+        "stages_s": {stage: float(np.median([run[stage] for run in runs])) for stage in STAGES},
+        # ru_maxrss is in kilobytes on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Returns a description of every metric that regressed past `tolerance`."""
+    baseline_by_scale = {result["alerts"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_scale.get(result["alerts"])
+        if reference is None:
+            continue
+        checks = [
+            ("throughput", result["throughput"] < reference["throughput"] * (1 - tolerance)),
+            ("p99_s", result["p99_s"] > reference["p99_s"] * (1 + tolerance)),
+            ("peak_rss_mb", result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance)),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(
+                    f"{result['alerts']} alerts: {metric} {reference[metric]:.4g} -> {result[metric]:.4g}"
+                )
+    return regressions
+
+
+def _print_results(results: List[dict]) -> None:
+    header = f"{'alerts':>10}{'alerts/s':>12}{'p50 s':>9}{'p99 s':>9}{'rss MB':>8}"
+    print(header + "".join(f"{stage:>11}" for stage in STAGES))
+    for r in results:
+        print(
+            f"{r['alerts']:>10,}{r['throughput']:>12,.0f}{r['p50_s']:>9.3f}{r['p99_s']:>9.3f}{r['peak_rss_mb']:>8.0f}"
+            + "".join(f"{r['stages_s'][stage]:>11.3f}" for stage in STAGES)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--model", choices=["hashing", "real"], default="hashing")
+    parser.add_argument("--burst-shape", default="steady")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Compare against this saved baseline and fail on regressions")
+    parser.add_argument("--save-baseline", help="Save the results as a baseline to this path")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--run-scale", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scale:
+        result = run_scale(args.run_scale, args.repeats, args.model, args.burst_shape, args.seed)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for scale in args.scales:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_triage", "--run-scale", str(scale),
+             "--repeats", str(args.repeats), "--model", args.model,
+             "--burst-shape", args.burst_shape, "--seed", str(args.seed)],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            sys.exit(f"Scale {scale} failed:\n{completed.stderr}")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    _print_results(results)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "model": args.model,
+            "burst_shape": args.burst_shape,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["environment"] != report["environment"]:
+            print(f"Warning: baseline environment differs: {baseline['environment']}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions past {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+benchmarks/encoders.py
+
+A model-free embedding stand-in for benchmarks.
+
+`HashingEmbeddingModel` implements the `encode` call the triage agent makes on
+SentenceTransformer, using normalized bag-of-words hash vectors. It measures
+pipeline overhead (partitioning, templating, clustering, process pools)
+without downloading or running a transformer. An optional per-message cost
+simulates model compute.
+"""
+import hashlib
+import re
+import time
+
+import numpy as np
+
+
+class HashingEmbeddingModel:
+    """Deterministic bag-of-words hash embeddings with an optional simulated cost."""
+
+    def __init__(self, dimension: int = 384, seconds_per_message: float = 0.0):
+        self.dimension = dimension
+        self.seconds_per_message = seconds_per_message
+
+    def _embed(self, message: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"[a-z]+", message.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[index] += 1.0 if digest[4] % 2 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, **kwargs):
+        if self.seconds_per_message:
+            time.sleep(self.seconds_per_message * len(sentences))
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([self._embed(sentence) for sentence in sentences])
+
+
+def load_model(name: str, seconds_per_message: float = 0.0):
+    """Returns the real SentenceTransformer for "real", otherwise a HashingEmbeddingModel."""
+    if name == "real":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer("all-MiniLM-L6-v2")
+    return HashingEmbeddingModel(seconds_per_message=seconds_per_message)
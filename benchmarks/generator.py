@@ -0,0 +1,157 @@
+"""
+benchmarks/generator.py
+
+Seeded generator of realistic alert workloads for benchmarks.
+
+A workload is described by a `WorkloadSpec`:
+- hosts: number of distinct hosts. Host activity is skewed (Zipf-like), so a few
+  noisy hosts produce most alerts, as in real fleets.
+- rate_per_second: mean fleet-wide alert rate, which sets the time span.
+- burst_shape: how arrivals are spread over that span:
+  "steady" (Poisson arrivals), "bursty" (short storms at 20x the rate, quiet
+  in between) or "spike" (a steady background plus one incident that carries
+  half of all alerts within a minute).
+- templates: number of distinct message templates. Every template has variable
+  slots (numbers, IPs, paths, ids) filled per alert, so the number of distinct
+  message strings is much larger than the number of templates.
+- critical_ratio: fraction of alerts with a critical severity.
+
+The same spec and seed always produce the same alerts.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import numpy as np
+
+from models.models import Alert
+
+# --- Constants ---
+BURST_SHAPES = ("steady", "bursty", "spike")
+CRITICAL_SEVERITY = (8, 10)
+NON_CRITICAL_SEVERITY = (1, 7)
+
+# Message skeletons; {n}, {ip}, {path} and {id} are filled per alert.
+SKELETONS = [
+    "High CPU utilization on {component} at {n}%.",
+    "Low disk space on {path}, {n}% used by {component}.",
+    "{component} connection to {ip} timed out after {n} ms.",
+    "User login failed for {component} from IP {ip}",
+    "Service {component} restarted successfully (pid {n}).",
+    "Memory usage of {component} above threshold: {n} MB free.",
+    "{component} request {id} failed with status {n}.",
+    "SSL certificate for {component} expires in {n} days.",
+    "Backup job {id} for {component} completed in {n} s.",
+    "Queue depth of {component} reached {n} messages.",
+    "Replication lag on {component} is {n} seconds.",
+    "Health check for {component} at {ip} returned {n}.",
+]
+COMPONENTS = [
+    "nginx", "postgres", "redis", "kafka", "api-gateway", "auth-service", "billing",
+    "search", "scheduler", "cdn-edge", "payments", "inventory", "mailer", "ldap",
+    "elasticsearch", "rabbitmq", "vault", "consul", "etcd", "haproxy",
+]
+PATHS = ["/var/log", "/data", "/tmp", "/var/lib/postgresql", "/opt/app/cache", "/home"]
+
+
+@dataclass
+class WorkloadSpec:
+    """Parameters of a synthetic alert workload."""
+
+    alerts: int
+    hosts: int = 200
+    rate_per_second: float = 100.0
+    burst_shape: str = "steady"
+    templates: int = 60
+    critical_ratio: float = 0.02
+    seed: int = 0
+
+    def validate(self) -> None:
+        if self.burst_shape not in BURST_SHAPES:
+            raise ValueError(f"Unknown burst shape '{self.burst_shape}'. Choose from: {', '.join(BURST_SHAPES)}.")
+        if self.alerts < 0 or self.hosts < 1 or self.templates < 1 or self.rate_per_second <= 0:
+            raise ValueError("alerts must be >= 0; hosts, templates and rate_per_second must be positive.")
+        if not 0.0 <= self.critical_ratio <= 1.0:
+            raise ValueError("critical_ratio must be between 0 and 1.")
+
+
+def template_texts(count: int) -> List[str]:
+    """The first `count` templates: every skeleton combined with every component."""
+    return [
+        SKELETONS[i % len(SKELETONS)].replace("{component}", COMPONENTS[(i // len(SKELETONS)) % len(COMPONENTS)])
+        for i in range(count)
+    ]
+
+
+def _offsets_seconds(spec: WorkloadSpec, rng: np.random.Generator) -> np.ndarray:
+    """Sorted arrival times in seconds since the start of the workload."""
+    n = spec.alerts
+    duration = n / spec.rate_per_second
+    if spec.burst_shape == "steady":
+        return np.cumsum(rng.exponential(1.0 / spec.rate_per_second, n))
+    if spec.burst_shape == "bursty":
+        # Storms at 20x the mean rate: 1/20 of the time carries all alerts.
+        storm_count = max(1, int(duration / 600))
+        storm_length = duration / 20 / storm_count
+        storm_starts = np.sort(rng.uniform(0, max(duration - storm_length, 0), storm_count))
+        storms = rng.integers(0, storm_count, n)
+        return np.sort(storm_starts[storms] + rng.uniform(0, storm_length, n))
+    # "spike": a steady background plus one incident, a minute long, with half the alerts.
+    incident = rng.random(n) < 0.5
+    times = rng.uniform(0, duration, n)
+    times[incident] = rng.uniform(duration / 2, duration / 2 + 60, int(incident.sum()))
+    return np.sort(times)
+
+
+def _variables(n: int, rng: np.random.Generator) -> zip:
+    """Per-alert values for the {n}, {ip}, {path} and {id} slots, drawn in bulk."""
+    numbers = rng.integers(1, 1000, n).tolist()
+    octets = rng.integers(1, 255, (n, 3)).tolist()
+    ips = [f"10.{a}.{b}.{c}" for a, b, c in octets]
+    paths = [PATHS[i] for i in rng.integers(0, len(PATHS), n).tolist()]
+    ids = [f"{i:08x}" for i in rng.integers(0, 1 << 32, n).tolist()]
+    return zip(numbers, ips, paths, ids)
+
+
+def generate_alerts(spec: WorkloadSpec, start: datetime = datetime(2025, 11, 1, tzinfo=timezone.utc)) -> List[Alert]:
+    """Generates the alerts of `spec`, sorted by time."""
+    return generate_labelled_alerts(spec, start)[0]
+
+
+def generate_labelled_alerts(
+    spec: WorkloadSpec, start: datetime = datetime(2025, 11, 1, tzinfo=timezone.utc)
+) -> Tuple[List[Alert], List[int]]:
+    """Generates the alerts of `spec` and, for each, the index of the template it was drawn from."""
+    spec.validate()
+    rng = np.random.default_rng(spec.seed)
+    n = spec.alerts
+
+    offsets = _offsets_seconds(spec, rng)
+    # Zipf-like host activity: host k is picked with weight 1 / (k + 1).
+    host_weights = 1.0 / np.arange(1, spec.hosts + 1)
+    host_ids = rng.choice(spec.hosts, n, p=host_weights / host_weights.sum())
+    # Each host mostly emits a handful of templates: its own slice of the template set.
+    per_host = min(spec.templates, 8)
+    template_ids = (host_ids * 7 + rng.integers(0, per_host, n)) % spec.templates
+    critical = rng.random(n) < spec.critical_ratio
+    severities = np.where(
+        critical,
+        rng.integers(CRITICAL_SEVERITY[0], CRITICAL_SEVERITY[1] + 1, n),
+        rng.integers(NON_CRITICAL_SEVERITY[0], NON_CRITICAL_SEVERITY[1] + 1, n),
+    )
+
+    templates = template_texts(spec.templates)
+    host_names = [f"host-{h:05d}" for h in range(spec.hosts)]
+    alerts = [
+        Alert(
+            id=f"alert-{spec.seed}-{i}",
+            host=host_names[host],
+            timestamp=start + timedelta(seconds=offset),
+            severity=severity,
+            message=templates[template].format(n=number, ip=ip, path=path, id=identifier),
+        )
+        for i, (host, offset, severity, template, (number, ip, path, identifier)) in enumerate(zip(
+            host_ids.tolist(), offsets.tolist(), severities.tolist(), template_ids.tolist(), _variables(n, rng)
+        ))
+    ]
+    return alerts, template_ids.tolist()
@@ -0,0 +1,133 @@
+"""
+benchmarks/load_triage.py
+
+Open-loop load test of `/agents/triage` under an alert storm.
+
+Requests arrive at a fixed rate, independent of how fast earlier ones finish,
+as they do from a fleet of alert sources. Most carry a small batch of alerts;
+a share are storm-sized. The app runs in-process behind httpx's ASGI
+transport, with the hashing stand-in from benchmarks/encoders.py charging a
+simulated inference cost per embedded message and the embedding cache
+disabled, so every request pays for inference.
+
+The same arrival schedule is replayed twice:
+- "unbounded": no admission control and no deadline (the previous behaviour),
+- "admission": TRIAGE_MAX_CONCURRENT-style slots, a bounded queue and a
+  per-request deadline sent in the `X-Triage-Deadline-Ms` header.
+
+For each run the suite reports the responses by status, how many were
+degraded to a cheaper engine, and p50/p99 latency of successful responses
+and of all responses (rejections included).
+
+Usage:
+    python -m benchmarks.load_triage --rate 60 --duration 10 --deadline-ms 1000
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+# --- Constants ---
+SMALL_REQUEST_ALERTS = 200
+STORM_REQUEST_ALERTS = 5_000
+
+
+def build_payloads(storm_share: float, count: int, seed: int) -> List[dict]:
+    """`count` request bodies, a `storm_share` of them storm-sized."""
+    from benchmarks.generator import WorkloadSpec, generate_alerts
+
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for i in range(count):
+        size = STORM_REQUEST_ALERTS if rng.random() < storm_share else SMALL_REQUEST_ALERTS
+        alerts = generate_alerts(WorkloadSpec(alerts=size, hosts=50, seed=seed + i))
+        payloads.append({"alerts": [alert.model_dump(mode="json") for alert in alerts]})
+    return payloads
+
+
+async def run_load(
+    app, payloads: List[dict], rate: float, duration: float, deadline_ms: int, response_format: str = "full"
+) -> Dict[str, object]:
+    """Sends `rate` requests per second for `duration` seconds and collects the outcomes."""
+    headers = {"X-Triage-Deadline-Ms": str(deadline_ms)} if deadline_ms else {}
+    params = {"format": response_format}
+    outcomes = []
+
+    async def one(client: httpx.AsyncClient, payload: dict) -> None:
+        started = time.perf_counter()
+        response = await client.post("/agents/triage", json=payload, headers=headers, params=params)
+        degraded = response.status_code == 200 and response.json().get("degraded", False)
+        outcomes.append((response.status_code, degraded, time.perf_counter() - started))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://triage", timeout=None) as client:
+        tasks = []
+        total = int(rate * duration)
+        start = time.perf_counter()
+        for i in range(total):
+            await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(client, payloads[i % len(payloads)])))
+        await asyncio.gather(*tasks)
+
+    statuses: Dict[int, int] = {}
+    for status, _, _ in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+    ok = [seconds for status, _, seconds in outcomes if status == 200]
+    every = [seconds for _, _, seconds in outcomes]
+    return {
+        "requests": len(outcomes),
+        "statuses": statuses,
+        "degraded": sum(degraded for _, degraded, _ in outcomes),
+        "ok_p50_s": float(np.percentile(ok, 50)) if ok else None,
+        "ok_p99_s": float(np.percentile(ok, 99)) if ok else None,
+        "all_p99_s": float(np.percentile(every, 99)) if every else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=40.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals")
+    parser.add_argument("--storm-share", type=float, default=0.1, help="Share of storm-sized requests")
+    parser.add_argument("--seconds-per-message", type=float, default=0.0005,
+                        help="Simulated inference cost per embedded message")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=16)
+    parser.add_argument("--deadline-ms", type=int, default=1000)
+    parser.add_argument("--format", default="full", help="Response format requested by the clients")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from agents import triage_agent
+    from agents.admission import AdmissionController, CostModel
+    from agents.embedding_cache import EmbeddingCache
+    from benchmarks.encoders import load_model
+    from main import app
+
+    triage_agent.model_manager.set_model(load_model("hashing", seconds_per_message=args.seconds_per_message))
+    triage_agent.embedding_cache = EmbeddingCache(max_entries=0)
+    payloads = build_payloads(args.storm_share, 20, args.seed)
+
+    configurations = {
+        "unbounded": (AdmissionController(max_concurrent=0, max_queued=0), 0),
+        "admission": (AdmissionController(args.max_concurrent, args.max_queued), args.deadline_ms),
+    }
+    print(f"{'run':>10}{'requests':>10}{'200':>6}{'429':>6}{'503':>6}{'degraded':>10}"
+          f"{'ok p50 s':>10}{'ok p99 s':>10}{'all p99 s':>11}")
+    for name, (controller, deadline_ms) in configurations.items():
+        triage_agent.admission = controller
+        triage_agent.cost_model = CostModel(priors=triage_agent.ENGINE_COST_PRIORS)
+        result = asyncio.run(run_load(app, payloads, args.rate, args.duration, deadline_ms, args.format))
+        statuses = result["statuses"]
+        print(
+            f"{name:>10}{result['requests']:>10}{statuses.get(200, 0):>6}{statuses.get(429, 0):>6}"
+            f"{statuses.get(503, 0):>6}{result['degraded']:>10}"
+            f"{result['ok_p50_s'] or 0:>10.3f}{result['ok_p99_s'] or 0:>10.3f}{result['all_p99_s'] or 0:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,44 @@ This is the main entry point for the FastAPI application.
 It creates the FastAPI app instance and includes the routers from the agent modules.
 Person 4 (Coordinator) will later add other agents' routers to this file.
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from agents import triage_agent
+from fastapi.responses import JSONResponse, PlainTextResponse
+from agents import metrics, triage_agent
+from agents.admission import AdmissionMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts loading the agents' models without blocking startup (unless
+    TRIAGE_MODEL_LOADING=eager), and stops their worker threads and pools on shutdown.
+    """
+    triage_agent.startup()
+    yield
+    triage_agent.shutdown()
+
 
 # Create the main FastAPI application instance
 app = FastAPI(
     title="SuperHack 2025 - AI Agent Co-Pilot",
     description="An AI-powered system to automate IT management tasks like alert triage and patch management.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Per-request stage timings and latency histograms; skipped entirely when TRIAGE_METRICS=0.
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.RequestTimingMiddleware)
+
+# Requests that would find the triage queue full are rejected before their body is read.
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=lambda: triage_agent.admission,
+    paths=triage_agent.ADMITTED_PATHS,
+    retry_after=triage_agent.RETRY_AFTER_SECONDS,
+    on_reject=metrics.record_rejection,
 )
 
 # Include the router from the Triage Agent.
@@ -25,3 +55,28 @@ async def read_root():
     A simple health check endpoint to confirm the API is running.
     """
     return {"status": "ok", "message": "AI Agent Service is running."}
+
+@app.get("/health/ready", tags=["Health Check"])
+async def read_readiness():
+    """
+    Readiness check: 200 once the embedding model is loaded, 503 while it is
+    still loading or if loading failed. A failed load is retried in the background
+    by the first check (or request) after `model.retry_in_seconds`, with
+    exponential backoff, so the service recovers without a restart. The root
+    endpoint only reports liveness.
+    """
+    triage_agent.model_manager.retry_in_background()
+    model_status = triage_agent.model_manager.status()
+    return JSONResponse(
+        status_code=200 if model_status["ready"] else 503,
+        content={"status": "ready" if model_status["ready"] else "not_ready", "model": model_status},
+    )
+
+
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+async def read_metrics():
+    """
+    Prometheus metrics: per-stage triage histograms, request latency, and
+    counters of alerts, clusters and temporal groups processed.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
@@ -5,7 +5,7 @@ Defines the Pydantic data models for API requests and responses.
 These models ensure type safety and data validation across the application.
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
 
@@ -41,11 +41,25 @@ class AlertCluster(BaseModel):
     representative_message: str = Field(..., description="A message that summarizes the alerts in the cluster (typically the first message).")
     count: int = Field(..., description="The total number of alerts in the cluster.")
 
+class FleetIncident(BaseModel):
+    """
+    Clusters on different hosts with similar messages in overlapping time
+    windows, e.g. one bad deploy alerting across the fleet.
+    """
+    incident_id: str = Field(default_factory=lambda: f"incident-{uuid.uuid4()}")
+    representative_message: str = Field(..., description="The representative message of the incident's first cluster.")
+    start_time: datetime = Field(..., description="Timestamp of the first alert in the incident.")
+    end_time: datetime = Field(..., description="Timestamp of the last alert in the incident.")
+    hosts: List[str] = Field(..., description="The hosts with a cluster in the incident.")
+    cluster_indices: List[int] = Field(..., description="Indices of the incident's clusters in the response's `clusters`.")
+    alert_count: int = Field(..., description="The total number of alerts in the incident's clusters.")
+
 class TriageRequest(BaseModel):
     """
     The request body for the /agents/triage endpoint.
     """
     alerts: List[Alert]
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Time budget of the request in milliseconds.")
 
 class TriageResponse(BaseModel):
     """
@@ -53,4 +67,56 @@ class TriageResponse(BaseModel):
     the clustered alerts and any identified critical alerts.
     """
     clusters: List[AlertCluster] = Field(..., description="A list of alert clusters created from the raw alerts.")
-    critical_alerts: List[Alert] = Field(..., description="A list of standalone alerts marked as critical.")
\ No newline at end of file
+    critical_alerts: List[Alert] = Field(..., description="A list of standalone alerts marked as critical.")
+    engine: Optional[str] = Field(None, description="Clustering engine that produced the clusters: embedding, lexical or template.")
+    incidents: Optional[List[FleetIncident]] = Field(None, description="Fleet incidents grouping clusters across hosts, when requested.")
+    degraded: bool = Field(False, description="True when a cheaper engine than requested was used to meet the deadline.")
+
+class CompactAlertCluster(BaseModel):
+    """
+    An AlertCluster that references its alerts by index into the response's
+    shared alert table instead of embedding copies of them.
+    """
+    cluster_id: str
+    host: str
+    start_time: datetime
+    end_time: datetime
+    alert_indices: List[int] = Field(..., description="Indices of the cluster's alerts in the shared alert table.")
+    representative_message: str
+    count: int
+
+class CompactTriageResponse(BaseModel):
+    """
+    Compact response shape (`format=compact`): each alert appears once as a row
+    of `alert_fields` values, and clusters and critical alerts refer to rows by index.
+    """
+    alert_fields: List[str] = Field(..., description="Field names, in the order used by every row of `alerts`.")
+    alerts: List[Tuple[str, str, datetime, int, str]] = Field(..., description="The shared alert table, one row per alert.")
+    clusters: List[CompactAlertCluster]
+    critical_alert_indices: List[int]
+    engine: Optional[str] = None
+    incidents: Optional[List[FleetIncident]] = None
+    degraded: bool = False
+
+class ColumnarAlerts(BaseModel):
+    """
+    The shared alert table as parallel arrays; position i of every array
+    describes alert i.
+    """
+    id: List[str]
+    host: List[str]
+    timestamp: List[datetime]
+    severity: List[int]
+    message: List[str]
+
+class ColumnarTriageResponse(BaseModel):
+    """
+    Columnar response shape (`format=columnar`): the alert table is stored as
+    parallel arrays, and clusters and critical alerts refer to positions in them.
+    """
+    alerts: ColumnarAlerts
+    clusters: List[CompactAlertCluster]
+    critical_alert_indices: List[int]
+    engine: Optional[str] = None
+    incidents: Optional[List[FleetIncident]] = None
+    degraded: bool = False
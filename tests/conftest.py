@@ -0,0 +1,92 @@
+import hashlib
+import re
+import time
+# Import UTC for timezone-aware datetimes
+from datetime import datetime, timedelta, UTC
+
+import numpy as np
+import pytest
+import torch
+
+from agents import triage_agent
+from agents.embedding_cache import EmbeddingCache
+from agents.model_manager import READY
+from models.models import Alert
+
+
+class FakeEmbeddingModel:
+    """
+    A deterministic stand-in for SentenceTransformer used by tests that exercise
+    the pipeline rather than embedding quality.
+
+    Messages are embedded as normalized bag-of-words hash vectors, so identical
+    word sets are identical vectors and unrelated messages are near-orthogonal.
+    `per_batch_overhead` simulates the fixed cost of one forward pass.
+    """
+
+    dimension = 64
+
+    def __init__(self, per_batch_overhead: float = 0.0):
+        self.per_batch_overhead = per_batch_overhead
+        self.encode_calls = 0
+        self.encoded_messages = 0
+
+    def _embed(self, message: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"[a-z]+", message.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[digest[0] % self.dimension] += 1.0 if digest[1] % 2 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, batch_size=32, convert_to_tensor=False, **kwargs):
+        self.encode_calls += 1
+        self.encoded_messages += len(sentences)
+        for _ in range(0, max(len(sentences), 1), batch_size):
+            if self.per_batch_overhead:
+                time.sleep(self.per_batch_overhead)
+        matrix = np.stack([self._embed(s) for s in sentences]) if sentences else np.zeros((0, self.dimension), dtype=np.float32)
+        return torch.from_numpy(matrix) if convert_to_tensor else matrix
+
+
+@pytest.fixture
+def fake_model(monkeypatch) -> FakeEmbeddingModel:
+    """Replaces the triage agent's embedding model with a FakeEmbeddingModel."""
+    model = FakeEmbeddingModel()
+    install_fake_model(monkeypatch, model)
+    return model
+
+
+def install_fake_model(monkeypatch, model: FakeEmbeddingModel) -> None:
+    """Installs `model` with an empty embedding cache so no test sees another's entries."""
+    monkeypatch.setattr(triage_agent.model_manager, "model", model)
+    monkeypatch.setattr(triage_agent.model_manager, "state", READY)
+    monkeypatch.setattr(triage_agent, "embedding_cache", EmbeddingCache())
+
+
+# --- Test Data Fixtures ---
+
+@pytest.fixture
+def sample_alerts() -> list[Alert]:
+    """Provides a list of sample alerts for testing various scenarios."""
+    # FIX: Use datetime.now(UTC) instead of the deprecated utcnow()
+    base_time = datetime.now(UTC)
+    return [
+        # --- Cluster 1 (db-01, High CPU) --- should form one cluster
+        Alert(host="server-db-01", timestamp=base_time, severity=7, message="High CPU utilization at 95%."),
+        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=1), severity=7, message="CPU utilization is very high, reached 96%."),
+        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=2), severity=7, message="Warning: CPU usage remains high at 94%."),
+        
+        # --- Cluster 2 (web-01, Disk Space) --- should form another cluster
+        Alert(host="server-web-01", timestamp=base_time + timedelta(minutes=5), severity=6, message="Low disk space on /var/log."),
+        Alert(host="server-web-01", timestamp=base_time + timedelta(minutes=6), severity=6, message="Disk space is running low on /var/log."),
+
+        # --- Critical Alert (db-01) --- should be identified as critical
+        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=3), severity=9, message="CRITICAL: Database connection failed."),
+
+        # --- Isolated Alert (far in time) --- should be its own cluster
+        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=30), severity=5, message="Service restarted successfully."),
+        
+        # --- Unrelated Alert (different host) --- should be its own cluster
+        Alert(host="server-app-01", timestamp=base_time, severity=4, message="User login failed from IP 1.2.3.4")
+    ]
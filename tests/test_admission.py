@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents import triage_agent
+from agents.admission import AdmissionController, CostModel, Overloaded
+from main import app
+
+client = TestClient(app)
+
+
+def _payload(alerts, **fields):
+    return {"alerts": [alert.model_dump(mode="json") for alert in alerts], **fields}
+
+
+def test_admission_caps_concurrency_and_hands_slots_over_in_order():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=2, max_queued=10)
+        running, peak, order = 0, 0, []
+
+        async def job(name):
+            nonlocal running, peak
+            async with controller.admit():
+                running += 1
+                peak = max(peak, running)
+                order.append(name)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job(i) for i in range(6)))
+        return peak, order, controller.running, controller.queued
+
+    peak, order, running, queued = asyncio.run(scenario())
+    assert peak == 2
+    assert order == list(range(6))
+    assert (running, queued) == (0, 0)
+
+
+def test_admission_rejects_when_queue_is_full_or_deadline_passes():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with controller.admit():
+                await release.wait()
+
+        task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(controller.admit(deadline=time.monotonic() + 0.05).__aenter__())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as full:
+            async with controller.admit():
+                pass
+        with pytest.raises(Overloaded) as late:
+            await queued
+        release.set()
+        await task
+        return full.value.reason, late.value.reason, controller.running, controller.queued
+
+    assert asyncio.run(scenario()) == ("queue_full", "deadline", 0, 0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cost_model_starts_from_priors_and_follows_observations():
+    clock = FakeClock()
+    model = CostModel(priors={"embedding": 1e-3}, smoothing=0.5, clock=clock)
+    assert model.projected("embedding", 1000) == pytest.approx(1.0)
+
+    model.observe("embedding", 1000, 0.1)
+    model.observe("embedding", 1000, 0.3)
+
+    # Blended with the prior: 1.0 -> 0.55 -> 0.425.
+    assert model.projected("embedding", 1000) == pytest.approx(0.425)
+    clock.now = 10 * model.decay_seconds
+    assert model.projected("embedding", 1000) == pytest.approx(1.0, rel=1e-3)
+
+
+def test_degradation_recovers_after_a_single_slow_outlier(monkeypatch):
+    clock = FakeClock()
+    model = CostModel(priors={"embedding": 1e-4, "lexical": 1e-6, "template": 1e-7}, clock=clock)
+    monkeypatch.setattr(triage_agent, "cost_model", model)
+
+    def engine_for(alerts):
+        return triage_agent._affordable_engine("embedding", alerts, time.monotonic() + 1.0)
+
+    # One request took a full second per alert: the estimate moves by a bounded step only.
+    model.observe("embedding", 8, 8.0)
+    assert engine_for(1000) == "embedding"
+
+    # A sustained slowdown does degrade, until the decayed estimate or a probe says otherwise.
+    for _ in range(5):
+        model.observe("embedding", 8, 8.0)
+    assert engine_for(1000) == "lexical"
+    clock.now += model.probe_interval
+    assert engine_for(1000) == "embedding"  # The probe.
+    assert engine_for(1000) == "lexical"
+    clock.now += 10 * model.decay_seconds
+    assert engine_for(1000) == "embedding"
+
+
+def test_triage_degrades_to_a_cheaper_engine_to_meet_the_deadline(fake_model, sample_alerts, monkeypatch):
+    monkeypatch.setattr(triage_agent, "cost_model", CostModel(
+        priors={"embedding": 10.0, "lexical": 1e-6, "template": 1e-7}
+    ))
+
+    rushed = triage_agent.process_alert_triage(sample_alerts, engine="embedding", deadline=time.monotonic() + 1.0)
+    relaxed = triage_agent.process_alert_triage(sample_alerts, engine="embedding")
+
+    assert (rushed.engine, rushed.degraded) == ("lexical", True)
+    assert (relaxed.engine, relaxed.degraded) == ("embedding", False)
+
+
+def test_triage_falls_back_to_templates_when_nothing_fits(fake_model, sample_alerts, monkeypatch):
+    monkeypatch.setattr(triage_agent, "cost_model", CostModel(
+        priors={"embedding": 10.0, "lexical": 10.0, "template": 10.0}
+    ))
+
+    response = triage_agent.process_alert_triage(sample_alerts, engine="embedding", deadline=time.monotonic() + 0.1)
+
+    assert (response.engine, response.degraded) == ("template", True)
+    assert sum(cluster.count for cluster in response.clusters) == len(sample_alerts) - 1
+
+
+def test_deadline_is_read_from_the_header_or_the_body(fake_model, sample_alerts, monkeypatch):
+    monkeypatch.setattr(triage_agent, "cost_model", CostModel(
+        priors={"embedding": 10.0, "lexical": 1e-6, "template": 1e-7}
+    ))
+
+    from_header = client.post("/agents/triage", json=_payload(sample_alerts), headers={"X-Triage-Deadline-Ms": "500"})
+    from_body = client.post("/agents/triage", json=_payload(sample_alerts, deadline_ms=500), params={"format": "compact"})
+
+    assert from_header.json()["degraded"] is True
+    assert from_body.json()["degraded"] is True
+    assert from_body.json()["engine"] == "lexical"
+
+
+def _ndjson_body(alerts) -> bytes:
+    return b"".join(alert.model_dump_json().encode("utf-8") + b"\n" for alert in alerts)
+
+
+@pytest.mark.parametrize("path", triage_agent.ADMITTED_PATHS)
+def test_full_queue_is_rejected_with_429(fake_model, sample_alerts, monkeypatch, path):
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    controller.running = 1  # The only slot is taken.
+    monkeypatch.setattr(triage_agent, "admission", controller)
+
+    if path.endswith("/ndjson"):
+        response = client.post(path, content=_ndjson_body(sample_alerts), headers={"Content-Type": "application/x-ndjson"})
+    else:
+        response = client.post(path, json=_payload(sample_alerts))
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(triage_agent.RETRY_AFTER_SECONDS)
+
+
+def test_ndjson_and_ingest_hold_a_slot_until_they_finish(fake_model, sample_alerts, monkeypatch):
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    monkeypatch.setattr(triage_agent, "admission", controller)
+    acquired = []
+    admit = controller.admit
+
+    def recording_admit(deadline=None):
+        acquired.append(deadline)
+        return admit(deadline)
+
+    monkeypatch.setattr(controller, "admit", recording_admit)
+
+    streamed = client.post(
+        "/agents/triage/ndjson", content=_ndjson_body(sample_alerts), headers={"Content-Type": "application/x-ndjson"}
+    )
+    ingested = client.post("/agents/triage/ingest", json=_payload(sample_alerts))
+    triage_agent.streaming_engine.flush()
+
+    assert streamed.status_code == ingested.status_code == 200
+    assert streamed.text.splitlines()[-1].startswith('{"type":"summary"')
+    assert len(acquired) == 2 and controller.running == 0
@@ -0,0 +1,230 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from agents import triage_agent
+from workers.alert_triage.backend_client import BackendClient, TicketBatcher
+from workers.alert_triage.config import WorkerConfig
+from workers.alert_triage.consumer import PipelinedConsumer
+from workers.alert_triage.local_cloudwatch import InMemoryCloudWatch
+from workers.alert_triage.local_sqs import InMemorySQS
+from workers.alert_triage.test_harness import StubBackend, storm_alerts
+from workers.alert_triage.worker import AlertTriageWorker
+
+from tests.test_alert_triage_worker import SAMPLE_ALERT
+
+
+def _ticket(i, title=None):
+    return {"title": title or f"ticket {i}", "description": "d", "priority": "low"}
+
+
+def _rejects_failures(ticket):
+    return "FAIL" in ticket["title"]
+
+
+@pytest.fixture
+def stub():
+    with StubBackend(fail_ticket=_rejects_failures) as backend:
+        yield backend
+
+
+def test_pooled_client_reuses_a_bounded_number_of_connections(stub):
+    client = BackendClient(stub.url, lambda: "t", pool_size=4)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tickets = list(pool.map(client.create_ticket, [_ticket(i) for i in range(60)]))
+
+    assert len({ticket["id"] for ticket in tickets}) == 60
+    assert stub.requests == 60
+    assert stub.connections <= 4
+
+
+def test_batch_returns_a_result_per_ticket_in_order(stub):
+    client = BackendClient(stub.url, lambda: "t")
+
+    results = client.create_tickets([_ticket(0), _ticket(1, "FAIL me"), _ticket(2)])
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[2].ticket["title"] == "ticket 2"
+    assert stub.requests == 1
+
+
+def test_batch_falls_back_to_single_requests_when_arrays_are_rejected():
+    with StubBackend(reject_arrays=True) as stub:
+        client = BackendClient(stub.url, lambda: "t")
+        first = client.create_tickets([_ticket(0), _ticket(1)])
+        second = client.create_tickets([_ticket(2)])
+
+    assert all(result.ok for result in first + second)
+    assert not client.batch_supported
+    # One rejected array and the empty-array probe, then one request per ticket.
+    assert stub.requests == 1 + 1 + 3
+
+
+def test_batch_over_the_body_limit_is_split_instead_of_failed():
+    with StubBackend(max_body_bytes=400) as stub:
+        client = BackendClient(stub.url, lambda: "t")
+        results = client.create_tickets([_ticket(i) for i in range(8)] + [_ticket(8, "x" * 500)])
+
+    assert [result.ok for result in results] == [True] * 8 + [False]
+    assert [result.ticket["title"] for result in results[:8]] == [f"ticket {i}" for i in range(8)]
+    assert stub.tickets == 8
+    assert client.batch_supported
+
+
+class _ScriptedResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _ScriptedSession:
+    """Answers arrays from a script of statuses, the empty probe array with `probe`, and objects with 200."""
+
+    def __init__(self, array_statuses, probe=200):
+        self.array_statuses = list(array_statuses)
+        self.probe = probe
+        self.posts = []
+
+    def post(self, url, json, headers, timeout):
+        self.posts.append(json)
+        if not isinstance(json, list):
+            return _ScriptedResponse(200, {"id": len(self.posts), **json})
+        if not json:
+            return _ScriptedResponse(self.probe, {"results": []} if self.probe == 200 else {})
+        status = self.array_statuses.pop(0)
+        results = [{"ticket": {"id": i, **ticket}} for i, ticket in enumerate(json)]
+        return _ScriptedResponse(status, {"results": results} if status == 200 else {"error": "nope"})
+
+
+def test_a_rejected_batch_does_not_disable_arrays_when_the_probe_accepts_them():
+    session = _ScriptedSession([422, 404, 200])
+    client = BackendClient("http://backend/api", lambda: "t", session=session)
+
+    for _ in range(3):
+        assert all(result.ok for result in client.create_tickets([_ticket(0), _ticket(1)]))
+
+    assert client.batch_supported
+    # Each refused array is followed by the probe and one request per ticket.
+    assert [len(body) if isinstance(body, list) else "one" for body in session.posts] == [
+        2, 0, "one", "one", 2, 0, "one", "one", 2,
+    ]
+
+
+def test_arrays_are_tried_again_after_the_recheck_interval():
+    session = _ScriptedSession([405, 200])
+    client = BackendClient("http://backend/api", lambda: "t", session=session, recheck_interval=0.05)
+
+    client.create_tickets([_ticket(0)])
+    assert not client.batch_supported
+    time.sleep(0.06)
+    client.create_tickets([_ticket(1), _ticket(2)])
+
+    assert client.batch_supported
+    assert [len(body) if isinstance(body, list) else "one" for body in session.posts] == [1, "one", 2]
+
+
+def test_batcher_groups_concurrent_submissions_and_resolves_each_caller(stub):
+    batcher = TicketBatcher(BackendClient(stub.url, lambda: "t"), batch_size=10, flush_interval=0.05)
+    futures = [batcher.submit(_ticket(i, "FAIL" if i == 7 else None)) for i in range(25)]
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result(timeout=5)["title"])
+        except RuntimeError:
+            outcomes.append(None)
+    batcher.close()
+
+    assert outcomes[7] is None
+    assert outcomes[:3] == ["ticket 0", "ticket 1", "ticket 2"]
+    assert batcher.batches == stub.requests <= 4
+
+
+def _config(stub, **overrides):
+    base, route = stub.url.split("/api")
+    return WorkerConfig(
+        sqs_queue_url="local", backend_base_url=base, backend_service_route="/api" + route,
+        sqs_wait_time_seconds=0, **overrides,
+    )
+
+
+def test_batched_ticket_waits_for_its_real_outcome(monkeypatch, stub):
+    """A slow batch is not abandoned, which would leave the message to be retried and filed twice."""
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    stub.request_latency = 0.3
+    worker = AlertTriageWorker(_config(stub, backend_batch_size=4), cloudwatch_client=InMemoryCloudWatch())
+    # Formerly the wait for the batch: the batch interval plus this timeout.
+    monkeypatch.setattr("workers.alert_triage.worker.BACKEND_TIMEOUT_SECONDS", 0)
+
+    try:
+        ticket = worker._post_ticket({"title": "t", "description": "d", "priority": "low", "steps": []})
+    finally:
+        worker.close()
+
+    assert ticket["title"] == "t"
+    assert stub.tickets == 1
+
+
+def test_batch_mode_files_incidents_in_array_requests(monkeypatch, stub):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: None)
+    worker = AlertTriageWorker(
+        _config(stub, backend_batch_size=5, worker_processors=2), cloudwatch_client=InMemoryCloudWatch()
+    )
+
+    report = worker.process_alert_batch(storm_alerts(100, hosts=4, seed=1))
+
+    assert report["tickets"] == report["incidents"] == stub.tickets
+    assert sorted(report["succeeded"]) == list(range(100))
+    assert stub.requests == -(-report["incidents"] // 5)
+
+
+def test_batched_consumer_acknowledges_each_message_on_its_own_result(monkeypatch, stub):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    sqs = InMemorySQS()
+    for i in range(12):
+        summary = "FAIL disk" if i == 5 else SAMPLE_ALERT["summary"]
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps({**SAMPLE_ALERT, "id": f"a-{i}", "summary": summary}))
+    config = _config(
+        stub, worker_processors=12, work_queue_size=12, backend_batch_size=12, backend_batch_interval_seconds=0.1
+    )
+    worker = AlertTriageWorker(config, sqs_client=sqs, cloudwatch_client=InMemoryCloudWatch())
+    consumer = PipelinedConsumer.from_config(worker, config)
+    consumer.wait_time_seconds = 0.05
+
+    consumer.start()
+    deadline = time.monotonic() + 10
+    while consumer.stats()["processed"] + consumer.stats()["failed"] < 12 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    consumer.stop(timeout=5)
+    worker.close()
+
+    assert consumer.stats()["processed"] == 11 and consumer.stats()["failed"] == 1
+    assert stub.tickets == 11
+    assert stub.requests < 12
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 1}
+
+
+def test_stub_backend_accepts_a_burst_of_new_connections(stub):
+    """Fresh connections from many threads at once fit in the listen backlog."""
+    def post(i):
+        return requests.post(stub.url, json=_ticket(i), headers={"Authorization": "Bearer t"}, timeout=10).status_code
+
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        statuses = list(pool.map(post, range(256)))
+
+    assert statuses == [200] * 256
@@ -0,0 +1,166 @@
+import json
+
+from agents import triage_agent
+from workers.alert_triage.config import WorkerConfig
+from workers.alert_triage.incidents import SummaryCache, cluster_payloads, summary_key
+from workers.alert_triage.local_cloudwatch import InMemoryCloudWatch
+from workers.alert_triage.local_sqs import InMemorySQS
+from workers.alert_triage.test_harness import storm_alerts
+from workers.alert_triage.worker import AlertTriageWorker
+
+from tests.test_alert_triage_worker import RecordingSession
+
+
+def _worker(monkeypatch, sqs=None, **config):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    session = RecordingSession()
+    worker = AlertTriageWorker(
+        WorkerConfig(sqs_queue_url="local", sqs_wait_time_seconds=0, **config),
+        sqs_client=sqs, cloudwatch_client=InMemoryCloudWatch(), http_session=session,
+    )
+    llm_calls = []
+    call_llm = worker._call_llm
+
+    def counting_call_llm(alert):
+        llm_calls.append(alert)
+        return call_llm(alert)
+
+    monkeypatch.setattr(worker, "_call_llm", counting_call_llm)
+    return worker, session, llm_calls
+
+
+def _without_model(monkeypatch):
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: None)
+
+
+def test_storm_clusters_into_one_incident_per_host_and_template_without_model(monkeypatch):
+    _without_model(monkeypatch)
+    payloads = storm_alerts(200, hosts=4, seed=3)
+
+    incidents = cluster_payloads(payloads)
+
+    assert sum(incident.count for incident in incidents) == 200
+    assert len(incidents) <= 4 * 4
+    assert all(len({payloads[i]["host"] for i in incident.payload_indices}) == 1 for incident in incidents)
+
+
+def test_storm_clusters_with_the_triage_pipeline(fake_model):
+    payloads = storm_alerts(100, hosts=2, seed=5)
+
+    incidents = cluster_payloads(payloads)
+
+    assert sorted(i for incident in incidents for i in incident.payload_indices) == list(range(100))
+    assert len(incidents) < 20
+    assert fake_model.encode_calls >= 1
+
+
+def test_batch_summarises_each_template_once_and_reuses_the_cache(monkeypatch):
+    _without_model(monkeypatch)
+    worker, session, llm_calls = _worker(monkeypatch)
+
+    first = worker.process_alert_batch(storm_alerts(120, hosts=3, seed=1))
+    assert first["tickets"] == first["incidents"] == len(session.posts)
+    second = worker.process_alert_batch(storm_alerts(120, hosts=3, seed=2))
+
+    assert sorted(first["succeeded"]) == list(range(120)) and first["failed"] == []
+    # Host-independent summaries: one per template, however many hosts it hit.
+    assert first["summaries"] == len(llm_calls) < first["incidents"]
+    assert second["summaries"] == 0
+    assert all(post["json"]["title"].startswith("[") for post in session.posts)
+
+
+def test_cached_summary_carries_no_values_of_the_first_incident(monkeypatch):
+    _without_model(monkeypatch)
+    worker, session, llm_calls = _worker(monkeypatch)
+    alerts = [
+        {"host": "db-01", "message": "Disk 91% full on /dev/sda1 at 10.0.0.5", "severity": 7,
+         "timestamp": "2024-01-01T00:00:00+00:00"},
+        {"host": "web-02", "message": "Disk 64% full on /dev/sdb3 at 10.0.9.9", "severity": 7,
+         "timestamp": "2024-01-01T00:00:00+00:00"},
+    ]
+
+    report = worker.process_alert_batch(alerts)
+
+    assert report["tickets"] == 2 and len(llm_calls) == 1
+    assert "db-01" not in json.dumps(llm_calls) and "10.0.0.5" not in json.dumps(llm_calls)
+    web = next(post["json"] for post in session.posts if post["json"]["title"].startswith("[web-02]"))
+    assert "/dev/sdb3" in web["description"] and "10.0.9.9" in web["description"]
+    assert not any(value in json.dumps(web) for value in ("db-01", "/dev/sda1", "10.0.0.5", "91%"))
+
+
+def test_poll_window_deletes_only_filed_messages(monkeypatch):
+    _without_model(monkeypatch)
+    sqs = InMemorySQS()
+    for payload in storm_alerts(25, hosts=2, seed=4):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps(payload))
+    sqs.send_message(QueueUrl="local", MessageBody="not json")
+    worker, _, _ = _worker(monkeypatch, sqs=sqs, batch_window_seconds=0.2, worker_processors=4)
+
+    assert worker._poll_window() == 25
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 1}
+    assert "delete_message" not in sqs.calls
+
+
+def test_poll_window_counts_only_successful_deletes(monkeypatch, caplog):
+    _without_model(monkeypatch)
+    sqs = InMemorySQS()
+    for payload in storm_alerts(12, hosts=2, seed=7):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps(payload))
+    worker, _, _ = _worker(monkeypatch, sqs=sqs, batch_window_seconds=0.2)
+    delete_message_batch = sqs.delete_message_batch
+
+    def expire_first_receipt(QueueUrl, Entries):
+        return delete_message_batch(QueueUrl=QueueUrl, Entries=[{**Entries[0], "ReceiptHandle": "stale"}, *Entries[1:]])
+
+    monkeypatch.setattr(sqs, "delete_message_batch", expire_first_receipt)
+
+    # One entry fails in each of the two delete batches.
+    assert worker._poll_window() == 10
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 2}
+    assert caplog.text.count("Could not delete message 0: ReceiptHandleIsInvalid") == 2
+
+
+def test_poll_window_leaves_invalid_payloads_on_the_queue(monkeypatch):
+    _without_model(monkeypatch)
+    sqs = InMemorySQS()
+    for payload in storm_alerts(5, hosts=1, seed=5):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps(payload))
+    sqs.send_message(QueueUrl="local", MessageBody=json.dumps(["x"]))
+    sqs.send_message(QueueUrl="local", MessageBody='{"host": "db-01", "message": "Disk full", "severity": "inf"}')
+    worker, _, _ = _worker(monkeypatch, sqs=sqs, batch_window_seconds=0.2)
+
+    # The infinite severity falls back to the default; only the list stays in flight.
+    assert worker._poll_window() == 6
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 1}
+
+
+def test_failed_batch_only_fails_its_window(monkeypatch):
+    _without_model(monkeypatch)
+    sqs = InMemorySQS()
+    for payload in storm_alerts(5, hosts=1, seed=6):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps(payload))
+    worker, _, _ = _worker(monkeypatch, sqs=sqs, batch_window_seconds=0.2)
+
+    def explode(payloads):
+        raise RuntimeError("clustering failed")
+
+    monkeypatch.setattr(worker, "process_alert_batch", explode)
+
+    assert worker._poll_window() == 0
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 5}
+
+
+def test_summary_cache_evicts_least_recently_used_and_expires():
+    cache = SummaryCache(max_entries=2, ttl_seconds=60)
+    a, b, c = (summary_key(f"Disk {name} full on /dev/sda{n}", "high") for n, name in enumerate("abc"))
+    cache.put(a, {"title": "a"})
+    cache.put(b, {"title": "b"})
+    assert cache.get(a) == {"title": "a"}
+    cache.put(c, {"title": "c"})
+
+    assert cache.get(b) is None
+    assert cache.get(a) == {"title": "a"}
+    cache.ttl_seconds = -1
+    assert cache.get(a) is None
+    assert cache.stats() == {"hits": 2, "misses": 2, "size": 1}
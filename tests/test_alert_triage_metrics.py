@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from workers.alert_triage.cloudwatch_metrics import MAX_DATUMS_PER_CALL, MetricsAggregator
+from workers.alert_triage.config import WorkerConfig
+from workers.alert_triage.local_cloudwatch import InMemoryCloudWatch
+from workers.alert_triage.worker import AlertTriageWorker
+
+from tests.test_alert_triage_worker import SAMPLE_ALERT, RecordingSession
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_flush_sends_summed_counters_and_statistic_sets_per_dimension():
+    cloudwatch = InMemoryCloudWatch()
+    metrics = MetricsAggregator(cloudwatch.put_metric_data, "AlertTriage", flush_interval=60)
+    for _ in range(5):
+        metrics.increment("TicketsCreated")
+    metrics.increment("TicketsCreated", 3, dimensions={"Mode": "batch"})
+    for latency in (10.0, 30.0, 20.0):
+        metrics.observe("ProcessingLatency", latency, dimensions={"Stage": "ticket"})
+    metrics.observe("ProcessingLatency", 500.0, dimensions={"Stage": "summarize"})
+
+    assert cloudwatch.calls == []
+    assert metrics.flush() == 4
+
+    [call] = cloudwatch.calls
+    assert call["Namespace"] == "AlertTriage"
+    assert cloudwatch.total("TicketsCreated", {}) == 5
+    assert cloudwatch.total("TicketsCreated", {"Mode": "batch"}) == 3
+    [ticket_latency] = cloudwatch.datums("ProcessingLatency", {"Stage": "ticket"})
+    assert ticket_latency["Unit"] == "Milliseconds"
+    assert ticket_latency["StatisticValues"] == {"SampleCount": 3, "Sum": 60.0, "Minimum": 10.0, "Maximum": 30.0}
+    assert metrics.flush() == 0
+    metrics.close()
+
+
+def test_background_thread_flushes_on_the_timer():
+    cloudwatch = InMemoryCloudWatch()
+    metrics = MetricsAggregator(cloudwatch.put_metric_data, "AlertTriage", flush_interval=0.05)
+    metrics.increment("TicketsCreated")
+
+    assert _wait_for(lambda: cloudwatch.total("TicketsCreated") == 1)
+    metrics.close()
+
+
+def test_size_threshold_flushes_early_in_calls_of_at_most_1000():
+    cloudwatch = InMemoryCloudWatch()
+    metrics = MetricsAggregator(
+        cloudwatch.put_metric_data, "AlertTriage", flush_interval=3600, max_series=MAX_DATUMS_PER_CALL + 500
+    )
+    for host in range(MAX_DATUMS_PER_CALL + 500):
+        metrics.increment("TicketsCreated", dimensions={"Host": f"h{host}"})
+
+    assert _wait_for(lambda: cloudwatch.total("TicketsCreated") == MAX_DATUMS_PER_CALL + 500)
+    assert [len(call["MetricData"]) for call in cloudwatch.calls] == [MAX_DATUMS_PER_CALL, 500]
+    metrics.close()
+
+
+def test_close_flushes_and_publishing_errors_never_raise():
+    calls = []
+
+    def failing_put_metric_data(**request):
+        calls.append(request)
+        raise RuntimeError("throttled")
+
+    metrics = MetricsAggregator(failing_put_metric_data, "AlertTriage", flush_interval=3600)
+    metrics.increment("TicketsCreated")
+    metrics.close()
+
+    assert len(calls) == 1
+    assert metrics.dropped == 1 and metrics.published == 0
+
+
+@pytest.mark.parametrize("flush_interval, calls_before_close", [(60, 0), (0, 30)])
+def test_worker_metrics_leave_the_hot_path(monkeypatch, flush_interval, calls_before_close):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    cloudwatch = InMemoryCloudWatch()
+    worker = AlertTriageWorker(
+        WorkerConfig(sqs_queue_url="local", metrics_flush_interval_seconds=flush_interval),
+        cloudwatch_client=cloudwatch, http_session=RecordingSession(),
+    )
+
+    for i in range(10):
+        worker.process_alert_payload({**SAMPLE_ALERT, "id": f"alert-{i}"})
+    # Unbuffered: a count and two latencies per alert, each its own call.
+    assert len(cloudwatch.calls) == calls_before_close
+    worker.close()
+
+    assert cloudwatch.total("TicketsCreated") == 10
+    latencies = cloudwatch.datums("ProcessingLatency", {"Stage": "ticket", "Mode": "alert"})
+    assert sum(datum["StatisticValues"]["SampleCount"] for datum in latencies) == 10
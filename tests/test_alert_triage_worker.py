@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+
+from workers.alert_triage.config import WorkerConfig
+from workers.alert_triage.consumer import PipelinedConsumer
+from workers.alert_triage.local_cloudwatch import InMemoryCloudWatch
+from workers.alert_triage.local_sqs import InMemorySQS
+from workers.alert_triage.worker import AlertTriageWorker
+
+SAMPLE_ALERT = {
+    "id": "alert-123",
+    "host": "api-01",
+    "severity": 9,
+    "summary": "CPU usage above 90% for 5 minutes",
+}
+
+
+class RecordingSession:
+    """Stands in for requests.Session and records ticket POSTs."""
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.posts.append({"url": url, "json": json, "headers": headers})
+        return RecordingResponse({"id": len(self.posts), **json})
+
+
+class RecordingResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def _fill(sqs, count):
+    for i in range(count):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps({**SAMPLE_ALERT, "id": f"alert-{i}"}))
+
+
+def _run_until(consumer, condition, timeout=10.0):
+    consumer.start()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    consumer.stop(timeout=5)
+
+
+def test_worker_files_heuristic_ticket_with_service_token(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    session, cloudwatch = RecordingSession(), InMemoryCloudWatch()
+    worker = AlertTriageWorker(
+        WorkerConfig(sqs_queue_url="local"), cloudwatch_client=cloudwatch, http_session=session
+    )
+
+    worker.process_alert_payload(SAMPLE_ALERT)
+    worker.close()
+
+    [post] = session.posts
+    assert post["url"] == "http://localhost:4000/api/service/tickets"
+    assert post["headers"]["Authorization"] == "Bearer demo-token"
+    assert post["json"]["priority"] == "critical"
+    assert "api-01" in post["json"]["title"]
+    assert cloudwatch.total("TicketsCreated") == 1
+    assert not cloudwatch.datums("SummarizationFailures")
+
+
+def test_poll_once_deletes_processed_messages(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("BACKEND_TOKEN", "demo-token")
+    sqs = InMemorySQS()
+    _fill(sqs, 3)
+    worker = AlertTriageWorker(
+        WorkerConfig(sqs_queue_url="local", sqs_wait_time_seconds=0),
+        sqs_client=sqs, cloudwatch_client=InMemoryCloudWatch(), http_session=RecordingSession(),
+    )
+
+    assert worker._poll_once() == 3
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 0}
+
+
+def test_pipelined_consumer_overlaps_slow_messages_and_batches_deletes():
+    sqs = InMemorySQS()
+    _fill(sqs, 40)
+
+    def slow_handler(message):
+        time.sleep(0.05)
+
+    consumer = PipelinedConsumer(
+        slow_handler, sqs, "local", pollers=2, processors=8, queue_size=16,
+        wait_time_seconds=0.1, visibility_timeout=30, delete_flush_interval=0.05,
+    )
+    started = time.monotonic()
+    _run_until(consumer, lambda: consumer.stats()["processed"] == 40)
+    elapsed = time.monotonic() - started
+
+    stats = consumer.stats()
+    assert stats["processed"] == 40 and stats["deleted"] == 40
+    # One at a time this takes 2 s; eight processors overlap the waits.
+    assert elapsed < 1.5
+    assert "delete_message" not in sqs.calls
+    assert sqs.calls["delete_message_batch"] <= 10
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 0}
+
+
+def test_failed_messages_stay_on_the_queue():
+    sqs = InMemorySQS()
+    _fill(sqs, 4)
+
+    def handler(message):
+        if json.loads(message["Body"])["id"] == "alert-2":
+            raise RuntimeError("backend unavailable")
+
+    consumer = PipelinedConsumer(handler, sqs, "local", processors=2, wait_time_seconds=0.05, visibility_timeout=30)
+    _run_until(consumer, lambda: consumer.stats()["processed"] + consumer.stats()["failed"] == 4)
+
+    assert consumer.stats()["failed"] == 1
+    assert sqs.approximate_counts() == {"visible": 0, "in_flight": 1}
+
+
+def test_slow_messages_get_their_visibility_extended():
+    sqs = InMemorySQS()
+    _fill(sqs, 1)
+    receive_counts = []
+
+    def slow_handler(message):
+        receive_counts.append(message["Attributes"]["ApproximateReceiveCount"])
+        time.sleep(1.0)
+
+    consumer = PipelinedConsumer(
+        slow_handler, sqs, "local", pollers=2, processors=2, wait_time_seconds=0.05, visibility_timeout=0.3
+    )
+    _run_until(consumer, lambda: consumer.stats()["processed"] == 1)
+
+    # Without extensions the message would reappear after 0.3 s and be processed twice.
+    assert receive_counts == ["1"]
+    assert consumer.stats()["visibility_extensions"] >= 1
+    assert consumer.stats()["deleted"] == 1
+
+
+def test_backpressure_pauses_polling_when_the_work_queue_is_full():
+    sqs = InMemorySQS()
+    _fill(sqs, 30)
+    release = threading.Event()
+    held_seen = []
+
+    def blocked_handler(message):
+        held_seen.append(consumer.stats()["held"])
+        release.wait(5)
+
+    consumer = PipelinedConsumer(
+        blocked_handler, sqs, "local", pollers=3, processors=2, queue_size=4,
+        wait_time_seconds=0.05, visibility_timeout=30,
+    )
+    consumer.start()
+    time.sleep(0.3)
+    assert sqs.approximate_counts()["in_flight"] <= 4
+    assert consumer.stats()["backpressure_pauses"] >= 1
+    release.set()
+    deadline = time.monotonic() + 10
+    while consumer.stats()["processed"] < 30 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    consumer.stop(timeout=5)
+
+    assert consumer.stats()["processed"] == 30
+    # Acknowledged messages awaiting their batched delete do not count against the queue.
+    assert max(held_seen) <= 4
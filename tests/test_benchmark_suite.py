@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks.bench_engines import pair_agreement, truth_labels
+from benchmarks.bench_triage import compare
+from benchmarks.generator import BURST_SHAPES, WorkloadSpec, generate_alerts, generate_labelled_alerts
+
+
+def test_generator_is_deterministic_and_follows_the_spec():
+    spec = WorkloadSpec(alerts=5000, hosts=50, templates=24, critical_ratio=0.1, seed=7)
+    alerts = generate_alerts(spec)
+
+    assert alerts == generate_alerts(spec)
+    assert len(alerts) == 5000
+    assert len({a.host for a in alerts}) <= 50
+    assert 0.08 < sum(a.severity >= 8 for a in alerts) / len(alerts) < 0.12
+    assert all(a.timestamp <= b.timestamp for a, b in zip(alerts, alerts[1:]))
+    # Variable slots make distinct messages far more numerous than templates.
+    assert len({a.message for a in alerts}) > 10 * spec.templates
+
+
+@pytest.mark.parametrize("burst_shape", BURST_SHAPES)
+def test_burst_shapes_span_the_configured_rate(burst_shape):
+    alerts = generate_alerts(WorkloadSpec(alerts=2000, rate_per_second=10.0, burst_shape=burst_shape))
+    span = (alerts[-1].timestamp - alerts[0].timestamp).total_seconds()
+    # 2000 alerts at 10/s is about 200 s; storms compress the same alerts into less time.
+    assert 0 < span <= 250
+
+
+def test_invalid_spec_is_rejected():
+    with pytest.raises(ValueError, match="burst shape"):
+        generate_alerts(WorkloadSpec(alerts=10, burst_shape="sawtooth"))
+
+
+def test_compare_flags_regressions_past_tolerance():
+    baseline = [{"alerts": 1000, "throughput": 10000.0, "p99_s": 0.1, "peak_rss_mb": 500.0}]
+    within = [{"alerts": 1000, "throughput": 9000.0, "p99_s": 0.11, "peak_rss_mb": 520.0}]
+    slower = [{"alerts": 1000, "throughput": 5000.0, "p99_s": 0.3, "peak_rss_mb": 500.0}]
+
+    assert compare(within, baseline, tolerance=0.25) == []
+    regressions = compare(slower, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert any("throughput" in r for r in regressions)
+    assert any("p99_s" in r for r in regressions)
+
+
+def test_truth_labels_join_alerts_of_one_template_within_a_temporal_group():
+    alerts, template_ids = generate_labelled_alerts(WorkloadSpec(alerts=500, hosts=5))
+    truth = truth_labels(alerts, template_ids)
+
+    assert alerts == generate_alerts(WorkloadSpec(alerts=500, hosts=5))
+    assert pair_agreement(truth, truth) == {"precision": 1.0, "recall": 1.0}
+    merged = {alert_id: 0 for alert_id in truth}
+    assert pair_agreement(truth, merged)["precision"] < 0.5
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+import torch
+
+from agents import clustering, triage_agent
+from agents.clustering import cluster_embeddings, exact_clustering, leader_clustering
+
+
+def _partition(clusters):
+    return {frozenset(cluster) for cluster in clusters}
+
+
+def _triage_partition(alerts):
+    response = triage_agent.process_alert_triage(alerts)
+    return {frozenset(alert.id for alert in cluster.alerts) for cluster in response.clusters}
+
+
+def test_leader_agrees_with_exact_on_sample_fixtures(fake_model, sample_alerts, monkeypatch):
+    """Both backends produce the same clusters for the sample alerts."""
+    monkeypatch.setattr(triage_agent, "CLUSTERING_BACKEND", "exact")
+    exact = _triage_partition(sample_alerts)
+    monkeypatch.setattr(triage_agent, "CLUSTERING_BACKEND", "leader")
+    leader = _triage_partition(sample_alerts)
+
+    assert exact == leader
+
+
+def test_leader_agrees_with_exact_on_separated_clusters():
+    """On well-separated noisy clusters the approximate backend recovers the exact partition."""
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(30, 64))
+    points = np.concatenate([center + rng.normal(scale=0.05, size=(20, 64)) for center in centers])
+    order = rng.permutation(len(points))
+    embeddings = torch.tensor(points[order], dtype=torch.float32)
+
+    exact = exact_clustering(embeddings, 0.8)
+    leader = leader_clustering(embeddings, 0.8)
+
+    assert len(exact) == 30
+    assert _partition(exact) == _partition(leader)
+    # Largest clusters first, matching community detection's ordering.
+    assert [len(c) for c in leader] == sorted((len(c) for c in leader), reverse=True)
+
+
+def test_auto_switches_to_approximate_for_large_groups(monkeypatch):
+    """"auto" keeps exact detection for small groups and uses the leader backend above the limit."""
+    calls = []
+    monkeypatch.setitem(clustering.CLUSTERING_BACKENDS, "exact", lambda e, t: calls.append("exact") or [])
+    monkeypatch.setitem(clustering.CLUSTERING_BACKENDS, "leader", lambda e, t: calls.append("leader") or [])
+
+    cluster_embeddings(torch.zeros(10, 4), 0.8, max_exact_size=10)
+    cluster_embeddings(torch.zeros(11, 4), 0.8, max_exact_size=10)
+
+    assert calls == ["exact", "leader"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown clustering backend"):
+        cluster_embeddings(torch.zeros(2, 4), 0.8, backend="kmeans")
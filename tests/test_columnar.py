@@ -0,0 +1,67 @@
+import random
+from datetime import datetime, timedelta, UTC
+
+from agents import triage_agent
+from agents.columnar import AlertColumns
+from models.models import Alert
+
+WINDOW = timedelta(minutes=10)
+
+
+def _reference_partition(alerts):
+    """The original loop-based stages: severity split, host dict, per-host sort and chaining."""
+    critical = [a for a in alerts if a.severity >= 8]
+    by_host = {}
+    for alert in alerts:
+        if alert.severity < 8:
+            by_host.setdefault(alert.host, []).append(alert)
+    groups = []
+    for host, host_alerts in by_host.items():
+        for group in triage_agent._split_temporal_groups(sorted(host_alerts, key=lambda a: a.timestamp)):
+            groups.append((host, [a.id for a in group]))
+    return [a.id for a in critical], groups
+
+
+def _columnar_partition(alerts):
+    columns = AlertColumns(alerts)
+    critical_rows, group_rows = columns.partition(8, WINDOW)
+    return (
+        [a.id for a in columns.take(critical_rows)],
+        [(host, [a.id for a in columns.take(rows)]) for host, rows in group_rows],
+    )
+
+
+def test_columnar_partition_matches_reference_on_random_alerts():
+    """Vectorized stages reproduce the loop-based ordering, including ties and exact window edges."""
+    rng = random.Random(42)
+    base_time = datetime(2025, 11, 1, tzinfo=UTC)
+    alerts = [
+        Alert(
+            host=f"host-{rng.randrange(12)}",
+            # Whole minutes make ties and gaps of exactly 10 minutes common.
+            timestamp=base_time + timedelta(minutes=rng.randrange(0, 600, 5)),
+            severity=rng.randint(1, 10),
+            message="disk usage high",
+        )
+        for _ in range(2000)
+    ]
+
+    assert _columnar_partition(alerts) == _reference_partition(alerts)
+
+
+def test_columnar_partition_supports_naive_timestamps():
+    base_time = datetime(2025, 11, 1)
+    alerts = [
+        Alert(host="a", timestamp=base_time + timedelta(minutes=m), severity=5, message="x")
+        for m in (0, 10, 21, 22)
+    ]
+    critical, groups = _columnar_partition(alerts)
+    assert critical == []
+    assert [len(ids) for _, ids in groups] == [2, 2]
+
+
+def test_columnar_partition_with_only_critical_alerts():
+    alerts = [Alert(host="a", timestamp=datetime.now(UTC), severity=9, message="x")]
+    critical, groups = _columnar_partition(alerts)
+    assert critical == [alerts[0].id]
+    assert groups == []
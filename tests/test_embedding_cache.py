@@ -0,0 +1,119 @@
+import multiprocessing
+
+import numpy as np
+
+from agents.embedding_cache import DiskEmbeddingStore, EmbeddingCache, message_key, normalize_message
+from tests.conftest import FakeEmbeddingModel
+
+
+def _encoder(model: FakeEmbeddingModel):
+    return lambda messages: model.encode(messages)
+
+
+def test_lru_counts_hits_misses_and_evictions():
+    """Repeated messages are served from the LRU and the oldest entries are evicted first."""
+    model = FakeEmbeddingModel()
+    cache = EmbeddingCache(max_entries=2)
+
+    cache.encode(["disk full", "cpu high"], _encoder(model))
+    cache.encode(["Disk   FULL", "memory low"], _encoder(model))
+
+    stats = cache.stats()
+    assert stats["hits"] == 1  # "Disk   FULL" normalizes to "disk full"
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1  # "cpu high" was least recently used
+    assert stats["size"] == 2
+    assert model.encoded_messages == 3
+
+
+def test_cached_rows_match_model_output():
+    """The returned matrix has one row per input message, in input order."""
+    model = FakeEmbeddingModel()
+    cache = EmbeddingCache()
+    messages = ["disk full", "cpu high", "disk full"]
+
+    first = cache.encode(messages, _encoder(model))
+    second = cache.encode(messages, _encoder(model))
+
+    assert first.shape == (3, model.dimension)
+    assert np.array_equal(first, second)
+    assert np.array_equal(first[0], first[2])
+    assert np.allclose(first[1], model.encode(["cpu high"])[0])
+
+
+def test_disk_store_survives_restart(tmp_path):
+    """Vectors written by one cache are served from disk by a fresh one."""
+    model = FakeEmbeddingModel()
+    writer = EmbeddingCache(disk_store=DiskEmbeddingStore(str(tmp_path)))
+    expected = writer.encode(["disk full", "cpu high"], _encoder(model))
+
+    restarted_model = FakeEmbeddingModel()
+    restarted = EmbeddingCache(disk_store=DiskEmbeddingStore(str(tmp_path)))
+    loaded = restarted.encode(["cpu high", "disk full"], _encoder(restarted_model))
+
+    assert restarted_model.encode_calls == 0
+    assert restarted.stats()["disk_hits"] == 2
+    assert np.array_equal(loaded, expected[::-1])
+
+
+def test_read_only_store_sees_writer_appends(tmp_path):
+    """A read-only store never writes and picks up rows appended by the writer on refresh."""
+    writer = DiskEmbeddingStore(str(tmp_path))
+    writer.put(message_key(normalize_message("disk full")), np.ones(4, dtype=np.float32))
+    reader = DiskEmbeddingStore(str(tmp_path), read_only=True)
+
+    writer.put(message_key(normalize_message("cpu high")), np.full(4, 2.0, dtype=np.float32))
+    reader.put(message_key(normalize_message("memory low")), np.zeros(4, dtype=np.float32))
+    assert reader.get(message_key("cpu high")) is None
+
+    reader.refresh()
+    assert len(reader) == 2
+    assert np.array_equal(reader.get(message_key("cpu high")), np.full(4, 2.0, dtype=np.float32))
+    assert reader.get(message_key("memory low")) is None
+
+
+def test_disk_store_appends_batches_and_refreshes_only_new_keys(tmp_path, monkeypatch):
+    """One request's misses are one append, and a refresh reads only the keys added since."""
+    model = FakeEmbeddingModel()
+    cache = EmbeddingCache(disk_store=DiskEmbeddingStore(str(tmp_path)))
+    reader = DiskEmbeddingStore(str(tmp_path), read_only=True)
+    cache.encode([f"disk {name} full" for name in "abcdefgh"], _encoder(model))
+    reader.refresh()
+
+    reads = []
+    real_fromfile = np.fromfile
+    monkeypatch.setattr(np, "fromfile", lambda *args, **kwargs: reads.append(kwargs) or real_fromfile(*args, **kwargs))
+    expected = cache.encode(["disk a full", "cpu high", "memory low"], _encoder(model))
+    reader.refresh()
+
+    assert reads == [{"dtype": "<u8", "count": 2, "offset": 64}, {"dtype": "<u8", "count": 2, "offset": 64}]
+    assert len(reader) == 10
+    assert np.array_equal(reader.get(message_key("memory low")), expected[2])
+
+
+def _append_rows(path: str, first: int, batches: int, start) -> None:
+    store = DiskEmbeddingStore(path)
+    start.wait()
+    for batch in range(batches):
+        keys = [first + batch * 10 + i for i in range(10)]
+        store.put_many(keys, np.repeat(np.array(keys, dtype=np.float32)[:, np.newaxis], 256, axis=1))
+
+
+def test_writers_in_two_processes_keep_keys_and_vectors_paired(tmp_path):
+    """Appends from separate processes are serialized, so every row still matches its key."""
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    writers = [
+        context.Process(target=_append_rows, args=(str(tmp_path), first, 300, start)) for first in (0, 100_000)
+    ]
+    for writer in writers:
+        writer.start()
+    start.set()
+    for writer in writers:
+        writer.join(60)
+
+    store = DiskEmbeddingStore(str(tmp_path), read_only=True)
+    assert [writer.exitcode for writer in writers] == [0, 0]
+    assert len(store) == 6000
+    for key in list(range(3000)) + list(range(100_000, 103_000)):
+        assert np.array_equal(store.get(key), np.full(256, key, dtype=np.float32)), key
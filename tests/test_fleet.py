@@ -0,0 +1,77 @@
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from agents import triage_agent
+from agents.fleet import group_fleet_incidents
+from main import app
+from models.models import Alert, AlertCluster
+
+client = TestClient(app)
+WINDOW = timedelta(minutes=10)
+BASE_TIME = datetime(2025, 11, 1, tzinfo=UTC)
+
+
+def _cluster(host: str, message: str, minute: int, count: int = 1) -> AlertCluster:
+    start = BASE_TIME + timedelta(minutes=minute)
+    alerts = [Alert(host=host, timestamp=start, severity=5, message=message) for _ in range(count)]
+    return AlertCluster(host=host, start_time=start, end_time=start, alerts=alerts,
+                        representative_message=message, count=count)
+
+
+def test_same_alert_across_the_fleet_is_one_incident():
+    clusters = [_cluster(f"host-{h}", f"Low disk space on /data, {80 + h % 20}% used.", h % 5, count=2) for h in range(500)]
+    clusters.append(_cluster("host-0", "Service nginx restarted successfully.", 1))
+
+    incidents = group_fleet_incidents(clusters, WINDOW)
+
+    assert len(incidents) == 1
+    assert incidents[0].cluster_indices == list(range(500))
+    assert len(incidents[0].hosts) == 500
+    assert incidents[0].alert_count == 1000
+
+
+def test_incidents_are_split_by_time_window_and_need_several_hosts():
+    clusters = [
+        _cluster("host-a", "Replication lag on postgres is 30 seconds.", 0),
+        _cluster("host-b", "Replication lag on postgres is 45 seconds.", 5),
+        # Beyond the window of the first incident: a new one.
+        _cluster("host-c", "Replication lag on postgres is 12 seconds.", 60),
+        _cluster("host-d", "Replication lag on postgres is 15 seconds.", 62),
+        # A single host is not a fleet incident.
+        _cluster("host-e", "Queue depth of kafka reached 500 messages.", 0),
+        _cluster("host-e", "Queue depth of kafka reached 900 messages.", 3),
+    ]
+
+    incidents = group_fleet_incidents(clusters, WINDOW)
+
+    assert sorted(incident.cluster_indices for incident in incidents) == [[0, 1], [2, 3]]
+
+
+def test_dissimilar_messages_stay_apart():
+    clusters = [
+        _cluster("host-a", "High CPU utilization on nginx at 95%.", 0),
+        _cluster("host-b", "SSL certificate for nginx expires in 3 days.", 0),
+    ]
+
+    assert group_fleet_incidents(clusters, WINDOW) == []
+
+
+def test_triage_endpoint_returns_incidents_on_request(monkeypatch):
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: None)
+    alerts = [
+        Alert(host=f"web-{h}", timestamp=BASE_TIME + timedelta(minutes=h % 3), severity=5,
+              message=f"Disk usage high on volume data at {90 + h}%")
+        for h in range(5)
+    ]
+    payload = {"alerts": [alert.model_dump(mode="json") for alert in alerts]}
+
+    plain = client.post("/agents/triage", json=payload).json()
+    full = client.post("/agents/triage", json=payload, params={"incidents": "true"}).json()
+    compact = client.post("/agents/triage", json=payload, params={"incidents": "true", "format": "compact"}).json()
+
+    assert plain["incidents"] is None
+    assert len(full["clusters"]) == 5
+    assert [sorted(incident["hosts"]) for incident in full["incidents"]] == [[f"web-{h}" for h in range(5)]]
+    assert full["incidents"][0]["cluster_indices"] == [0, 1, 2, 3, 4]
+    assert compact["incidents"][0]["cluster_indices"] == [0, 1, 2, 3, 4]
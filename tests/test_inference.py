@@ -0,0 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, UTC
+
+import httpx
+import numpy as np
+
+from agents import triage_agent
+from agents.inference import InferenceExecutor
+from main import app
+from models.models import Alert
+from tests.conftest import FakeEmbeddingModel, install_fake_model
+
+
+def test_concurrent_submissions_share_batches():
+    """Concurrent requests are coalesced into fewer model calls, and each gets its own rows."""
+    model = FakeEmbeddingModel(per_batch_overhead=0.02)
+    executor = InferenceExecutor(lambda: model, max_wait_ms=10)
+    requests = [[f"disk alert {i}", "shared message"] for i in range(8)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(executor.encode, requests))
+    finally:
+        executor.shutdown()
+
+    assert model.encode_calls < len(requests)
+    for messages, vectors in zip(requests, results):
+        assert np.allclose(vectors, model.encode(messages))
+
+
+def test_small_request_is_not_stuck_behind_a_large_one():
+    """Large submissions are split into chunks, so a small one finishes within a batch or two."""
+    model = FakeEmbeddingModel(per_batch_overhead=0.01)
+    executor = InferenceExecutor(lambda: model, max_batch_size=64, batch_size=32)
+    large = [f"disk alert {i}" for i in range(2000)]
+    small = ["memory pressure on node", "disk alert 7"]
+
+    try:
+        started = time.perf_counter()
+        large_future = executor.submit(large)
+        time.sleep(0.05)
+        small_started = time.perf_counter()
+        small_vectors = executor.submit(small).result(timeout=10)
+        small_latency = time.perf_counter() - small_started
+        large_vectors = large_future.result(timeout=30)
+        large_latency = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+
+    assert small_latency < large_latency / 4
+    assert np.allclose(small_vectors, model.encode(small))
+    assert np.allclose(large_vectors, model.encode(large))
+
+
+def test_model_errors_reach_every_waiting_request():
+    """A failing forward pass fails the submissions in that batch instead of hanging them."""
+    class BrokenModel:
+        def encode(self, sentences, **kwargs):
+            raise RuntimeError("out of memory")
+
+    executor = InferenceExecutor(lambda: BrokenModel())
+    try:
+        future = executor.submit(["disk alert"])
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+    finally:
+        executor.shutdown()
+
+
+def test_health_check_stays_responsive_during_triage(monkeypatch):
+    """A slow triage request no longer blocks the event loop for other endpoints."""
+    install_fake_model(monkeypatch, FakeEmbeddingModel(per_batch_overhead=0.5))
+    base_time = datetime.now(UTC)
+    payload = {"alerts": [
+        Alert(host="host-a", timestamp=base_time + timedelta(seconds=i), severity=5, message=f"message number {i} word{i}").model_dump(mode="json")
+        for i in range(5)
+    ]}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            triage = asyncio.create_task(client.post("/agents/triage", json=payload))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            health = await client.get("/")
+            health_seconds = time.perf_counter() - started
+            return (await triage), health, health_seconds
+
+    triage, health, health_seconds = asyncio.run(scenario())
+
+    assert triage.status_code == 200
+    assert health.status_code == 200
+    assert health_seconds < 0.25
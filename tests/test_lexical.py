@@ -0,0 +1,103 @@
+import json
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from agents import triage_agent
+from agents.lexical import MinHasher, cluster_message_groups_lexical, lsh_leader_clustering, normalize_message
+from main import app
+from models.models import Alert
+
+client = TestClient(app)
+
+
+def _payload(alerts):
+    return {"alerts": [alert.model_dump(mode="json") for alert in alerts]}
+
+
+def test_messages_differing_in_variables_have_identical_signatures():
+    hasher = MinHasher()
+    first = hasher.signature(normalize_message("Disk 91% full on /data"))
+    second = hasher.signature(normalize_message("disk 97%   full on /var/log"))
+
+    assert np.array_equal(first, second)
+    assert (first == hasher.signature(normalize_message("User login failed"))).mean() < 0.3
+
+
+def test_lsh_leader_clustering_groups_near_duplicates():
+    hasher = MinHasher()
+    signatures = hasher.signatures([
+        "low disk space on <PATH>",
+        "memory pressure detected on node",
+        "disk space is running low on <PATH>",
+    ])
+
+    assert lsh_leader_clustering(signatures) == [[0, 2], [1]]
+
+
+def test_cluster_message_groups_lexical_clusters_each_group_separately():
+    groups = [
+        ["High CPU utilization at 95%.", "CPU utilization is very high, reached 96%.", "User login failed from IP 1.2.3.4"],
+        ["High CPU utilization at 91%."],
+    ]
+
+    assert cluster_message_groups_lexical(groups) == [[[0, 1], [2]], [[0]]]
+
+
+def test_lexical_engine_needs_no_model(sample_alerts, monkeypatch):
+    def no_model():
+        raise AssertionError("the lexical engine must not load the model")
+
+    monkeypatch.setattr(triage_agent.model_manager, "load", no_model)
+    response = client.post("/agents/triage", json=_payload(sample_alerts), params={"engine": "lexical"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["engine"] == "lexical"
+    assert len(data["critical_alerts"]) == 1
+    disk = next(c for c in data["clusters"] if c["representative_message"].startswith("Low disk space"))
+    assert disk["count"] == 2
+
+
+def test_auto_engine_falls_back_to_lexical_without_model(sample_alerts, monkeypatch):
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: None)
+
+    response = client.post("/agents/triage", json=_payload(sample_alerts))
+
+    assert response.status_code == 200
+    assert response.json()["engine"] == "lexical"
+
+
+def test_auto_engine_uses_embeddings_when_model_is_ready(fake_model, sample_alerts):
+    response = client.post("/agents/triage", json=_payload(sample_alerts), params={"engine": "auto"})
+
+    assert response.status_code == 200
+    assert response.json()["engine"] == "embedding"
+
+
+def test_unknown_engine_is_rejected(sample_alerts):
+    response = client.post("/agents/triage", json=_payload(sample_alerts), params={"engine": "fuzzy"})
+
+    assert response.status_code == 400
+    assert "Unknown engine" in response.json()["detail"]
+
+
+def test_ndjson_summary_names_the_engine(monkeypatch):
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: None)
+    base_time = datetime.now(UTC)
+    alerts = [
+        Alert(host="host-a", timestamp=base_time + timedelta(minutes=i), severity=5, message=f"Disk {90 + i}% full")
+        for i in range(3)
+    ]
+    body = "\n".join(alert.model_dump_json() for alert in alerts)
+
+    response = client.post(
+        "/agents/triage/ndjson", content=body, headers={"Content-Type": "application/x-ndjson"},
+        params={"engine": "lexical"},
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert response.status_code == 200
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["summary"]["engine"] == "lexical"
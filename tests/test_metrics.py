@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, UTC
+
+from fastapi.testclient import TestClient
+
+from main import app
+from agents import metrics, triage_agent
+from agents.metrics import Histogram, MetricsRegistry
+from models.models import Alert
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="a"} 3' in text
+
+
+def test_stages_are_summed_per_scope_and_observed_once():
+    before = metrics.STAGE_SECONDS.count(stage="test_stage")
+    with metrics.collect_stages() as timings:
+        for _ in range(3):
+            with metrics.stage("test_stage"):
+                pass
+        # A nested scope shares the outer one's timings.
+        with metrics.collect_stages() as inner:
+            assert inner is timings
+
+    assert set(timings.seconds) == {"test_stage"}
+    assert metrics.STAGE_SECONDS.count(stage="test_stage") == before + 1
+
+
+def test_pipeline_counts_alerts_groups_and_largest_group(fake_model):
+    base_time = datetime.now(UTC)
+    alerts = [
+        Alert(host="db-01", timestamp=base_time + timedelta(seconds=i), severity=5, message=f"Disk {i}% full")
+        for i in range(40)
+    ] + [Alert(host="db-01", timestamp=base_time, severity=9, message="Database down")]
+    alerts_before = metrics.ALERTS.value()
+    groups_before = metrics.TEMPORAL_GROUPS.value()
+
+    with metrics.collect_stages() as timings:
+        triage_agent.process_alert_triage(alerts)
+
+    assert metrics.ALERTS.value() == alerts_before + 41
+    assert metrics.TEMPORAL_GROUPS.value() == groups_before + 1
+    assert metrics.MAX_GROUP_SIZE.value() >= 40
+    assert {"partition", "templates", "encode", "build"} <= set(timings.seconds)
+
+
+def test_triage_request_reports_server_timing_and_metrics(fake_model, sample_alerts, monkeypatch):
+    monkeypatch.setattr(metrics, "SERVER_TIMING_ENABLED", True)
+    payload = {"alerts": [alert.model_dump(mode="json") for alert in sample_alerts]}
+
+    response = client.post("/agents/triage", json=payload)
+
+    assert response.status_code == 200
+    stages = {part.split(";")[0] for part in response.headers["server-timing"].split(", ")}
+    assert {"parse", "partition", "templates", "encode", "build", "serialize"} <= stages
+
+    text = client.get("/metrics").text
+    assert 'triage_stage_seconds_count{stage="serialize"}' in text
+    assert 'triage_request_seconds_count{route="/agents/triage"}' in text
+    assert "triage_max_temporal_group_size" in text
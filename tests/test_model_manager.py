@@ -0,0 +1,123 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from agents.model_manager import FAILED, NOT_LOADED, READY, ModelManager, load_sentence_transformer
+from tests.conftest import FakeEmbeddingModel, install_fake_model
+
+client = TestClient(app)
+
+
+def test_model_is_loaded_once_on_first_use():
+    calls = []
+
+    def loader():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return FakeEmbeddingModel()
+
+    manager = ModelManager(loader)
+    assert manager.state == NOT_LOADED and calls == []
+
+    # Concurrent callers share the single load in progress.
+    threads = [threading.Thread(target=manager.load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert manager.state == READY
+    assert isinstance(manager.load(), FakeEmbeddingModel)
+
+
+def test_failed_load_is_remembered_and_reported():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        raise OSError("no internet")
+
+    manager = ModelManager(loader, description={"backend": "torch"})
+    assert manager.load() is None
+    assert manager.load() is None
+    assert len(calls) == 1
+
+    status = manager.status()
+    assert status["state"] == FAILED and not status["ready"]
+    assert status["error"] == "no internet"
+    assert status["backend"] == "torch"
+
+
+def test_failed_load_is_retried_with_backoff():
+    now = [0.0]
+    attempts = []
+
+    def loader():
+        attempts.append(now[0])
+        if len(attempts) < 3:
+            raise OSError("no internet")
+        return FakeEmbeddingModel()
+
+    manager = ModelManager(loader, retry_seconds=10, max_retry_seconds=15, clock=lambda: now[0])
+    assert manager.load() is None
+    now[0] = 9
+    assert manager.load() is None and attempts == [0]
+    assert manager.status()["retry_in_seconds"] == 1
+
+    now[0] = 10
+    assert manager.load() is None and attempts == [0, 10]
+    # The doubled delay is capped at max_retry_seconds.
+    now[0] = 24
+    assert manager.retry_in_background() is None
+    now[0] = 25
+    manager.retry_in_background().join(timeout=5)
+
+    assert attempts == [0, 10, 25]
+    assert manager.ready and manager.error is None and manager.warmed_up
+
+
+def test_background_load_warms_up_the_model():
+    model = FakeEmbeddingModel()
+    manager = ModelManager(lambda: model)
+
+    manager.load_in_background(warm_up=True).join(timeout=5)
+
+    assert manager.ready and manager.warmed_up
+    assert model.encode_calls == 1
+
+
+def test_importing_main_does_not_import_sentence_transformers():
+    code = "import sys, main; print('sentence_transformers' in sys.modules, 'transformers' in sys.modules)"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown model backend"):
+        load_sentence_transformer("all-MiniLM-L6-v2", backend="tensorrt")
+
+
+def test_readiness_endpoint_follows_model_state(monkeypatch):
+    from agents import triage_agent
+
+    monkeypatch.setattr(triage_agent.model_manager, "state", FAILED)
+    monkeypatch.setattr(triage_agent.model_manager, "model", None)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["model"]["state"] == FAILED
+
+    # Liveness does not depend on the model.
+    assert client.get("/").status_code == 200
+
+    install_fake_model(monkeypatch, FakeEmbeddingModel())
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
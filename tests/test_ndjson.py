@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents import triage_agent
+from agents.ndjson import AlertLimitExceeded, AlertPartitioner, LineTooLong, NdjsonValidationError
+from main import app
+
+client = TestClient(app)
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _ndjson(alerts) -> bytes:
+    return b"".join(alert.model_dump_json().encode("utf-8") + b"\n" for alert in alerts)
+
+
+def test_partitioner_handles_lines_split_across_chunks(sample_alerts):
+    """Alerts are parsed correctly however the body is chunked, including a missing final newline."""
+    body = _ndjson(sample_alerts).rstrip(b"\n")
+    partitioner = AlertPartitioner(critical_threshold=8)
+    for start in range(0, len(body), 7):
+        partitioner.feed(body[start:start + 7])
+    partitioner.close()
+
+    assert partitioner.count == len(sample_alerts)
+    assert len(partitioner.critical_alerts) == 1
+    assert list(partitioner.alerts_by_host) == ["server-db-01", "server-web-01", "server-app-01"]
+    assert len(partitioner.alerts_by_host["server-db-01"]) == 4
+
+
+def test_partitioner_reports_invalid_line_and_limit(sample_alerts):
+    partitioner = AlertPartitioner(critical_threshold=8)
+    with pytest.raises(NdjsonValidationError) as excinfo:
+        partitioner.feed(_ndjson(sample_alerts[:2]) + b'{"host": "x"}\n')
+    assert excinfo.value.line == 3
+
+    limited = AlertPartitioner(critical_threshold=8, max_alerts=2)
+    with pytest.raises(AlertLimitExceeded):
+        limited.feed(_ndjson(sample_alerts[:3]))
+
+
+def test_partitioner_bounds_the_buffered_line(sample_alerts):
+    partitioner = AlertPartitioner(critical_threshold=8, max_line_bytes=1024)
+    partitioner.feed(_ndjson(sample_alerts[:2]))
+
+    # A line without a newline is rejected as soon as the buffer passes the limit.
+    partitioner.feed(b'{"host": "' + b"x" * 1000)
+    with pytest.raises(LineTooLong) as excinfo:
+        partitioner.feed(b"x" * 100)
+    assert excinfo.value.line == 3
+
+
+def test_ndjson_endpoint_rejects_overlong_lines(fake_model, sample_alerts, monkeypatch):
+    monkeypatch.setattr(triage_agent, "NDJSON_MAX_LINE_BYTES", 1024)
+    body = _ndjson(sample_alerts[:1]) + b'{"message": "' + b"x" * 4096 + b'"}\n'
+
+    response = client.post("/agents/triage/ndjson", content=body, headers=NDJSON)
+
+    assert response.status_code == 413
+    assert "Line 2" in response.json()["detail"]
+
+
+def test_ndjson_endpoint_streams_clusters_per_host(fake_model, sample_alerts):
+    """Critical alerts come first, then clusters grouped by host, then a summary."""
+    response = client.post("/agents/triage/ndjson", content=_ndjson(sample_alerts), headers=NDJSON)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    kinds = [line["type"] for line in lines]
+    assert kinds[0] == "critical_alert"
+    assert kinds[-1] == "summary"
+    assert set(kinds[1:-1]) == {"cluster"}
+
+    hosts = [line["cluster"]["host"] for line in lines if line["type"] == "cluster"]
+    assert hosts == sorted(hosts, key=["server-db-01", "server-web-01", "server-app-01"].index)
+    summary = lines[-1]["summary"]
+    assert summary["alerts"] == len(sample_alerts)
+    assert summary["hosts"] == 3
+    assert summary["clusters"] == len(hosts)
+    assert sum(line["cluster"]["count"] for line in lines if line["type"] == "cluster") == 7
+
+
+def test_ndjson_endpoint_rejects_bad_input(fake_model, sample_alerts):
+    invalid = client.post("/agents/triage/ndjson", content=b'{"host": "x"}\n', headers=NDJSON)
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["line"] == 1
+
+    empty = client.post("/agents/triage/ndjson", content=b"\n\n", headers=NDJSON)
+    assert empty.status_code == 400
+
+    wrong_type = client.post("/agents/triage/ndjson", content=_ndjson(sample_alerts), headers={"Content-Type": "text/csv"})
+    assert wrong_type.status_code == 415
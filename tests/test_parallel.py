@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, UTC
+
+import torch
+
+from agents import triage_agent
+from agents.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+from agents.parallel import ParallelTriageExecutor, _initialize_worker, shard_hosts
+from models.models import Alert
+from tests.conftest import FakeEmbeddingModel
+
+
+def _many_host_alerts() -> list[Alert]:
+    base_time = datetime(2025, 11, 1, tzinfo=UTC)
+    messages = ["Disk usage high on volume data", "Memory pressure detected on node", "Fan speed abnormal in chassis"]
+    return [
+        Alert(
+            host=f"host-{h:02d}",
+            timestamp=base_time + timedelta(minutes=7 * i),
+            severity=5,
+            message=messages[(h + i) % len(messages)],
+        )
+        for h in range(12)
+        for i in range(h % 4 + 3)
+    ]
+
+
+def _shape(response):
+    return [(c.host, [a.id for a in c.alerts]) for c in response.clusters]
+
+
+def test_shard_hosts_keeps_hosts_together_and_balances_load():
+    hosts = ["a", "b", "a", "c", "d", "b"]
+    sizes = [10, 5, 10, 1, 1, 5]
+    shards = shard_hosts(hosts, sizes, shard_count=2)
+
+    assert sorted(i for shard in shards for i in shard) == list(range(len(hosts)))
+    host_shard = {hosts[i]: n for n, shard in enumerate(shards) for i in shard}
+    assert all(host_shard[hosts[i]] == n for n, shard in enumerate(shards) for i in shard)
+    assert sorted(sum(sizes[i] for i in shard) for shard in shards) == [12, 20]
+    assert shard_hosts(hosts, sizes, shard_count=2) == shards
+
+
+def test_parallel_triage_matches_single_process_order(fake_model, monkeypatch):
+    """Sharded triage on two workers produces the same clusters in the same order."""
+    alerts = _many_host_alerts()
+    serial = _shape(triage_agent.process_alert_triage(alerts))
+
+    executor = ParallelTriageExecutor(
+        workers=2, min_groups=1, model_factory=FakeEmbeddingModel
+    )
+    monkeypatch.setattr(triage_agent, "parallel_triage", executor)
+    try:
+        parallel = _shape(triage_agent.process_alert_triage(alerts))
+    finally:
+        executor.shutdown()
+
+    assert parallel == serial
+    assert fake_model.encode_calls == 1  # Only the serial run used the in-process model.
+
+
+def test_worker_initializer_loads_the_model_and_opens_the_disk_store_read_only(monkeypatch, tmp_path):
+    loads = []
+    monkeypatch.setattr(triage_agent.model_manager, "load", lambda: loads.append(True))
+    monkeypatch.setattr(triage_agent, "embedding_cache", EmbeddingCache(disk_store=DiskEmbeddingStore(str(tmp_path))))
+    threads = torch.get_num_threads()
+
+    try:
+        _initialize_worker(None, 1)
+    finally:
+        torch.set_num_threads(threads)
+
+    assert loads == [True]
+    assert triage_agent.embedding_cache.disk_store.read_only
+    assert triage_agent.embedding_cache.disk_store.path == str(tmp_path)
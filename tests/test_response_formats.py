@@ -0,0 +1,64 @@
+from fastapi.testclient import TestClient
+
+from agents.response_formats import dumps, negotiate_format, to_columnar, to_compact
+from benchmarks.bench_response_formats import build_response
+from main import app
+from models.models import ColumnarTriageResponse, CompactTriageResponse
+
+client = TestClient(app)
+
+
+def _payload(alerts):
+    return {"alerts": [alert.model_dump(mode="json") for alert in alerts]}
+
+
+def _membership(clusters, ids):
+    return sorted(sorted(ids[i] for i in cluster["alert_indices"]) for cluster in clusters)
+
+
+def test_compact_and_columnar_reference_the_same_alerts_as_full(fake_model, sample_alerts):
+    """Index-based formats describe exactly the clusters and critical alerts of the full response."""
+    full = client.post("/agents/triage", json=_payload(sample_alerts)).json()
+    compact = client.post("/agents/triage?format=compact", json=_payload(sample_alerts))
+    columnar = client.post(
+        "/agents/triage", json=_payload(sample_alerts),
+        headers={"Accept": "application/vnd.triage.columnar+json"},
+    )
+
+    assert compact.headers["content-type"] == "application/vnd.triage.compact+json"
+    assert columnar.headers["content-type"] == "application/vnd.triage.columnar+json"
+    compact, columnar = compact.json(), columnar.json()
+    CompactTriageResponse.model_validate(compact)
+    ColumnarTriageResponse.model_validate(columnar)
+
+    expected = sorted(sorted(a["id"] for a in c["alerts"]) for c in full["clusters"])
+    compact_ids = [row[0] for row in compact["alerts"]]
+    assert compact["alert_fields"][0] == "id"
+    assert _membership(compact["clusters"], compact_ids) == expected
+    assert _membership(columnar["clusters"], columnar["alerts"]["id"]) == expected
+
+    critical_ids = [a["id"] for a in full["critical_alerts"]]
+    assert [compact_ids[i] for i in compact["critical_alert_indices"]] == critical_ids
+    assert [columnar["alerts"]["id"][i] for i in columnar["critical_alert_indices"]] == critical_ids
+
+
+def test_unknown_format_is_rejected(fake_model, sample_alerts):
+    response = client.post("/agents/triage?format=xml", json=_payload(sample_alerts))
+    assert response.status_code == 400
+    assert "Unknown response format" in response.json()["detail"]
+
+
+def test_query_parameter_takes_precedence_over_accept_header():
+    assert negotiate_format("full", "application/vnd.triage.compact+json") == "full"
+    assert negotiate_format(None, "application/vnd.triage.compact+json, */*") == "compact"
+    assert negotiate_format(None, "application/json") == "full"
+
+
+def test_index_formats_are_smaller_than_full():
+    """Without repeated per-alert keys, both alternative shapes encode to fewer bytes."""
+    response, alerts = build_response(2000)
+    full_size = len(response.model_dump_json())
+    assert len(dumps(to_compact(response, alerts))) < full_size
+    assert len(dumps(to_columnar(response, alerts))) < full_size
+    # Without the request's alerts, the table is rebuilt from the response itself.
+    assert len(to_compact(response)["alerts"]) == len(alerts)
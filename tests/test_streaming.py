@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents import triage_agent
+from agents.streaming import StreamingTriageEngine
+from main import app
+from models.models import Alert
+from tests.conftest import FakeEmbeddingModel
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def engine() -> StreamingTriageEngine:
+    return StreamingTriageEngine(
+        encode=FakeEmbeddingModel().encode,
+        window=timedelta(minutes=10),
+        similarity_threshold=0.8,
+        max_clusters_per_host=4,
+    )
+
+
+def test_alerts_join_open_clusters_until_the_window_passes(engine):
+    """Similar alerts accumulate in one open cluster, which is emitted once the stream moves on."""
+    base_time = datetime.now(UTC)
+    first = [
+        Alert(host="host-a", timestamp=base_time, severity=5, message="Disk usage high on volume data"),
+        Alert(host="host-a", timestamp=base_time + timedelta(minutes=2), severity=5, message="Disk usage high on volume data"),
+        Alert(host="host-a", timestamp=base_time + timedelta(minutes=3), severity=5, message="Memory pressure detected on node"),
+    ]
+    assert engine.ingest(first) == []
+    assert engine.open_clusters == 2
+
+    finished = engine.ingest([
+        Alert(host="host-b", timestamp=base_time + timedelta(minutes=30), severity=5, message="Fan speed abnormal in chassis"),
+    ])
+
+    assert sorted(cluster.count for cluster in finished) == [1, 2]
+    assert {cluster.host for cluster in finished} == {"host-a"}
+    assert engine.active_hosts == 1
+
+
+def test_memory_is_bounded_per_host(engine):
+    """A host never keeps more than max_clusters_per_host open clusters."""
+    base_time = datetime.now(UTC)
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+    alerts = [
+        Alert(host="host-a", timestamp=base_time + timedelta(seconds=i), severity=5, message=f"{word} subsystem degraded")
+        for i, word in enumerate(words)
+    ]
+
+    finished = engine.ingest(alerts)
+
+    assert engine.open_clusters == 4
+    assert [cluster.representative_message for cluster in finished] == [
+        "alpha subsystem degraded",
+        "bravo subsystem degraded",
+    ]
+    assert len(engine.flush()) == 4
+    assert engine.active_hosts == 0
+
+
+def test_ingest_endpoint_returns_finished_clusters(fake_model, monkeypatch):
+    """The ingest endpoint keeps state between calls and reports critical alerts immediately."""
+    monkeypatch.setattr(triage_agent, "streaming_engine", StreamingTriageEngine(
+        encode=fake_model.encode, window=timedelta(minutes=10), similarity_threshold=0.8,
+    ))
+    base_time = datetime.now(UTC)
+    batch = [
+        Alert(host="host-a", timestamp=base_time, severity=5, message="Disk usage high on volume data"),
+        Alert(host="host-a", timestamp=base_time, severity=9, message="Database unreachable"),
+    ]
+    response = client.post("/agents/triage/ingest", json={"alerts": [a.model_dump(mode="json") for a in batch]})
+    assert response.status_code == 200
+    assert response.json()["clusters"] == []
+    assert len(response.json()["critical_alerts"]) == 1
+
+    response = client.post("/agents/triage/flush")
+    assert response.status_code == 200
+    clusters = response.json()["clusters"]
+    assert len(clusters) == 1
+    assert clusters[0]["representative_message"] == "Disk usage high on volume data"
+
+
+def test_ingest_accepts_naive_and_aware_timestamps_across_calls(fake_model, monkeypatch):
+    """Naive timestamps are taken as UTC instead of failing to compare with aware ones."""
+    monkeypatch.setattr(triage_agent, "streaming_engine", StreamingTriageEngine(
+        encode=fake_model.encode, window=timedelta(minutes=10), similarity_threshold=0.8,
+    ))
+    message = "Disk usage high on volume data"
+    naive = {"host": "host-a", "timestamp": "2024-01-01T00:00:00", "severity": 5, "message": message}
+    aware = {**naive, "timestamp": "2024-01-01T00:05:00+00:00"}
+    later = {**naive, "timestamp": "2024-01-01T01:00:00"}
+
+    responses = [client.post("/agents/triage/ingest", json={"alerts": [alert]}) for alert in (naive, aware, later)]
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    [cluster] = responses[2].json()["clusters"]
+    assert cluster["count"] == 2
+    assert cluster["end_time"].startswith("2024-01-01T00:05:00")
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, UTC
+
+from agents import triage_agent
+from agents.templates import TemplateMiner, group_by_template, mask_variables
+from models.models import Alert
+
+
+def test_mask_variables_replaces_variable_tokens():
+    """Numbers, IPs, paths, UUIDs and hex ids are masked; words are kept."""
+    assert mask_variables("High CPU utilization at 95%.") == "High CPU utilization at <NUM>."
+    assert mask_variables("User login failed from IP 10.0.0.12") == "User login failed from IP <IP>"
+    assert mask_variables("Low disk space on /var/log.") == "Low disk space on <PATH>."
+    assert (
+        mask_variables("Job 123e4567-e89b-12d3-a456-426614174000 crashed at 0x7ffe")
+        == "Job <UUID> crashed at <HEX>"
+    )
+
+
+def test_miner_groups_messages_that_differ_only_in_variables():
+    """Messages with the same masked shape share a template; different words do not."""
+    miner = TemplateMiner()
+    first = miner.add("High CPU utilization at 95%.")
+    second = miner.add("High CPU utilization at 96%.")
+    restarted = miner.add("Service restarted successfully.")
+    stopped = miner.add("Service stopped successfully.")
+
+    assert first is second
+    assert first.representative == "High CPU utilization at 95%."
+    assert first.size == 2
+    assert restarted is not stopped
+    assert len(miner.templates) == 3
+
+
+def test_miner_generalizes_templates_with_wildcards():
+    """A near match widens the template instead of creating a new one."""
+    miner = TemplateMiner()
+    miner.add("Queue consumer lagging on partition p7a for topic orders")
+    template = miner.add("Queue consumer lagging on partition p12b for topic orders")
+
+    assert len(miner.templates) == 1
+    assert template.text == "Queue consumer lagging on partition <*> for topic orders"
+
+
+def test_miner_never_wildcards_plain_words():
+    """Long messages differing in one real word (failure vs recovery) keep separate templates."""
+    pairs = [
+        ("Database connection failed for user admin", "Database connection restored for user admin"),
+        ("Backup job completed for volume data", "Backup job failed for volume data"),
+        ("Service nginx restarted successfully on node", "Service nginx stopped successfully on node"),
+        ("Queue consumer lagging on partition alpha for topic orders",
+         "Queue consumer lagging on partition beta for topic orders"),
+    ]
+    for first, second in pairs:
+        miner = TemplateMiner()
+        assert miner.add(first) is not miner.add(second), (first, second)
+        assert len(miner.templates) == 2
+
+
+def test_failure_and_recovery_alerts_are_not_clustered_together():
+    base_time = datetime.now(UTC)
+    alerts = [
+        Alert(host="db-01", timestamp=base_time, severity=5, message="Database connection failed for user admin"),
+        Alert(host="db-01", timestamp=base_time + timedelta(minutes=1), severity=5,
+              message="Database connection restored for user admin"),
+    ]
+
+    response = triage_agent.process_alert_triage(alerts, engine="template")
+
+    assert sorted(cluster.count for cluster in response.clusters) == [1, 1]
+
+
+def test_triage_embeds_once_per_template(fake_model):
+    """Alerts that share a template on the same host and window form one cluster from one embedding."""
+    base_time = datetime.now(UTC)
+    alerts = [
+        Alert(host="server-db-01", timestamp=base_time + timedelta(seconds=i), severity=5, message=f"High CPU utilization at {90 + i}%.")
+        for i in range(10)
+    ] + [
+        Alert(host="server-db-01", timestamp=base_time, severity=5, message="Replication lag detected on replica set"),
+    ]
+
+    response = triage_agent.process_alert_triage(alerts)
+
+    assert fake_model.encoded_messages == 2
+    counts = sorted(cluster.count for cluster in response.clusters)
+    assert counts == [1, 10]
+
+
+def test_group_by_template_clusters_each_group_by_template():
+    groups = [
+        ["Disk 91% full on /data", "Disk 97% full on /var/log", "Service nginx restarted"],
+        ["Service nginx restarted", "Service nginx stopped"],
+    ]
+
+    assert group_by_template(groups) == [[[0, 1], [2]], [[0], [1]]]
+
+
+def test_miner_wildcards_ids_with_digits():
+    miner = TemplateMiner()
+    miner.add("Replica node-12a fell behind the primary by a lot")
+    template = miner.add("Replica node-7b fell behind the primary by a lot")
+    miner.add("Replica cafbbaba fell behind the primary by a lot")
+
+    assert len(miner.templates) == 1
+    assert template.text == "Replica <*> fell behind the primary by a lot"
@@ -1,42 +1,20 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
+from sentence_transformers import util
 # Import UTC for timezone-aware datetimes
 from datetime import datetime, timedelta, UTC
 
 # Import the main app and models to be used in tests.
 from main import app
+from agents import triage_agent
 from models.models import Alert
+from tests.conftest import FakeEmbeddingModel, install_fake_model
 
 # The TestClient allows us to make requests to the FastAPI app in tests.
 client = TestClient(app)
 
-# --- Test Data Fixtures ---
-
-@pytest.fixture
-def sample_alerts() -> list[Alert]:
-    """Provides a list of sample alerts for testing various scenarios."""
-    # FIX: Use datetime.now(UTC) instead of the deprecated utcnow()
-    base_time = datetime.now(UTC)
-    return [
-        # --- Cluster 1 (db-01, High CPU) --- should form one cluster
-        Alert(host="server-db-01", timestamp=base_time, severity=7, message="High CPU utilization at 95%."),
-        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=1), severity=7, message="CPU utilization is very high, reached 96%."),
-        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=2), severity=7, message="Warning: CPU usage remains high at 94%."),
-        
-        # --- Cluster 2 (web-01, Disk Space) --- should form another cluster
-        Alert(host="server-web-01", timestamp=base_time + timedelta(minutes=5), severity=6, message="Low disk space on /var/log."),
-        Alert(host="server-web-01", timestamp=base_time + timedelta(minutes=6), severity=6, message="Disk space is running low on /var/log."),
-
-        # --- Critical Alert (db-01) --- should be identified as critical
-        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=3), severity=9, message="CRITICAL: Database connection failed."),
-
-        # --- Isolated Alert (far in time) --- should be its own cluster
-        Alert(host="server-db-01", timestamp=base_time + timedelta(minutes=30), severity=5, message="Service restarted successfully."),
-        
-        # --- Unrelated Alert (different host) --- should be its own cluster
-        Alert(host="server-app-01", timestamp=base_time, severity=4, message="User login failed from IP 1.2.3.4")
-    ]
-
 # --- Tests for the /agents/triage Endpoint ---
 
 def test_triage_endpoint_success(sample_alerts):
@@ -46,7 +24,7 @@ def test_triage_endpoint_success(sample_alerts):
     # FIX: Use model_dump(mode='json') to create a JSON-serializable dictionary.
     # This converts 'datetime' to a string, fixing the TypeError.
     payload = {"alerts": [alert.model_dump(mode='json') for alert in sample_alerts]}
-    response = client.post("/agents/triage", json=payload)
+    response = client.post("/agents/triage", json=payload, params={"engine": "embedding"})
     
     assert response.status_code == 200
     data = response.json()
@@ -97,7 +75,7 @@ def test_triage_endpoint_no_clusters_just_critical():
     ]
     # FIX: Use model_dump(mode='json')
     payload = {"alerts": [alert.model_dump(mode='json') for alert in alerts]}
-    response = client.post("/agents/triage", json=payload)
+    response = client.post("/agents/triage", json=payload, params={"engine": "embedding"})
     
     assert response.status_code == 200
     data = response.json()
@@ -109,4 +87,70 @@ def test_triage_endpoint_bad_payload():
     Tests the endpoint's validation with a malformed request body.
     """
     response = client.post("/agents/triage", json={"not_alerts": []})
-    assert response.status_code == 422 # Unprocessable Entity
\ No newline at end of file
+    assert response.status_code == 422 # Unprocessable Entity
+
+# --- Tests for the batched embedding pipeline ---
+
+def _storm_alerts(hosts: int, groups_per_host: int) -> list[Alert]:
+    """Builds an alert storm with several temporal groups on every host."""
+    base_time = datetime.now(UTC)
+    alerts = []
+    for h in range(hosts):
+        for g in range(groups_per_host):
+            group_start = base_time + timedelta(hours=g)
+            alerts.append(Alert(host=f"host-{h}", timestamp=group_start, severity=5, message="Disk usage high on volume data"))
+            alerts.append(Alert(host=f"host-{h}", timestamp=group_start + timedelta(minutes=1), severity=5, message="Disk usage high on volume data"))
+            alerts.append(Alert(host=f"host-{h}", timestamp=group_start + timedelta(minutes=2), severity=6, message="Memory pressure detected on node"))
+    return alerts
+
+
+def _per_group_triage(model, alerts: list[Alert]) -> int:
+    """Reference implementation of the previous path: one encode call per temporal group."""
+    by_host: dict[str, list[Alert]] = {}
+    for alert in alerts:
+        by_host.setdefault(alert.host, []).append(alert)
+    cluster_count = 0
+    for host_alerts in by_host.values():
+        for group in triage_agent._split_temporal_groups(sorted(host_alerts, key=lambda a: a.timestamp)):
+            embeddings = model.encode([a.message for a in group], convert_to_tensor=True)
+            cluster_count += len(util.community_detection(embeddings, min_community_size=1, threshold=triage_agent.SIMILARITY_THRESHOLD))
+    return cluster_count
+
+
+def test_process_alert_triage_encodes_unique_messages_once(fake_model):
+    """
+    All temporal groups of a request share a single encode call over the unique messages.
+    """
+    alerts = _storm_alerts(hosts=20, groups_per_host=3)
+    response = triage_agent.process_alert_triage(alerts)
+
+    assert fake_model.encode_calls == 1
+    assert fake_model.encoded_messages == 2
+    # Every temporal group yields one disk cluster and one memory cluster.
+    assert len(response.clusters) == 20 * 3 * 2
+    assert {c.count for c in response.clusters} == {1, 2}
+
+
+def test_batched_encoding_is_faster_than_per_group_encoding(monkeypatch):
+    """
+    Compares latency of the batched pipeline against per-group encoding when every
+    forward pass carries a fixed overhead, and checks both produce the same clusters.
+    """
+    model = FakeEmbeddingModel(per_batch_overhead=0.002)
+    install_fake_model(monkeypatch, model)
+    alerts = _storm_alerts(hosts=50, groups_per_host=4)
+
+    started = time.perf_counter()
+    per_group_clusters = _per_group_triage(model, alerts)
+    per_group_seconds = time.perf_counter() - started
+    per_group_calls = model.encode_calls
+
+    model.encode_calls = 0
+    started = time.perf_counter()
+    response = triage_agent.process_alert_triage(alerts)
+    batched_seconds = time.perf_counter() - started
+
+    assert len(response.clusters) == per_group_clusters
+    assert per_group_calls == 50 * 4
+    assert model.encode_calls == 1
+    assert batched_seconds < per_group_seconds
@@ -0,0 +1,251 @@
+"""Backend ticket client for the alert triage worker.
+
+Tickets are created with ``POST`` requests to the backend's service route:
+
+- **Connection pooling**: ``pooled_session`` mounts an ``HTTPAdapter`` whose
+  pool holds up to ``BACKEND_POOL_SIZE`` keep-alive connections. The pool
+  blocks when every connection is busy, which also bounds how many requests
+  the worker has in flight, instead of opening (and discarding) extra ones.
+- **Batched submission**: ``create_tickets`` sends a JSON array of tickets in
+  one request. The route answers ``{"results": [...]}`` in request order, each
+  item either ``{"ticket": {...}}`` or ``{"error": "..."}``, so every ticket
+  succeeds or fails on its own. If the route rejects arrays (HTTP 405/415, or
+  a 400/404/422 confirmed by posting an empty array) the client falls back
+  to one request per ticket, and tries arrays again after
+  ``BATCH_RECHECK_SECONDS``. An array answered with 413 (body too large) is
+  split in half and each half sent again.
+- ``TicketBatcher`` groups tickets submitted concurrently (e.g. by the
+  pipelined consumer's processors) into such batches and hands each caller
+  its own result, so SQS acknowledgements stay per message.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning "this route does not take arrays" rather than "these tickets failed".
+ARRAY_UNSUPPORTED_STATUSES = (405, 415)
+# Statuses that may mean either; an empty array is posted to tell them apart.
+ARRAY_AMBIGUOUS_STATUSES = (400, 404, 422)
+# Seconds after which a route found not to take arrays is tried with arrays again.
+BATCH_RECHECK_SECONDS = 300.0
+# Status of a request body over the route's size limit.
+PAYLOAD_TOO_LARGE = 413
+
+
+def pooled_session(pool_size: int) -> requests.Session:
+    """A session keeping up to ``pool_size`` keep-alive connections per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@dataclass
+class TicketResult:
+    """Outcome of one ticket in a batch: the created ticket or an error message."""
+
+    ticket: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BackendClient:
+    """Creates tickets on the backend's service route.
+
+    Args:
+        url: Full URL of the service route.
+        token_provider: Returns the shared ``BACKEND_TOKEN``.
+        session: HTTP session; defaults to ``pooled_session(pool_size)``.
+        pool_size: Keep-alive connections (and concurrent requests) for the default session.
+        timeout: Per-request timeout in seconds.
+        recheck_interval: Seconds before arrays are tried again on a route that rejected them.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token_provider: Callable[[], str],
+        session: Optional[requests.Session] = None,
+        pool_size: int = 10,
+        timeout: float = 10,
+        recheck_interval: float = BATCH_RECHECK_SECONDS,
+    ) -> None:
+        self.url = url
+        self.token_provider = token_provider
+        self.session = session or pooled_session(pool_size)
+        self.timeout = timeout
+        self.recheck_interval = recheck_interval
+        self._batch_unsupported_at: Optional[float] = None
+
+    @property
+    def batch_supported(self) -> bool:
+        """False while the route is known not to take arrays and the recheck interval has not passed."""
+        unsupported_at = self._batch_unsupported_at
+        return unsupported_at is None or time.monotonic() - unsupported_at >= self.recheck_interval
+
+    def _accepts_arrays(self) -> bool:
+        """Capability probe: posts an empty array, which creates nothing on any route."""
+        try:
+            response = self._post([])
+            body = response.json() if response.ok else None
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return isinstance(body, dict) and body.get("results") == []
+
+    def _post(self, body: Any) -> requests.Response:
+        return self.session.post(
+            self.url,
+            json=body,
+            headers={"Authorization": f"Bearer {self.token_provider()}"},
+            timeout=self.timeout,
+        )
+
+    def create_ticket(self, ticket: Dict[str, Any]) -> Dict[str, Any]:
+        """Creates one ticket and returns it. Raises on failure."""
+        response = self._post(ticket)
+        response.raise_for_status()
+        return response.json()
+
+    def create_tickets(self, tickets: List[Dict[str, Any]]) -> List[TicketResult]:
+        """Creates ``tickets`` with one request and returns a result per ticket, in order.
+
+        Raises when the request as a whole fails; every ticket has then failed.
+        """
+        if not tickets:
+            return []
+        if not self.batch_supported:
+            return [self.try_create_ticket(ticket) for ticket in tickets]
+        response = self._post(tickets)
+        status = response.status_code
+        if status == PAYLOAD_TOO_LARGE:
+            if len(tickets) == 1:
+                return [self.try_create_ticket(tickets[0])]
+            half = len(tickets) // 2
+            logger.warning("%s refused %d tickets as too large; splitting the batch", self.url, len(tickets))
+            return self.create_tickets(tickets[:half]) + self.create_tickets(tickets[half:])
+        if status in ARRAY_UNSUPPORTED_STATUSES or status in ARRAY_AMBIGUOUS_STATUSES:
+            if status in ARRAY_UNSUPPORTED_STATUSES or not self._accepts_arrays():
+                logger.warning(
+                    "%s rejected a ticket array (HTTP %d); sending tickets one at a time for %.0f s",
+                    self.url, status, self.recheck_interval,
+                )
+                self._batch_unsupported_at = time.monotonic()
+            # Otherwise arrays work and these tickets were refused: either way, each
+            # ticket gets its own request and result.
+            return [self.try_create_ticket(ticket) for ticket in tickets]
+        response.raise_for_status()
+        body = response.json()
+        items = body.get("results") if isinstance(body, dict) else None
+        if not isinstance(items, list) or len(items) != len(tickets):
+            raise ValueError(f"Expected {len(tickets)} results from {self.url}, got {body!r:.200}")
+        return [
+            TicketResult(ticket=item["ticket"]) if isinstance(item, dict) and "ticket" in item
+            else TicketResult(error=str(item.get("error") if isinstance(item, dict) else item))
+            for item in items
+        ]
+
+    def try_create_ticket(self, ticket: Dict[str, Any]) -> TicketResult:
+        """Like ``create_ticket``, but returns the failure as a result instead of raising."""
+        try:
+            return TicketResult(ticket=self.create_ticket(ticket))
+        except Exception as exc:  # pylint: disable=broad-except
+            return TicketResult(error=str(exc))
+
+
+class TicketBatcher:
+    """Collects tickets from concurrent callers into batched backend requests.
+
+    A batch is sent once ``batch_size`` tickets are waiting or the oldest one
+    has waited ``flush_interval`` seconds; up to ``max_in_flight`` batches are
+    sent at a time.
+
+    Args:
+        client: The backend client sending the batches.
+        batch_size: Maximum tickets per request.
+        flush_interval: Longest time a ticket waits for a fuller batch.
+        max_in_flight: Concurrent batch requests (at most the connection pool size helps).
+    """
+
+    def __init__(
+        self, client: BackendClient, batch_size: int, flush_interval: float = 0.05, max_in_flight: int = 1
+    ) -> None:
+        self.client = client
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_in_flight = max(1, max_in_flight)
+        self._senders: Optional[ThreadPoolExecutor] = None
+        self._pending: "queue.Queue[Optional[Tuple[Dict[str, Any], Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def submit(self, ticket: Dict[str, Any]) -> "Future[Dict[str, Any]]":
+        """Queues ``ticket``; the future resolves to the created ticket or raises its error."""
+        with self._lock:
+            if self._thread is None:
+                self._senders = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="ticket-batch")
+                self._thread = threading.Thread(target=self._run, args=(self._senders,), name="ticket-batcher", daemon=True)
+                self._thread.start()
+        future: "Future[Dict[str, Any]]" = Future()
+        self._pending.put((ticket, future))
+        return future
+
+    def close(self) -> None:
+        """Sends what is still queued and stops the batching thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            senders, self._senders = self._senders, None
+        if thread is not None:
+            self._pending.put(None)
+            thread.join()
+            senders.shutdown(wait=True)
+
+    def _run(self, senders: ThreadPoolExecutor) -> None:
+        closing = False
+        while not closing:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            senders.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        with self._lock:
+            self.batches += 1
+        try:
+            results = self.client.create_tickets([ticket for ticket, _ in batch])
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if result.ok:
+                future.set_result(result.ticket)
+            else:
+                future.set_exception(RuntimeError(f"Ticket rejected by backend: {result.error}"))
@@ -0,0 +1,169 @@
+"""Buffered CloudWatch metrics for the alert triage worker.
+
+Publishing every data point with its own ``PutMetricData`` call puts an AWS
+round-trip on the processing path of each alert. ``MetricsAggregator`` keeps
+metrics in memory instead and publishes them from a background thread:
+
+- **Counters** (``increment``) are summed per metric name and dimensions.
+- **Latencies** (``observe``) are kept as CloudWatch statistic sets
+  (``SampleCount``, ``Sum``, ``Minimum``, ``Maximum``) per name and dimensions,
+  so averages and extremes survive aggregation.
+- A flush runs every ``flush_interval`` seconds, or early once ``max_series``
+  distinct series are buffered, sending up to ``MAX_DATUMS_PER_CALL`` data
+  points per ``PutMetricData`` call. ``close`` stops the thread after a final flush.
+
+With ``flush_interval`` of 0 every data point is published immediately, as
+before. Publishing errors are logged and the data points dropped: metrics
+never fail the pipeline.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# PutMetricData accepts at most 1000 data points per call.
+MAX_DATUMS_PER_CALL = 1000
+
+_SeriesKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def _series_key(name: str, unit: str, dimensions: Optional[Dict[str, str]]) -> _SeriesKey:
+    return name, unit, tuple(sorted((str(k), str(v)) for k, v in (dimensions or {}).items()))
+
+
+def _dimensions(key: _SeriesKey) -> List[Dict[str, str]]:
+    return [{"Name": name, "Value": value} for name, value in key[2]]
+
+
+class MetricsAggregator:
+    """Accumulates counters and latency statistic sets and publishes them in batches.
+
+    Args:
+        put_metric_data: Called like ``cloudwatch.put_metric_data(Namespace=..., MetricData=[...])``.
+        namespace: CloudWatch namespace of every metric.
+        flush_interval: Seconds between flushes; 0 publishes every data point immediately.
+        max_series: Buffered series that trigger an early flush.
+    """
+
+    def __init__(
+        self,
+        put_metric_data: Callable[..., Any],
+        namespace: str,
+        flush_interval: float = 60.0,
+        max_series: int = 500,
+    ) -> None:
+        self.put_metric_data = put_metric_data
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.max_series = max(1, max_series)
+        self._counters: Dict[_SeriesKey, float] = {}
+        self._statistics: Dict[_SeriesKey, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+        self.dropped = 0
+
+    # --- Recording ---
+
+    def increment(self, name: str, value: float = 1.0, dimensions: Optional[Dict[str, str]] = None) -> None:
+        """Adds ``value`` to a counter (unit ``Count``)."""
+        key = _series_key(name, "Count", dimensions)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+        self._recorded()
+
+    def observe(
+        self, name: str, value: float, unit: str = "Milliseconds", dimensions: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Adds one sample (e.g. a latency) to a statistic set."""
+        key = _series_key(name, unit, dimensions)
+        with self._lock:
+            stats = self._statistics.get(key)
+            if stats is None:
+                self._statistics[key] = {"SampleCount": 1.0, "Sum": value, "Minimum": value, "Maximum": value}
+            else:
+                stats["SampleCount"] += 1
+                stats["Sum"] += value
+                stats["Minimum"] = min(stats["Minimum"], value)
+                stats["Maximum"] = max(stats["Maximum"], value)
+        self._recorded()
+
+    def _recorded(self) -> None:
+        if self.flush_interval <= 0 or self._closing:
+            self.flush()
+            return
+        self._ensure_started()
+        with self._lock:
+            full = len(self._counters) + len(self._statistics) >= self.max_series
+        if full:
+            self._wake.set()
+
+    # --- Publishing ---
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closing:
+                self._thread = threading.Thread(target=self._run, name="cloudwatch-metrics", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self._closing:
+                return
+
+    def _take(self) -> List[Dict[str, Any]]:
+        """Swaps out the buffered series and returns them as PutMetricData data points."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            statistics, self._statistics = self._statistics, {}
+        timestamp = datetime.now(timezone.utc)
+        data = [
+            {"MetricName": key[0], "Dimensions": _dimensions(key), "Timestamp": timestamp, "Value": value, "Unit": key[1]}
+            for key, value in counters.items()
+        ]
+        data.extend(
+            {"MetricName": key[0], "Dimensions": _dimensions(key), "Timestamp": timestamp, "StatisticValues": stats, "Unit": key[1]}
+            for key, stats in statistics.items()
+        )
+        return data
+
+    def flush(self) -> int:
+        """Publishes everything buffered now. Returns the number of data points published."""
+        with self._flush_lock:
+            data = self._take()
+            published = 0
+            for start in range(0, len(data), MAX_DATUMS_PER_CALL):
+                batch = data[start:start + MAX_DATUMS_PER_CALL]
+                try:
+                    self.put_metric_data(Namespace=self.namespace, MetricData=batch)
+                except Exception:  # pylint: disable=broad-except
+                    # Metrics must never fail the pipeline.
+                    logger.warning("Could not publish %d metric data points", len(batch), exc_info=True)
+                    self.dropped += len(batch)
+                    continue
+                published += len(batch)
+            self.published += published
+            return published
+
+    def close(self) -> None:
+        """Stops the flush thread after a final flush."""
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+        self.flush()
@@ -19,6 +19,19 @@ class WorkerConfig:
     cloudwatch_endpoint_url: Optional[str] = None
     sqs_wait_time_seconds: int = 20
     sqs_max_messages: int = 5
+    sqs_visibility_timeout: int = 60
+    sqs_pollers: int = 2
+    worker_processors: int = 1
+    work_queue_size: int = 20
+    batch_window_seconds: float = 0.0
+    batch_max_alerts: int = 500
+    summary_cache_size: int = 1000
+    summary_cache_ttl_seconds: float = 3600.0
+    backend_pool_size: int = 10
+    backend_batch_size: int = 0
+    backend_batch_interval_seconds: float = 0.05
+    metrics_flush_interval_seconds: float = 60.0
+    metrics_max_series: int = 500
 
     @classmethod
     def from_env(cls) -> "WorkerConfig":
@@ -44,6 +57,29 @@ class WorkerConfig:
             cloudwatch_endpoint_url=os.environ.get("AWS_CLOUDWATCH_ENDPOINT"),
             sqs_wait_time_seconds=int(os.environ.get("SQS_WAIT_TIME", "20")),
             sqs_max_messages=int(os.environ.get("SQS_MAX_MESSAGES", "5")),
+            sqs_visibility_timeout=int(
+                os.environ.get("SQS_VISIBILITY_TIMEOUT", "60")
+            ),
+            sqs_pollers=int(os.environ.get("SQS_POLLERS", "2")),
+            worker_processors=int(os.environ.get("WORKER_PROCESSORS", "1")),
+            work_queue_size=int(os.environ.get("WORK_QUEUE_SIZE", "20")),
+            batch_window_seconds=float(
+                os.environ.get("ALERT_BATCH_WINDOW_SECONDS", "0")
+            ),
+            batch_max_alerts=int(os.environ.get("ALERT_BATCH_MAX_ALERTS", "500")),
+            summary_cache_size=int(os.environ.get("SUMMARY_CACHE_SIZE", "1000")),
+            summary_cache_ttl_seconds=float(
+                os.environ.get("SUMMARY_CACHE_TTL_SECONDS", "3600")
+            ),
+            backend_pool_size=int(os.environ.get("BACKEND_POOL_SIZE", "10")),
+            backend_batch_size=int(os.environ.get("BACKEND_BATCH_SIZE", "0")),
+            backend_batch_interval_seconds=float(
+                os.environ.get("BACKEND_BATCH_INTERVAL_SECONDS", "0.05")
+            ),
+            metrics_flush_interval_seconds=float(
+                os.environ.get("METRICS_FLUSH_INTERVAL_SECONDS", "60")
+            ),
+            metrics_max_series=int(os.environ.get("METRICS_MAX_SERIES", "500")),
         )
 
     def validate(self) -> None:
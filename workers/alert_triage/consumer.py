@@ -0,0 +1,299 @@
+"""Pipelined SQS consumer for the alert triage worker.
+
+``AlertTriageWorker._poll_once`` receives a batch and processes it one message
+at a time, so throughput is capped by serialized LLM and backend round-trips.
+``PipelinedConsumer`` overlaps them:
+
+- **Pollers**: several threads long-poll SQS concurrently and feed a work queue.
+- **Processors**: a configurable pool of threads runs the handler on each message.
+- **Backpressure**: at most ``queue_size`` messages are held (queued or being
+  processed) at a time. Pollers reserve capacity before each receive and pause
+  while the work queue is full, so messages are never received only to sit
+  until their visibility timeout expires.
+- **Batched acknowledgements**: successful messages are deleted with
+  ``DeleteMessageBatch``, up to 10 receipt handles per call.
+- **Visibility heartbeat**: messages still held after half of their visibility
+  timeout are extended with ``ChangeMessageVisibilityBatch``, so slow items are
+  not redelivered to another consumer while they are being processed.
+
+Failed messages are not deleted; SQS redelivers them after the visibility
+timeout and eventually dead-letters them, exactly as with ``_poll_once``.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import WorkerConfig
+
+logger = logging.getLogger(__name__)
+
+# SQS limit for receive and batch calls.
+SQS_BATCH_LIMIT = 10
+
+
+class _Held:
+    """A received message that has not been acknowledged or released yet."""
+
+    __slots__ = ("message", "visible_until")
+
+    def __init__(self, message: Dict[str, Any], visible_until: float) -> None:
+        self.message = message
+        self.visible_until = visible_until
+
+
+class PipelinedConsumer:
+    """Concurrent pollers and processors around a bounded work queue.
+
+    Args:
+        handler: Processes one SQS message; raising leaves it on the queue.
+        sqs_client: boto3 SQS client (or ``InMemorySQS``).
+        queue_url: The queue to consume.
+        pollers: Number of concurrent long-poll threads.
+        processors: Number of threads running ``handler``.
+        queue_size: Maximum number of messages held at once.
+        max_messages: Messages requested per receive (at most 10).
+        wait_time_seconds: Long-poll wait per receive.
+        visibility_timeout: Visibility timeout requested on receive and on each extension.
+        delete_flush_interval: Longest time an acknowledgement waits for a fuller batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        sqs_client: Any,
+        queue_url: str,
+        pollers: int = 2,
+        processors: int = 4,
+        queue_size: int = 20,
+        max_messages: int = SQS_BATCH_LIMIT,
+        wait_time_seconds: float = 20,
+        visibility_timeout: float = 60,
+        delete_flush_interval: float = 0.2,
+    ) -> None:
+        self.handler = handler
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.pollers = max(1, pollers)
+        self.processors = max(1, processors)
+        self.queue_size = max(1, queue_size)
+        self.max_messages = max(1, min(max_messages, SQS_BATCH_LIMIT))
+        self.wait_time_seconds = wait_time_seconds
+        self.visibility_timeout = visibility_timeout
+        self.delete_flush_interval = delete_flush_interval
+
+        self._work: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._acks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._held: Dict[str, _Held] = {}
+        self._reserved = 0
+        self._capacity = threading.Condition()
+        self._stopping = threading.Event()
+        self._drained = threading.Event()
+        self._threads: Dict[str, List[threading.Thread]] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "received": 0,
+            "processed": 0,
+            "failed": 0,
+            "deleted": 0,
+            "delete_batches": 0,
+            "visibility_extensions": 0,
+            "backpressure_pauses": 0,
+        }
+
+    @classmethod
+    def from_config(cls, worker: Any, config: WorkerConfig) -> "PipelinedConsumer":
+        return cls(
+            handler=worker._handle_message,  # pylint: disable=protected-access
+            sqs_client=worker.sqs,
+            queue_url=config.sqs_queue_url,
+            pollers=config.sqs_pollers,
+            processors=config.worker_processors,
+            queue_size=config.work_queue_size,
+            max_messages=config.sqs_max_messages,
+            wait_time_seconds=config.sqs_wait_time_seconds,
+            visibility_timeout=config.sqs_visibility_timeout,
+        )
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._capacity:
+            stats["held"] = len(self._held)
+        return stats
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        def spawn(role: str, target: Callable[[], None], count: int) -> None:
+            self._threads[role] = [
+                threading.Thread(target=target, name=f"sqs-{role}-{i}", daemon=True) for i in range(count)
+            ]
+            for thread in self._threads[role]:
+                thread.start()
+
+        self._stopping.clear()
+        self._drained.clear()
+        spawn("deleter", self._delete_loop, 1)
+        spawn("heartbeat", self._heartbeat_loop, 1)
+        spawn("processor", self._process_loop, self.processors)
+        spawn("poller", self._poll_loop, self.pollers)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops polling, finishes every held message, then flushes acknowledgements."""
+        self._stopping.set()
+        with self._capacity:
+            self._capacity.notify_all()
+        for thread in self._threads.get("poller", []):
+            thread.join(timeout)
+        for _ in self._threads.get("processor", []):
+            self._work.put(None)
+        for thread in self._threads.get("processor", []):
+            thread.join(timeout)
+        self._drained.set()
+        self._acks.put(None)
+        for role in ("deleter", "heartbeat"):
+            for thread in self._threads.get(role, []):
+                thread.join(timeout)
+        self._threads = {}
+
+    # --- Pollers ---
+
+    def _reserve(self) -> int:
+        """Waits for free capacity and reserves room for one receive."""
+        with self._capacity:
+            paused = False
+            while len(self._held) + self._reserved >= self.queue_size and not self._stopping.is_set():
+                if not paused:
+                    self._count("backpressure_pauses")
+                    paused = True
+                self._capacity.wait(0.5)
+            if self._stopping.is_set():
+                return 0
+            wanted = min(self.max_messages, self.queue_size - len(self._held) - self._reserved)
+            self._reserved += wanted
+            return wanted
+
+    def _poll_loop(self) -> None:
+        while not self._stopping.is_set():
+            wanted = self._reserve()
+            if not wanted:
+                continue
+            messages: List[Dict[str, Any]] = []
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=wanted,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    VisibilityTimeout=self.visibility_timeout,
+                )
+                messages = response.get("Messages", [])
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("receive_message failed")
+                time.sleep(1)
+            finally:
+                visible_until = time.monotonic() + self.visibility_timeout
+                with self._capacity:
+                    self._reserved -= wanted
+                    for message in messages:
+                        self._held[message["ReceiptHandle"]] = _Held(message, visible_until)
+                    self._capacity.notify_all()
+            self._count("received", len(messages))
+            for message in messages:
+                self._work.put(message)
+
+    # --- Processors ---
+
+    def _process_loop(self) -> None:
+        while True:
+            message = self._work.get()
+            if message is None:
+                return
+            receipt_handle = message["ReceiptHandle"]
+            try:
+                self.handler(message)
+            except Exception:  # pylint: disable=broad-except
+                # Leave the message on the queue; SQS retries and eventually dead-letters it.
+                logger.exception("Failed to process message %s", message.get("MessageId"))
+                self._count("failed")
+            else:
+                self._count("processed")
+                self._acks.put(receipt_handle)
+            finally:
+                with self._capacity:
+                    self._held.pop(receipt_handle, None)
+                    self._capacity.notify_all()
+
+    # --- Acknowledgements ---
+
+    def _delete_loop(self) -> None:
+        pending: List[str] = []
+        closing = False
+        while not closing:
+            deadline = time.monotonic() + self.delete_flush_interval
+            while len(pending) < SQS_BATCH_LIMIT:
+                try:
+                    receipt_handle = self._acks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if receipt_handle is None:
+                    closing = True
+                    break
+                pending.append(receipt_handle)
+            # On shutdown, drain everything acknowledged so far in full batches.
+            while pending:
+                batch, pending = pending[:SQS_BATCH_LIMIT], pending[SQS_BATCH_LIMIT:]
+                self._delete_batch(batch)
+                if not closing:
+                    break
+
+    def _delete_batch(self, receipt_handles: List[str]) -> None:
+        entries = [{"Id": str(i), "ReceiptHandle": handle} for i, handle in enumerate(receipt_handles)]
+        try:
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        except Exception:  # pylint: disable=broad-except
+            # The messages reappear after their visibility timeout and are processed again.
+            logger.exception("delete_message_batch failed for %d messages", len(entries))
+            return
+        for failure in response.get("Failed", []):
+            logger.warning("Could not delete message %s: %s", failure.get("Id"), failure.get("Code"))
+        self._count("delete_batches")
+        self._count("deleted", len(response.get("Successful", [])))
+
+    # --- Visibility heartbeat ---
+
+    def _heartbeat_loop(self) -> None:
+        # Keeps running while held messages are finished during shutdown.
+        interval = max(self.visibility_timeout / 4, 0.05)
+        while not self._drained.wait(interval):
+            self._extend_visibility()
+
+    def _extend_visibility(self) -> None:
+        now = time.monotonic()
+        with self._capacity:
+            due = [
+                (handle, held) for handle, held in self._held.items()
+                if held.visible_until - now <= self.visibility_timeout / 2
+            ]
+            for _, held in due:
+                held.visible_until = now + self.visibility_timeout
+        for start in range(0, len(due), SQS_BATCH_LIMIT):
+            batch = due[start:start + SQS_BATCH_LIMIT]
+            entries = [
+                {"Id": str(i), "ReceiptHandle": handle, "VisibilityTimeout": self.visibility_timeout}
+                for i, (handle, _) in enumerate(batch)
+            ]
+            try:
+                response = self.sqs.change_message_visibility_batch(QueueUrl=self.queue_url, Entries=entries)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("change_message_visibility_batch failed for %d messages", len(entries))
+                continue
+            self._count("visibility_extensions", len(response.get("Successful", [])))
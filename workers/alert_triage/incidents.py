@@ -0,0 +1,169 @@
+"""Cluster-aware batching for the alert triage worker.
+
+During an alert storm, summarising every SQS alert separately produces
+hundreds of near-identical LLM calls and tickets. In batch mode the worker
+collects alerts over a short window and turns them into *incidents*:
+
+- Alerts are clustered with the triage agent's pipeline (host, 10-minute time
+  window, message similarity; see ``agents/triage_agent.py``). Critical alerts
+  stay individual incidents, as in the triage agent.
+- When the agent's embedding model cannot be loaded, the agent's lexical
+  engine (MinHash/LSH, ``agents/lexical.py``) clusters the alerts instead.
+- Each incident is summarised once and filed as one ticket.
+- Summaries are cached by message template and priority, so a recurring
+  incident reuses its summary without another LLM call.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.templates import mask_variables
+from models.models import Alert
+
+# Number of distinct example messages listed in an incident's ticket.
+MAX_SAMPLE_MESSAGES = 5
+
+
+@dataclass
+class Incident:
+    """A group of alerts from one batch that gets one summary and one ticket."""
+
+    host: str
+    representative_message: str
+    severity: int
+    start_time: datetime
+    end_time: datetime
+    payload_indices: List[int]
+    messages: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.payload_indices)
+
+
+def to_alert(index: int, payload: Dict[str, Any]) -> Alert:
+    """Maps a raw SQS alert payload to the triage agent's Alert, with its batch index as id.
+
+    Raises:
+        ValueError: If the payload is not a JSON object or cannot form a valid Alert.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError(f"Alert payload must be a JSON object, not {type(payload).__name__}")
+    message = payload.get("summary") or payload.get("message") or str(payload.get("details", "Alert received"))
+    try:
+        severity = min(10, max(1, int(float(payload.get("severity", 5)))))
+    except (TypeError, ValueError, OverflowError):
+        # Non-numeric, NaN or infinite severities.
+        severity = 5
+    try:
+        timestamp = datetime.fromisoformat(str(payload["timestamp"]))
+    except (KeyError, ValueError):
+        timestamp = datetime.now(timezone.utc)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return Alert(id=str(index), host=str(payload.get("host", "unknown")), timestamp=timestamp,
+                 severity=severity, message=str(message))
+
+
+def is_valid_payload(payload: Any) -> bool:
+    """Whether a decoded SQS body can be clustered; invalid ones are left on the queue."""
+    try:
+        to_alert(0, payload)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _incident(host: str, alerts: List[Alert]) -> Incident:
+    alerts = sorted(alerts, key=lambda a: a.timestamp)
+    return Incident(
+        host=host,
+        representative_message=alerts[0].message,
+        severity=max(alert.severity for alert in alerts),
+        start_time=alerts[0].timestamp,
+        end_time=alerts[-1].timestamp,
+        payload_indices=[int(alert.id) for alert in alerts],
+        messages=list(dict.fromkeys(alert.message for alert in alerts))[:MAX_SAMPLE_MESSAGES],
+    )
+
+
+def cluster_payloads(payloads: List[Dict[str, Any]]) -> List[Incident]:
+    """Groups raw alert payloads into incidents, critical alerts first."""
+    if not payloads:
+        return []
+    # Imported lazily: only batch mode needs the triage pipeline (and torch).
+    from agents import triage_agent
+
+    alerts = [to_alert(index, payload) for index, payload in enumerate(payloads)]
+    response = triage_agent.process_alert_triage(alerts, engine="auto")
+    groups = [[alert] for alert in response.critical_alerts] + [cluster.alerts for cluster in response.clusters]
+    return [_incident(group[0].host, group) for group in groups]
+
+
+def summary_key(message: str, priority: str) -> Tuple[str, str]:
+    """Cache key of a summary: the message template and the incident's priority."""
+    return mask_variables(" ".join(message.lower().split())), priority
+
+
+class SummaryCache:
+    """Thread-safe LRU cache of incident summaries with a time-to-live.
+
+    Args:
+        max_entries: Maximum number of cached summaries (0 disables the cache).
+        ttl_seconds: Age after which a summary is summarised afresh.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], summary: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), summary)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_create(
+        self, key: Tuple[str, str], create: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Returns the cached summary, or creates it once even when incidents of the
+        same template are filed concurrently."""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            summary = self.get(key)
+            if summary is None:
+                summary = create()
+                self.put(key, summary)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,61 @@
+"""In-memory stand-in for the CloudWatch client.
+
+Implements ``put_metric_data`` with the service's request validation (namespace,
+data points per call, ``Value`` vs ``StatisticValues``, dimension limits) and
+records every call, so tests and local runs can check what the worker
+publishes and how it was batched without AWS or LocalStack.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional
+
+MAX_DATUMS_PER_CALL = 1000
+MAX_DIMENSIONS = 30
+STATISTIC_KEYS = {"SampleCount", "Sum", "Minimum", "Maximum"}
+
+
+class InMemoryCloudWatch:
+    """Records ``PutMetricData`` calls and aggregates what they published."""
+
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def put_metric_data(self, Namespace: str = "", MetricData: List[Dict[str, Any]] = (), **_: Any) -> Dict[str, Any]:
+        if not Namespace or Namespace.startswith("AWS/"):
+            raise ValueError(f"Invalid namespace {Namespace!r}")
+        if not 1 <= len(MetricData) <= MAX_DATUMS_PER_CALL:
+            raise ValueError(f"MetricData must contain between 1 and {MAX_DATUMS_PER_CALL} items")
+        for datum in MetricData:
+            if not datum.get("MetricName"):
+                raise ValueError("MetricName is required")
+            if ("Value" in datum) == ("StatisticValues" in datum):
+                raise ValueError("Exactly one of Value and StatisticValues must be set")
+            if "StatisticValues" in datum and set(datum["StatisticValues"]) != STATISTIC_KEYS:
+                raise ValueError(f"StatisticValues needs exactly {sorted(STATISTIC_KEYS)}")
+            if len(datum.get("Dimensions", [])) > MAX_DIMENSIONS:
+                raise ValueError(f"At most {MAX_DIMENSIONS} dimensions per metric")
+        with self._lock:
+            self.calls.append({"Namespace": Namespace, "MetricData": list(MetricData)})
+        return {}
+
+    # --- Inspection ---
+
+    def datums(self, name: str, dimensions: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Every published data point of ``name`` (with exactly ``dimensions``, if given)."""
+        wanted = None if dimensions is None else sorted(dimensions.items())
+        with self._lock:
+            return [
+                datum for call in self.calls for datum in call["MetricData"]
+                if datum["MetricName"] == name
+                and (wanted is None or sorted((d["Name"], d["Value"]) for d in datum.get("Dimensions", [])) == wanted)
+            ]
+
+    def total(self, name: str, dimensions: Optional[Dict[str, str]] = None) -> float:
+        """Sum of a metric's values and statistic-set sums."""
+        return sum(
+            datum["Value"] if "Value" in datum else datum["StatisticValues"]["Sum"]
+            for datum in self.datums(name, dimensions)
+        )
@@ -0,0 +1,166 @@
+"""In-memory stand-in for the SQS client.
+
+Implements the subset of the boto3 SQS client used by the worker and the
+pipelined consumer (``send_message``, ``receive_message`` with long polling,
+``delete_message(_batch)`` and ``change_message_visibility(_batch)``) with
+SQS semantics: received messages become invisible for the visibility timeout
+and reappear unless deleted, and stale receipt handles cannot delete a
+message. Useful for tests and local load runs without LocalStack.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+
+class _Message:
+    __slots__ = ("message_id", "body", "visible_at", "receipt_handle", "receive_count")
+
+    def __init__(self, body: str) -> None:
+        self.message_id = str(uuid.uuid4())
+        self.body = body
+        self.visible_at = 0.0
+        self.receipt_handle: Optional[str] = None
+        self.receive_count = 0
+
+
+class InMemorySQS:
+    """A single-process SQS queue (the ``QueueUrl`` argument is accepted and ignored)."""
+
+    def __init__(self, visibility_timeout: float = 30.0) -> None:
+        self.visibility_timeout = visibility_timeout
+        self._messages: Dict[str, _Message] = {}
+        self._by_receipt: Dict[str, _Message] = {}
+        self._condition = threading.Condition()
+        self._receipts = itertools.count()
+        self.calls: Dict[str, int] = {}
+
+    def _count(self, operation: str) -> None:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    # --- Producer side ---
+
+    def send_message(self, QueueUrl: str = "", MessageBody: str = "", **_: Any) -> Dict[str, Any]:
+        message = _Message(MessageBody)
+        with self._condition:
+            self._count("send_message")
+            self._messages[message.message_id] = message
+            self._condition.notify_all()
+        return {"MessageId": message.message_id}
+
+    # --- Consumer side ---
+
+    def _take_visible(self, limit: int, visibility_timeout: float) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        taken = []
+        for message in self._messages.values():
+            if len(taken) >= limit:
+                break
+            if message.visible_at > now:
+                continue
+            if message.receipt_handle is not None:
+                self._by_receipt.pop(message.receipt_handle, None)
+            message.receipt_handle = f"{message.message_id}:{next(self._receipts)}"
+            message.visible_at = now + visibility_timeout
+            message.receive_count += 1
+            self._by_receipt[message.receipt_handle] = message
+            taken.append({
+                "MessageId": message.message_id,
+                "ReceiptHandle": message.receipt_handle,
+                "Body": message.body,
+                "Attributes": {"ApproximateReceiveCount": str(message.receive_count)},
+            })
+        return taken
+
+    def receive_message(
+        self,
+        QueueUrl: str = "",
+        MaxNumberOfMessages: int = 1,
+        WaitTimeSeconds: float = 0,
+        VisibilityTimeout: Optional[float] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        if not 1 <= MaxNumberOfMessages <= 10:
+            raise ValueError("MaxNumberOfMessages must be between 1 and 10")
+        timeout = self.visibility_timeout if VisibilityTimeout is None else VisibilityTimeout
+        deadline = time.monotonic() + WaitTimeSeconds
+        with self._condition:
+            self._count("receive_message")
+            while True:
+                taken = self._take_visible(MaxNumberOfMessages, timeout)
+                remaining = deadline - time.monotonic()
+                if taken or remaining <= 0:
+                    return {"Messages": taken} if taken else {}
+                # Wake up on new messages, or when an invisible message may reappear.
+                self._condition.wait(min(remaining, 0.05))
+
+    def delete_message(self, QueueUrl: str = "", ReceiptHandle: str = "", **_: Any) -> Dict[str, Any]:
+        with self._condition:
+            self._count("delete_message")
+            self._delete(ReceiptHandle)
+        return {}
+
+    def _delete(self, receipt_handle: str) -> bool:
+        message = self._by_receipt.pop(receipt_handle, None)
+        if message is None:
+            return False
+        del self._messages[message.message_id]
+        return True
+
+    def delete_message_batch(self, QueueUrl: str = "", Entries: List[Dict[str, str]] = (), **_: Any) -> Dict[str, Any]:
+        if not 1 <= len(Entries) <= 10:
+            raise ValueError("A batch must contain between 1 and 10 entries")
+        successful, failed = [], []
+        with self._condition:
+            self._count("delete_message_batch")
+            for entry in Entries:
+                if self._delete(entry["ReceiptHandle"]):
+                    successful.append({"Id": entry["Id"]})
+                else:
+                    failed.append({"Id": entry["Id"], "Code": "ReceiptHandleIsInvalid", "SenderFault": True})
+        return {"Successful": successful, "Failed": failed}
+
+    def change_message_visibility(
+        self, QueueUrl: str = "", ReceiptHandle: str = "", VisibilityTimeout: float = 0, **_: Any
+    ) -> Dict[str, Any]:
+        with self._condition:
+            self._count("change_message_visibility")
+            self._change_visibility(ReceiptHandle, VisibilityTimeout)
+            self._condition.notify_all()
+        return {}
+
+    def _change_visibility(self, receipt_handle: str, timeout: float) -> bool:
+        message = self._by_receipt.get(receipt_handle)
+        if message is None:
+            return False
+        message.visible_at = time.monotonic() + timeout
+        return True
+
+    def change_message_visibility_batch(
+        self, QueueUrl: str = "", Entries: List[Dict[str, Any]] = (), **_: Any
+    ) -> Dict[str, Any]:
+        if not 1 <= len(Entries) <= 10:
+            raise ValueError("A batch must contain between 1 and 10 entries")
+        successful, failed = [], []
+        with self._condition:
+            self._count("change_message_visibility_batch")
+            for entry in Entries:
+                if self._change_visibility(entry["ReceiptHandle"], entry["VisibilityTimeout"]):
+                    successful.append({"Id": entry["Id"]})
+                else:
+                    failed.append({"Id": entry["Id"], "Code": "ReceiptHandleIsInvalid", "SenderFault": True})
+            self._condition.notify_all()
+        return {"Successful": successful, "Failed": failed}
+
+    # --- Inspection ---
+
+    def approximate_counts(self) -> Dict[str, int]:
+        """Visible and in-flight message counts, like the queue's approximate attributes."""
+        now = time.monotonic()
+        with self._condition:
+            visible = sum(1 for m in self._messages.values() if m.visible_at <= now)
+            return {"visible": visible, "in_flight": len(self._messages) - visible}
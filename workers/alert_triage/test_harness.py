@@ -14,6 +14,20 @@ Usage examples
 
     python workers/alert_triage/test_harness.py --process-sample
 
+4. Replay a synthetic alert storm in batch mode and report how many LLM summaries
+   and tickets it needs compared with one per alert (tickets are not sent anywhere):
+
+    python workers/alert_triage/test_harness.py --storm 300
+
+5. Measure the pipelined consumer against an in-memory queue (no AWS, no backend):
+
+    python workers/alert_triage/test_harness.py --local-load 200 --processors 16 --simulated-latency 0.2
+
+6. Measure ticket submission against a local stub of the backend's service route:
+   a new connection per ticket, pooled keep-alive connections, and pooled batches:
+
+    python workers/alert_triage/test_harness.py --backend-bench 2000 --processors 8 --batch-size 20
+
 Environment variables such as ALERT_TRIAGE_QUEUE_URL, AWS_ENDPOINT_URL, BACKEND_TOKEN, and
 BACKEND_BASE_URL are respected via WorkerConfig.from_env().
 """
@@ -23,13 +37,25 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 import boto3
+import requests
 
+from .backend_client import BackendClient, TicketBatcher, pooled_session
 from .config import WorkerConfig
-from .worker import AlertTriageWorker
+from .consumer import PipelinedConsumer
+from .local_cloudwatch import InMemoryCloudWatch
+from .local_sqs import InMemorySQS
+from .worker import AlertTriageWorker, heuristic_summary
 
 SAMPLE_ALERT_PATH = Path(__file__).parent / "sample_alert.json"
 
@@ -60,12 +86,277 @@ def send_sample_message(config: WorkerConfig) -> None:
 def poll_once(config: WorkerConfig) -> None:
     worker = AlertTriageWorker(config)
     worker._poll_once()  # pylint: disable=protected-access
+    worker.close()
 
 
 def process_sample_direct(config: WorkerConfig) -> None:
     worker = AlertTriageWorker(config)
     alert = load_sample_alert()
     worker.process_alert_payload(alert)
+    worker.close()
+
+
+def run_local_load(config: WorkerConfig, count: int, processors: int, simulated_latency: float) -> None:
+    """Drain ``count`` sample alerts from an in-memory queue with the pipelined consumer.
+
+    Each message is summarised heuristically and then waits ``simulated_latency``
+    seconds in place of the LLM and backend round-trips.
+    """
+    sqs = InMemorySQS(visibility_timeout=config.sqs_visibility_timeout)
+    alert = load_sample_alert()
+    for i in range(count):
+        sqs.send_message(QueueUrl="local", MessageBody=json.dumps({**alert, "id": f"alert-{i}"}))
+
+    def handler(message: Dict[str, Any]) -> None:
+        heuristic_summary(json.loads(message["Body"]))
+        time.sleep(simulated_latency)
+
+    consumer = PipelinedConsumer(
+        handler,
+        sqs,
+        "local",
+        pollers=config.sqs_pollers,
+        processors=processors,
+        queue_size=max(config.work_queue_size, processors),
+        max_messages=10,
+        wait_time_seconds=0.1,
+        visibility_timeout=config.sqs_visibility_timeout,
+    )
+    started = time.perf_counter()
+    consumer.start()
+    while consumer.stats()["processed"] + consumer.stats()["failed"] < count:
+        time.sleep(0.01)
+    consumer.stop()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Processed %d messages in %.2fs (%.1f msg/s; one at a time would take %.1fs): %s",
+        count, elapsed, count / elapsed, count * simulated_latency, consumer.stats(),
+    )
+
+
+class DryRunSession:
+    """Accepts ticket POSTs without a backend, so storms can be replayed offline."""
+
+    def __init__(self) -> None:
+        self.tickets = 0
+
+    def post(self, url: str, json: Dict[str, Any], headers: Dict[str, str], timeout: float) -> "DryRunSession":
+        self.tickets += 1
+        self._ticket = {"id": self.tickets, **json}
+        return self
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return self._ticket
+
+
+STORM_MESSAGES = [
+    "CPU usage above {n}% for 5 minutes",
+    "Disk /var/log is {n}% full",
+    "HTTP 5xx rate at {n}% on upstream 10.0.{n}.12",
+    "Connection pool exhausted after {n} ms wait",
+]
+
+
+def storm_alerts(count: int, hosts: int = 5, seed: int = 0) -> list:
+    """A burst of alerts: a few hosts repeating a few messages with varying numbers."""
+    rng = random.Random(seed)
+    start = datetime(2025, 11, 1, 10, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "id": f"storm-{i}",
+            "source": "prometheus",
+            "host": f"api-{rng.randrange(hosts):02d}",
+            "severity": rng.choice([5, 6, 7]),
+            "summary": rng.choice(STORM_MESSAGES).format(n=rng.randint(80, 99)),
+            "timestamp": (start + timedelta(seconds=rng.randrange(300))).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def run_storm(config: WorkerConfig, count: int) -> None:
+    """Replay two storms in batch mode; the second one shows summary cache reuse."""
+    cloudwatch = InMemoryCloudWatch()
+    worker = AlertTriageWorker(config, http_session=DryRunSession(), cloudwatch_client=cloudwatch)
+    for seed in (0, 1):
+        started = time.perf_counter()
+        report = worker.process_alert_batch(storm_alerts(count, seed=seed))
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Storm %d: %d alerts -> %d incidents, %d tickets, %d LLM summaries "
+            "(per-alert mode: %d of each; %.0f%% fewer LLM calls) in %.2fs",
+            seed + 1, report["alerts"], report["incidents"], report["tickets"], report["summaries"],
+            report["alerts"], 100 * (1 - report["summaries"] / report["alerts"]), elapsed,
+        )
+    logger.info("Summary cache: %s", worker.summary_cache.stats())
+    worker.close()
+    logger.info(
+        "CloudWatch: %d PutMetricData call(s) for %d tickets",
+        len(cloudwatch.calls), cloudwatch.total("TicketsCreated"),
+    )
+
+
+class _StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 overflows when the benchmark opens a new
+    # connection per ticket from many threads, and the kernel resets the rest.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubBackend:
+    """Local stand-in for the backend's ``POST /api/service/tickets`` route.
+
+    Accepts one ticket or an array (answered with ``{"results": [...]}``) and
+    counts connections, requests and tickets. Runs on an ephemeral port.
+
+    Args:
+        request_latency: Seconds of simulated work per request.
+        ticket_latency: Additional seconds per ticket (e.g. one insert each).
+        reject_arrays: Answer arrays with HTTP 400, like a route without batch support.
+        fail_ticket: Tickets for which it returns true are rejected.
+        max_body_bytes: Answer larger request bodies with HTTP 413, like Express's body limit.
+    """
+
+    def __init__(
+        self,
+        request_latency: float = 0.0,
+        ticket_latency: float = 0.0,
+        reject_arrays: bool = False,
+        fail_ticket: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        max_body_bytes: Optional[int] = None,
+    ) -> None:
+        self.request_latency = request_latency
+        self.ticket_latency = ticket_latency
+        self.reject_arrays = reject_arrays
+        self.fail_ticket = fail_ticket or (lambda ticket: False)
+        self.max_body_bytes = max_body_bytes
+        self.connections = 0
+        self.requests = 0
+        self.tickets = 0
+        self._lock = threading.Lock()
+        self._server = _StubServer(("127.0.0.1", 0), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/api/service/tickets"
+
+    def _create(self, ticket: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(self.ticket_latency)
+        if self.fail_ticket(ticket):
+            raise ValueError("rejected")
+        with self._lock:
+            self.tickets += 1
+            return {"id": self.tickets, **ticket}
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self) -> None:
+                super().setup()
+                # Headers and body are separate writes; like Node's server, do not delay them.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self) -> None:  # pylint: disable=invalid-name
+                data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+                if stub.max_body_bytes is not None and len(data) > stub.max_body_bytes:
+                    return self._reply(413, {"error": "request entity too large"})
+                body = json.loads(data)
+                time.sleep(stub.request_latency)
+                if isinstance(body, list):
+                    if stub.reject_arrays:
+                        return self._reply(400, {"error": "expected an object"})
+                    results = []
+                    for ticket in body:
+                        try:
+                            results.append({"ticket": stub._create(ticket)})
+                        except ValueError as exc:
+                            results.append({"error": str(exc)})
+                    return self._reply(200, {"results": results})
+                try:
+                    return self._reply(200, stub._create(body))
+                except ValueError as exc:
+                    return self._reply(500, {"error": str(exc)})
+
+            def _reply(self, status: int, payload: Any) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubBackend":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def run_backend_bench(
+    count: int, concurrency: int, batch_size: int, request_latency: float, ticket_latency: float
+) -> None:
+    """Submit ``count`` tickets to a stub backend three ways and report tickets per second."""
+    tickets = [heuristic_summary({**load_sample_alert(), "id": f"alert-{i}"}) for i in range(count)]
+
+    def token() -> str:
+        return "stub-token"
+
+    def per_ticket(client: BackendClient) -> Callable[[], None]:
+        def run() -> None:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(client.create_ticket, tickets))
+        return run
+
+    def batched(client: BackendClient) -> Callable[[], None]:
+        def run() -> None:
+            # Submitted without waiting, as a batch window files its incidents.
+            batcher = TicketBatcher(client, batch_size, flush_interval=0.01, max_in_flight=concurrency)
+            for future in [batcher.submit(ticket) for ticket in tickets]:
+                future.result()
+            batcher.close()
+        return run
+
+    scenarios = [
+        # The requests module's post() opens a new connection for every call.
+        ("new connection per ticket", lambda url: per_ticket(BackendClient(url, token, session=requests))),
+        ("pooled keep-alive", lambda url: per_ticket(BackendClient(url, token, pool_size=concurrency))),
+        (f"pooled, batches of {batch_size}", lambda url: batched(BackendClient(url, token, pool_size=concurrency))),
+    ]
+    for name, make in scenarios:
+        with StubBackend(request_latency=request_latency, ticket_latency=ticket_latency) as stub:
+            run = make(stub.url)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+        logger.info(
+            "%-26s %6.0f tickets/s  (%d tickets, %d requests, %d connections, %.2fs)",
+            name, count / elapsed, stub.tickets, stub.requests, stub.connections, elapsed,
+        )
 
 
 def parse_args() -> argparse.Namespace:
@@ -73,6 +364,23 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--send-sample", action="store_true", help="Put the sample alert onto the queue")
     parser.add_argument("--poll-once", action="store_true", help="Poll the queue once for messages")
     parser.add_argument("--process-sample", action="store_true", help="Process the sample alert directly without SQS")
+    parser.add_argument("--storm", type=int, help="Replay a storm of N alerts in batch mode (dry run)")
+    parser.add_argument("--local-load", type=int, help="Run the pipelined consumer on N in-memory messages")
+    parser.add_argument("--backend-bench", type=int, help="Submit N tickets to a local stub backend")
+    parser.add_argument(
+        "--processors", type=int, default=16, help="Processor threads for --local-load and --backend-bench"
+    )
+    parser.add_argument("--batch-size", type=int, default=20, help="Tickets per request for --backend-bench")
+    parser.add_argument(
+        "--backend-latency", type=float, default=0.002, help="Stub backend seconds per request for --backend-bench"
+    )
+    parser.add_argument(
+        "--backend-ticket-latency", type=float, default=0.001,
+        help="Stub backend seconds per ticket (one insert each) for --backend-bench",
+    )
+    parser.add_argument(
+        "--simulated-latency", type=float, default=0.2, help="Seconds per message for --local-load"
+    )
     parser.add_argument(
         "--queue-url",
         help="Override ALERT_TRIAGE_QUEUE_URL for this run",
@@ -91,6 +399,14 @@ def main() -> None:
         poll_once(config)
     elif args.process_sample:
         process_sample_direct(config)
+    elif args.storm:
+        run_storm(config, args.storm)
+    elif args.local_load:
+        run_local_load(config, args.local_load, args.processors, args.simulated_latency)
+    elif args.backend_bench:
+        run_backend_bench(
+            args.backend_bench, args.processors, args.batch_size, args.backend_latency, args.backend_ticket_latency
+        )
     else:
         print(__doc__)
 
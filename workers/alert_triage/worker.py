@@ -0,0 +1,491 @@
+"""Alert triage worker.
+
+Turns raw alert events from SQS into backend tickets:
+
+1. Long-poll the alert queue.
+2. Summarise each alert with the LLM (or a heuristic summariser when no
+   ``OPENAI_API_KEY`` is configured) into ``title``, ``priority``,
+   ``description`` and ``steps``.
+3. ``POST`` the summary to the backend's service route with the shared
+   ``BACKEND_TOKEN``, over a pool of keep-alive connections
+   (``backend_client.py``). With ``BACKEND_BATCH_SIZE`` above one, tickets
+   are grouped into array requests with a result per ticket.
+4. Delete the message on success; on failure leave it on the queue so SQS
+   retries and eventually dead-letters it.
+5. Count tickets and failures and time each stage in memory; the totals are
+   published to CloudWatch in batches (``cloudwatch_metrics.py``).
+
+With ``WORKER_PROCESSORS`` greater than one, ``run_forever`` hands the queue to
+the pipelined consumer in ``consumer.py``, which polls and processes
+concurrently.
+
+With ``ALERT_BATCH_WINDOW_SECONDS`` set, alerts are instead collected for that
+window, clustered into incidents (``incidents.py``) and summarised once per
+incident, with one ticket per incident and summaries cached by message template.
+
+Run with ``python -m workers.alert_triage.worker``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import boto3
+import requests
+
+from agents.templates import mask_variables
+
+from .backend_client import BackendClient, TicketBatcher, TicketResult
+from .cloudwatch_metrics import MetricsAggregator
+from .config import WorkerConfig
+from .incidents import Incident, SummaryCache, cluster_payloads, is_valid_payload, summary_key
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = (
+    "Output only valid JSON with keys: title, priority (low|medium|high|critical), "
+    "description, steps [array of short steps].\n"
+    "Summarize: {alert_json}"
+)
+PRIORITIES = ("low", "medium", "high", "critical")
+BACKEND_TIMEOUT_SECONDS = 10
+# SQS limit for receive and batch calls.
+SQS_BATCH_LIMIT = 10
+
+
+def _priority_for_severity(severity: Any) -> str:
+    try:
+        value = float(severity)
+    except (TypeError, ValueError):
+        return "medium"
+    if value >= 9:
+        return "critical"
+    if value >= 7:
+        return "high"
+    if value >= 4:
+        return "medium"
+    return "low"
+
+
+def heuristic_summary(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarise an alert without an LLM, from its severity and text fields."""
+    text = alert.get("summary") or alert.get("message") or "Alert received"
+    host = alert.get("host")
+    details = alert.get("details")
+    description = f"{text} on {host}." if host else f"{text}."
+    if details:
+        description += f" Details: {json.dumps(details, sort_keys=True)}"
+    return {
+        "title": (f"[{host}] {text}" if host else text)[:200],
+        "priority": _priority_for_severity(alert.get("severity")),
+        "description": description,
+        "steps": [
+            f"Check the current state of {host or 'the affected hosts'}.",
+            "Review recent changes and logs around the alert time.",
+            "Mitigate the cause and confirm the alert clears.",
+        ],
+    }
+
+
+def normalize_summary(summary: Dict[str, Any], alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in or repair fields of an LLM reply so the backend always gets a valid ticket."""
+    fallback = heuristic_summary(alert)
+    priority = str(summary.get("priority", "")).lower()
+    steps = summary.get("steps")
+    return {
+        "title": str(summary.get("title") or fallback["title"])[:200],
+        "priority": priority if priority in PRIORITIES else fallback["priority"],
+        "description": str(summary.get("description") or fallback["description"]),
+        "steps": [str(step) for step in steps] if isinstance(steps, list) else fallback["steps"],
+    }
+
+
+class AlertTriageWorker:
+    """Summarises alerts with an LLM and files them as backend tickets.
+
+    AWS and HTTP clients can be injected (e.g. LocalStack clients or the
+    in-memory SQS stand-in); by default they are created from ``config``.
+    """
+
+    def __init__(
+        self,
+        config: WorkerConfig,
+        sqs_client: Any = None,
+        secrets_client: Any = None,
+        cloudwatch_client: Any = None,
+        http_session: Optional[requests.Session] = None,
+        llm_client: Any = None,
+    ) -> None:
+        self.config = config
+        self._sqs = sqs_client
+        self._secrets = secrets_client
+        self._cloudwatch = cloudwatch_client
+        self.backend = BackendClient(
+            config.backend_base_url.rstrip("/") + config.backend_service_route,
+            self._backend_token,
+            session=http_session,
+            pool_size=config.backend_pool_size,
+            timeout=BACKEND_TIMEOUT_SECONDS,
+        )
+        self._batcher: Optional[TicketBatcher] = None
+        if config.backend_batch_size > 1:
+            self._batcher = TicketBatcher(
+                self.backend,
+                config.backend_batch_size,
+                config.backend_batch_interval_seconds,
+                max_in_flight=config.backend_pool_size,
+            )
+        self._llm = llm_client
+        self._token: Optional[str] = None
+        self._token_lock = threading.Lock()
+        self.summary_cache = SummaryCache(config.summary_cache_size, config.summary_cache_ttl_seconds)
+        self.metrics = MetricsAggregator(
+            lambda **request: self.cloudwatch.put_metric_data(**request),
+            config.cloudwatch_namespace,
+            flush_interval=config.metrics_flush_interval_seconds,
+            max_series=config.metrics_max_series,
+        )
+
+    # --- Clients ---
+
+    def _client(self, service: str, endpoint_url: Optional[str]) -> Any:
+        kwargs = {"region_name": self.config.aws_region}
+        if endpoint_url:
+            kwargs["endpoint_url"] = endpoint_url
+        return boto3.client(service, **kwargs)
+
+    @property
+    def sqs(self) -> Any:
+        if self._sqs is None:
+            self._sqs = self._client("sqs", self.config.sqs_endpoint_url)
+        return self._sqs
+
+    @property
+    def cloudwatch(self) -> Any:
+        if self._cloudwatch is None:
+            self._cloudwatch = self._client("cloudwatch", self.config.cloudwatch_endpoint_url)
+        return self._cloudwatch
+
+    def _llm_client(self) -> Any:
+        if self._llm is None and os.environ.get("OPENAI_API_KEY"):
+            from openai import OpenAI
+
+            self._llm = OpenAI()
+        return self._llm
+
+    # --- Secrets ---
+
+    def _backend_token(self) -> str:
+        """Fetch the backend token once: Secrets Manager first, then the environment."""
+        with self._token_lock:
+            if self._token is None:
+                self._token = self._fetch_backend_token()
+            return self._token
+
+    def _fetch_backend_token(self) -> str:
+        secret_id = self.config.secrets_manager_secret_id
+        if secret_id:
+            try:
+                if self._secrets is None:
+                    self._secrets = self._client("secretsmanager", self.config.sqs_endpoint_url)
+                secret = self._secrets.get_secret_value(SecretId=secret_id)["SecretString"]
+                try:
+                    return json.loads(secret)["BACKEND_TOKEN"]
+                except (ValueError, KeyError, TypeError):
+                    return secret
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Could not read secret %s; falling back to environment", secret_id)
+        token = os.environ.get(self.config.backend_token_env_fallback)
+        if not token:
+            raise RuntimeError(
+                f"No backend token: set {self.config.backend_token_env_fallback} or BACKEND_TOKEN_SECRET_ID"
+            )
+        return token
+
+    # --- Pipeline ---
+
+    def _call_llm(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarise ``alert`` with the LLM, or heuristically when no LLM is configured."""
+        client = self._llm_client()
+        if client is None:
+            return heuristic_summary(alert)
+        prompt = PROMPT_TEMPLATE.format(alert_json=json.dumps(alert, sort_keys=True))
+        response = client.chat.completions.create(
+            model=self.config.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        return normalize_summary(json.loads(response.choices[0].message.content), alert)
+
+    @staticmethod
+    def _ticket(summary: Dict[str, Any]) -> Dict[str, Any]:
+        description = summary["description"]
+        if summary.get("steps"):
+            description += "\n\nSteps:\n" + "\n".join(f"- {step}" for step in summary["steps"])
+        return {"title": summary["title"], "description": description, "priority": summary["priority"]}
+
+    def _post_ticket(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the ticket for ``summary``, batched with concurrent tickets when enabled."""
+        ticket = self._ticket(summary)
+        if self._batcher is None:
+            return self.backend.create_ticket(ticket)
+        # No timeout: the batch request is bounded by the client's own timeout, and
+        # giving up while it is still queued would leave the message to be retried
+        # and its ticket filed twice.
+        return self._batcher.submit(ticket).result()
+
+    def _create_tickets(self, tickets: List[Dict[str, Any]], pool: ThreadPoolExecutor) -> List[TicketResult]:
+        """Create ``tickets`` in array requests when batching is enabled, otherwise concurrently."""
+        if self.config.backend_batch_size <= 1:
+            return list(pool.map(self.backend.try_create_ticket, tickets))
+        size = self.config.backend_batch_size
+        chunks = [tickets[start:start + size] for start in range(0, len(tickets), size)]
+        return [result for chunk_results in pool.map(self._create_ticket_batch, chunks) for result in chunk_results]
+
+    def _create_ticket_batch(self, tickets: List[Dict[str, Any]]) -> List[TicketResult]:
+        try:
+            return self.backend.create_tickets(tickets)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Ticket batch of %d failed", len(tickets))
+            return [TicketResult(error=str(exc)) for _ in tickets]
+
+    def _put_metric(self, name: str, value: float = 1.0) -> None:
+        self.metrics.increment(name, value)
+
+    def _observe_latency(self, stage: str, mode: str, started: float) -> None:
+        self.metrics.observe(
+            "ProcessingLatency", (time.perf_counter() - started) * 1000, dimensions={"Stage": stage, "Mode": mode}
+        )
+
+    def process_alert_payload(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarise one alert and create its ticket. Raises on failure."""
+        try:
+            started = time.perf_counter()
+            summary = self._call_llm(alert)
+            self._observe_latency("summarize", "alert", started)
+            started = time.perf_counter()
+            ticket = self._post_ticket(summary)
+            self._observe_latency("ticket", "alert", started)
+        except Exception:
+            self._put_metric("SummarizationFailures")
+            raise
+        self._put_metric("TicketsCreated")
+        logger.info("Created ticket %s for alert %s", ticket.get("id"), alert.get("id"))
+        return ticket
+
+    def _handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return self.process_alert_payload(json.loads(message["Body"]))
+
+    def _poll_once(self) -> int:
+        """Long-poll once and process the batch one message at a time.
+
+        Returns the number of messages processed successfully.
+        """
+        response = self.sqs.receive_message(
+            QueueUrl=self.config.sqs_queue_url,
+            MaxNumberOfMessages=self.config.sqs_max_messages,
+            WaitTimeSeconds=self.config.sqs_wait_time_seconds,
+        )
+        processed = 0
+        for message in response.get("Messages", []):
+            try:
+                self._handle_message(message)
+            except Exception:  # pylint: disable=broad-except
+                # Leave the message on the queue; SQS retries and eventually dead-letters it.
+                logger.exception("Failed to process message %s", message.get("MessageId"))
+                continue
+            self.sqs.delete_message(QueueUrl=self.config.sqs_queue_url, ReceiptHandle=message["ReceiptHandle"])
+            processed += 1
+        return processed
+
+    # --- Batch mode: one summary and ticket per incident ---
+
+    def _summarize_incident(self, incident: Incident) -> Dict[str, Any]:
+        """Summarise an incident, reusing the cached summary of its template when there is one.
+
+        The LLM only sees the masked message template and the severity, the same
+        inputs as the cache key, so a cached summary carries no host names,
+        values or counts of the incident it was first written for. Those go into
+        the ticket outside the summary (see ``_incident_ticket``).
+        """
+        priority = _priority_for_severity(incident.severity)
+        key = summary_key(incident.representative_message, priority)
+        template = mask_variables(" ".join(incident.representative_message.split()))
+        return self.summary_cache.get_or_create(key, lambda: self._call_llm({
+            "summary": template,
+            "severity": incident.severity,
+        }))
+
+    def _incident_ticket(self, incident: Incident) -> Dict[str, Any]:
+        summary = self._summarize_incident(incident)
+        occurrences = (
+            f"{incident.count} alert(s) on {incident.host} between "
+            f"{incident.start_time.isoformat()} and {incident.end_time.isoformat()}."
+        )
+        samples = "\n".join(f"- {message}" for message in incident.messages)
+        return self._ticket({
+            **summary,
+            "title": f"[{incident.host}] {summary['title']}"[:200],
+            "description": f"{summary['description']}\n\n{occurrences}\n\nMessages:\n{samples}",
+        })
+
+    def process_alert_batch(self, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Cluster a batch of alerts into incidents and file one ticket per incident.
+
+        Returns a report with the indices of alerts whose incident was filed
+        (``succeeded``) or failed, and the number of summaries the LLM produced.
+        """
+        started = time.perf_counter()
+        incidents = cluster_payloads(alerts)
+        self._observe_latency("cluster", "batch", started)
+        misses_before = self.summary_cache.misses
+        succeeded: List[int] = []
+        failed: List[int] = []
+        summarized: List[Incident] = []
+        payloads: List[Dict[str, Any]] = []
+        workers = max(1, min(self.config.worker_processors, len(incidents)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = time.perf_counter()
+            futures = [(incident, pool.submit(self._incident_ticket, incident)) for incident in incidents]
+            for incident, future in futures:
+                try:
+                    payloads.append(future.result())
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Failed to summarise incident on %s (%d alerts)", incident.host, incident.count)
+                    failed.extend(incident.payload_indices)
+                    continue
+                summarized.append(incident)
+            self._observe_latency("summarize", "batch", started)
+            started = time.perf_counter()
+            results = self._create_tickets(payloads, pool)
+            self._observe_latency("ticket", "batch", started)
+        tickets: List[Dict[str, Any]] = []
+        for incident, result in zip(summarized, results):
+            if result.ok:
+                tickets.append(result.ticket)
+                succeeded.extend(incident.payload_indices)
+            else:
+                logger.error("Failed to file incident on %s (%d alerts): %s", incident.host, incident.count, result.error)
+                failed.extend(incident.payload_indices)
+        if len(tickets) < len(incidents):
+            self._put_metric("SummarizationFailures", len(incidents) - len(tickets))
+        if tickets:
+            self._put_metric("TicketsCreated", len(tickets))
+        report = {
+            "alerts": len(alerts),
+            "incidents": len(incidents),
+            "tickets": len(tickets),
+            "summaries": self.summary_cache.misses - misses_before,
+            "succeeded": succeeded,
+            "failed": failed,
+        }
+        logger.info(
+            "Batch of %d alerts: %d incidents, %d tickets, %d LLM summaries",
+            report["alerts"], report["incidents"], report["tickets"], report["summaries"],
+        )
+        return report
+
+    def _poll_window(self) -> int:
+        """Collect messages for one batch window, file their incidents and delete what succeeded.
+
+        Returns the number of messages deleted.
+        """
+        deadline = time.monotonic() + self.config.batch_window_seconds
+        messages: List[Dict[str, Any]] = []
+        while len(messages) < self.config.batch_max_alerts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            response = self.sqs.receive_message(
+                QueueUrl=self.config.sqs_queue_url,
+                MaxNumberOfMessages=min(SQS_BATCH_LIMIT, self.config.batch_max_alerts - len(messages)),
+                WaitTimeSeconds=max(0, min(self.config.sqs_wait_time_seconds, int(remaining))),
+                # Must outlast the rest of the window plus clustering and filing.
+                VisibilityTimeout=self.config.sqs_visibility_timeout,
+            )
+            messages.extend(response.get("Messages", []))
+
+        payloads, parsed = [], []
+        for message in messages:
+            # Invalid messages are left on the queue; SQS retries and eventually dead-letters them.
+            try:
+                payload = json.loads(message["Body"])
+            except ValueError:
+                logger.error("Message %s is not valid JSON", message.get("MessageId"))
+                continue
+            if not is_valid_payload(payload):
+                logger.error("Message %s is not a valid alert", message.get("MessageId"))
+                continue
+            payloads.append(payload)
+            parsed.append(message)
+        if not parsed:
+            return 0
+
+        try:
+            report = self.process_alert_batch(payloads)
+        except Exception:  # pylint: disable=broad-except
+            # Only this window fails: its messages reappear after the visibility timeout.
+            logger.exception("Failed to process a batch of %d alerts", len(payloads))
+            self._put_metric("BatchFailures")
+            return 0
+        receipt_handles = [parsed[index]["ReceiptHandle"] for index in report["succeeded"]]
+        deleted = 0
+        for start in range(0, len(receipt_handles), SQS_BATCH_LIMIT):
+            entries = [
+                {"Id": str(i), "ReceiptHandle": handle}
+                for i, handle in enumerate(receipt_handles[start:start + SQS_BATCH_LIMIT])
+            ]
+            try:
+                response = self.sqs.delete_message_batch(QueueUrl=self.config.sqs_queue_url, Entries=entries)
+            except Exception:  # pylint: disable=broad-except
+                # The messages reappear after their visibility timeout and are processed again.
+                logger.exception("delete_message_batch failed for %d messages", len(entries))
+                continue
+            for failure in response.get("Failed", []):
+                logger.warning("Could not delete message %s: %s", failure.get("Id"), failure.get("Code"))
+            deleted += len(response.get("Successful", []))
+        return deleted
+
+    def close(self) -> None:
+        """Send tickets still waiting for a batch, then flush buffered metrics."""
+        if self._batcher is not None:
+            self._batcher.close()
+        self.metrics.close()
+
+    def run_forever(self) -> None:
+        """Consume the queue until interrupted."""
+        self.config.validate()
+        try:
+            if self.config.batch_window_seconds > 0:
+                while True:
+                    self._poll_window()
+            if self.config.worker_processors > 1:
+                from .consumer import PipelinedConsumer
+
+                consumer = PipelinedConsumer.from_config(self, self.config)
+                consumer.start()
+                try:
+                    while True:
+                        time.sleep(1)
+                finally:
+                    consumer.stop()
+            while True:
+                self._poll_once()
+        finally:
+            self.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    AlertTriageWorker(WorkerConfig.from_env()).run_forever()
+
+
+if __name__ == "__main__":
+    main()